@@ -26,6 +26,16 @@ class SessionAdmin(ModelAdmin):
     list_display = ("title", "association", "start_date", "end_date", "is_active")
     search_fields = ("title", "association__association_short_name")
     list_filter = ("is_active", "association")
+    actions = ["resend_receipts"]
+
+    @admin.action(description="Resend all receipts for selected sessions")
+    def resend_receipts(self, request, queryset):
+        from transactions.emails import queue_session_receipts
+
+        queued = sum(queue_session_receipts(session) for session in queryset)
+        self.message_user(
+            request, f"Queued {queued} receipt email(s); run_outbox will send them."
+        )
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
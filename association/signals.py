@@ -1,10 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from main.authentication import invalidate_user
 from main.models import AdminUser
+from payments.models import PaymentItem, ReceiverBankAccount
 from transactions.models import Transaction
 
-from .models import Association
+from . import storefront
+from .models import Association, Session
 
 
 @receiver(post_save, sender=AdminUser)
@@ -30,3 +33,60 @@ def create_notification_for_transaction(sender, instance, created, **kwargs):
         payer = f"{instance.payer.first_name} {instance.payer.last_name}"
         message = f"New transaction of ₦{instance.amount_paid} from {payer}."
         association.notifications.create(message=message)
+
+
+def invalidate_admin(association_id):
+    """The cached auth user carries its association and current session."""
+    admin = (
+        AdminUser.objects.filter(association__id=association_id)
+        .values("pk", "token_version")
+        .first()
+    )
+    if admin:
+        invalidate_user(admin["pk"], admin["token_version"])
+
+
+@receiver(post_save, sender=Association)
+def invalidate_admin_for_association(sender, instance, **kwargs):
+    invalidate_admin(instance.pk)
+
+
+@receiver(post_save, sender=Session)
+def invalidate_admin_for_session(sender, instance, **kwargs):
+    invalidate_admin(instance.association_id)
+
+
+@receiver(pre_save, sender=Association)
+def remember_short_name(sender, instance, **kwargs):
+    # A renamed association must drop the storefront under its old name too
+    if instance.pk:
+        instance._previous_short_name = (
+            Association.objects.filter(pk=instance.pk)
+            .values_list("association_short_name", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Association)
+@receiver(post_delete, sender=Association)
+def bump_association_storefront(sender, instance, **kwargs):
+    storefront.bump_version(instance.association_short_name)
+    previous = getattr(instance, "_previous_short_name", None)
+    if previous and previous != instance.association_short_name:
+        storefront.bump_version(previous)
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+@receiver(post_save, sender=PaymentItem)
+@receiver(post_delete, sender=PaymentItem)
+@receiver(post_save, sender=ReceiverBankAccount)
+@receiver(post_delete, sender=ReceiverBankAccount)
+def bump_related_storefront(sender, instance, **kwargs):
+    short_name = (
+        Association.objects.filter(pk=instance.association_id)
+        .values_list("association_short_name", flat=True)
+        .first()
+    )
+    if short_name:
+        storefront.bump_version(short_name)
@@ -0,0 +1,86 @@
+"""
+Cached payload for the public ``get-association/<short_name>/`` storefront.
+
+Each short name has a version counter in the cache. The serialized
+association is stored under ``(short_name, version)`` together with its ETag,
+and the signals in ``association.signals`` bump the version whenever the
+association, its sessions, payment items or bank account change. Stale
+payloads are never read again and simply expire.
+
+The version bump is only seen by other processes when the default cache is
+shared (``REDIS_URL``). With the per-process fallback, a worker keeps serving
+its own copy until ``STOREFRONT_CACHE_TTL`` runs out, which is why that TTL
+defaults to a few seconds there.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+STOREFRONT_PREFIX = "storefront"
+# Counters outlive any payload stored under them, then expire with the rest;
+# a restarted counter comes from the clock, so it can't reuse an old version
+VERSION_TTL = 24 * 60 * 60
+
+
+def version_key(short_name):
+    return f"{STOREFRONT_PREFIX}:version:{short_name}"
+
+
+def payload_key(short_name, version):
+    return f"{STOREFRONT_PREFIX}:{short_name}:{version}"
+
+
+def new_version():
+    # Counters restart from the clock, so an evicted counter can never come
+    # back at a version whose payload is still cached
+    return time.time_ns()
+
+
+def peek_version(short_name):
+    """The current version, or ``None`` if nothing was cached for the name."""
+    return cache.get(version_key(short_name))
+
+
+def get_version(short_name):
+    """
+    The current version, starting a counter if there is none. Only call this
+    for an association that exists: the view is public, and every counter
+    started is a cache entry.
+    """
+    key = version_key(short_name)
+    version = cache.get(key)
+    if version is None:
+        # add() so two processes racing here agree on the first version
+        version = new_version()
+        if not cache.add(key, version, VERSION_TTL):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(short_name):
+    key = version_key(short_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), VERSION_TTL)
+
+
+def get_payload(short_name, version):
+    """``(etag, data)`` for this version, or ``None`` on a miss."""
+    return cache.get(payload_key(short_name, version))
+
+
+def store_payload(short_name, version, data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+    cache.set(
+        payload_key(short_name, version),
+        (etag, data),
+        getattr(settings, "STOREFRONT_CACHE_TTL", 300),
+    )
+    return etag, data
@@ -1 +1,155 @@
-# Create your tests here.
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from association import storefront
+from association.models import Notification
+from utils.testing import (
+    QueryBudgetMixin,
+    api_client,
+    make_payment_items,
+    make_session,
+    seed_association,
+)
+
+
+class AssociationQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Seconds per request; generous, so only a runaway endpoint trips it
+    max_seconds = 2.0
+
+    def setUp(self):
+        self.scenario = seed_association(items=0)
+        self.association = self.scenario.association
+        self.client = api_client(self.scenario.admin)
+
+    def add_items(self, n):
+        make_payment_items(self.association, self.scenario.session, n)
+
+    def add_sessions(self, n):
+        for _ in range(n):
+            make_session(self.association, current=False)
+
+    def test_profile_list(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/association/profiles/"),
+            self.add_items,
+            max_queries=7,
+        )
+
+    def test_profile_detail(self):
+        self.assertFlatQueries(
+            lambda: self.client.get(
+                f"/api/association/profiles/{self.association.pk}/"
+            ),
+            self.add_items,
+            max_queries=6,
+        )
+
+    def test_public_association(self):
+        client = api_client()
+        short_name = self.association.association_short_name
+        self.assertFlatQueries(
+            lambda: client.get(f"/api/association/get-association/{short_name}/"),
+            self.add_items,
+            max_queries=4,
+        )
+
+    def test_admin_profile(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/association/get-profile/"),
+            self.add_sessions,
+            max_queries=3,
+        )
+
+    def test_session_list(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/association/sessions/"),
+            self.add_sessions,
+            max_queries=4,
+        )
+
+    def test_notification_list(self):
+        def add_notifications(n):
+            Notification.objects.bulk_create(
+                Notification(association=self.association, message=f"Note {i}")
+                for i in range(n)
+            )
+
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/association/notifications/"),
+            add_notifications,
+            max_queries=4,
+        )
+
+
+class StorefrontCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.scenario = seed_association(items=2)
+        self.association = self.scenario.association
+        self.url = (
+            f"/api/association/get-association/"
+            f"{self.association.association_short_name}/"
+        )
+        self.client = api_client()
+
+    def item_titles(self, response):
+        return sorted(item["title"] for item in response.data["payment_items"])
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_payment_item_change_invalidates(self):
+        first = self.client.get(self.url)
+        item = self.scenario.items[0]
+        item.title = "Renamed Dues"
+        item.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Renamed Dues", self.item_titles(response))
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_new_session_invalidates(self):
+        self.client.get(self.url)
+        session = make_session(self.association)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["current_session"], session.pk)
+        self.assertEqual(response.data["payment_items"], [])
+
+    def test_unknown_names_leave_no_cache_entries(self):
+        for n in range(3):
+            response = self.client.get(f"/api/association/get-association/nope{n}/")
+            self.assertEqual(response.status_code, 404)
+        self.assertIsNone(storefront.peek_version("nope0"))
+
+    def test_version_keys_expire(self):
+        short_name = self.association.association_short_name
+        cache.delete(storefront.version_key(short_name))
+        with mock.patch.object(storefront, "cache", wraps=cache) as wrapped:
+            storefront.get_version(short_name)
+            wrapped.incr.side_effect = ValueError
+            storefront.bump_version(short_name)
+        self.assertEqual(wrapped.add.call_args.args[2], storefront.VERSION_TTL)
+        self.assertEqual(wrapped.set.call_args.args[2], storefront.VERSION_TTL)
+
+    def test_rename_drops_old_short_name(self):
+        self.client.get(self.url)
+        self.association.association_short_name = "renamed"
+        self.association.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        response = self.client.get("/api/association/get-association/renamed/")
+        self.assertEqual(response.status_code, 200)
+
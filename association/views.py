@@ -1,3 +1,5 @@
+from django.http import Http404, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
@@ -5,6 +7,9 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from main.tenancy import TenantMixin
+
+from . import storefront
 from .models import Association, Notification, Session
 from .serializers import (
     AdminProfileSerializer,
@@ -35,13 +40,40 @@ class AssociationViewSet(viewsets.ModelViewSet):
             return Association.objects.none()
 
 class RetrieveAssociationViewSet(generics.RetrieveAPIView):
-    queryset = Association.objects.all()
+    """
+    Public storefront every payer opens first. The serialized payload is
+    cached per short name and version (see ``association.storefront``) and
+    served with an ETag, so a repeat visit is a 304.
+    """
+
+    queryset = Association.objects.select_related("bank_account")
     serializer_class = AssociationSerializer
     lookup_field = "association_short_name"
     permission_classes = [AllowAny]
 
-
-class NotificationViewSet(viewsets.ModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        short_name = kwargs[self.lookup_field]
+        version = storefront.peek_version(short_name)
+        cached = version and storefront.get_payload(short_name, version)
+        if not cached:
+            # Unknown names 404 here, before anything is written to the cache
+            known = self.get_queryset().filter(association_short_name=short_name)
+            if not known.exists():
+                raise Http404
+            # Versioned before serializing, so a change that lands meanwhile
+            # bumps past what gets stored
+            version = storefront.get_version(short_name)
+            data = self.get_serializer(self.get_object()).data
+            cached = storefront.store_payload(short_name, version, data)
+        etag, data = cached
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return HttpResponseNotModified(headers=headers)
+        return Response(data, headers=headers)
+
+
+class NotificationViewSet(TenantMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
     queryset = Notification.objects.all()
@@ -51,27 +83,20 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         Get notifications for the authenticated AdminUser's association
         """
-        try:
-            # Since the user should be an AdminUser with a related Association
-            if hasattr(self.request.user, "association"):
-                return Notification.objects.filter(
-                    association=self.request.user.association
-                ).order_by("-created_at")
-            return Notification.objects.none()
-        except (AttributeError, Association.DoesNotExist):
-            return Notification.objects.none()
+        association = self.tenant.association
+        if association:
+            return Notification.objects.filter(association=association).order_by(
+                "-created_at"
+            )
+        return Notification.objects.none()
 
     def perform_create(self, serializer):
         """
         Automatically set the association when creating a notification
         """
-        try:
-            if hasattr(self.request.user, "association"):
-                serializer.save(association=self.request.user.association)
-            else:
-                raise ValidationError("User has no associated association")
-        except (AttributeError, Association.DoesNotExist):
-            raise ValidationError("Unable to determine user's association")
+        if not self.tenant.association:
+            raise ValidationError("User has no associated association")
+        serializer.save(association=self.tenant.association)
 
     @action(detail=False, methods=["post"], url_path="mark-all-read")
     def mark_all_read(self, request):
@@ -79,9 +104,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Mark all notifications as read for the authenticated user's association
         """
         try:
-            if hasattr(request.user, "association"):
-                association = request.user.association
-
+            association = self.tenant.association
+            if association:
                 # Get count of unread notifications before updating
                 unread_count = Notification.objects.filter(
                     association=association, is_read=False
@@ -129,9 +153,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Get count of unread notifications for the authenticated user's association
         """
         try:
-            if hasattr(request.user, "association"):
-                association = request.user.association
-
+            association = self.tenant.association
+            if association:
                 unread_count = Notification.objects.filter(
                     association=association, is_read=False
                 ).count()
@@ -147,12 +170,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return Response({"unread_count": 0}, status=status.HTTP_200_OK)
 
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(TenantMixin, viewsets.ModelViewSet):
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        association = getattr(self.request.user, "association", None)
+        association = self.tenant.association
         if association:
             return Session.objects.filter(association=association).order_by(
                 "-created_at"
@@ -161,12 +184,12 @@ class SessionViewSet(viewsets.ModelViewSet):
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        context["association"] = getattr(self.request.user, "association", None)
+        context["association"] = self.tenant.association
         return context
 
     def perform_create(self, serializer):
         # When creating a new session, it becomes active and current
-        association = getattr(self.request.user, "association", None)
+        association = self.tenant.association
         if association:
             # Deactivate all other sessions for this association
             Session.objects.filter(association=association, is_active=True).update(is_active=False)
@@ -185,10 +208,10 @@ class SessionViewSet(viewsets.ModelViewSet):
         """Set this session as the current session for the association"""
         try:
             session = self.get_object()
-            association = request.user.association
+            association = self.tenant.association
 
             # Verify session belongs to this association
-            if session.association != association:
+            if session.association_id != association.pk:
                 return Response(
                     {"error": "Session does not belong to your association"},
                     status=status.HTTP_403_FORBIDDEN,
@@ -228,14 +251,13 @@ class SessionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def current(self, request):
         """Get the current session for the association"""
-        association = getattr(request.user, "association", None)
-        if not association:
+        if not self.tenant.association:
             return Response(
                 {"error": "No association found"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if association.current_session:
-            return Response(SessionSerializer(association.current_session).data)
+        if self.tenant.current_session:
+            return Response(SessionSerializer(self.tenant.current_session).data)
         else:
             return Response(
                 {
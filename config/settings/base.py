@@ -42,6 +42,7 @@ UNFOLD = {
 }
 
 MIDDLEWARE = [
+    "main.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -120,47 +121,123 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Cache shared by every worker and process, e.g. redis://host:6379/0. Without
+# it each process falls back to its own LocMemCache, where one worker can't
+# clear another's entries, so the cache TTLs below stay short
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+SHARED_CACHE = bool(REDIS_URL)
+
+# Seconds an authenticated user is served from cache instead of the database.
+# Revocation (logout_all, password change) clears the shared entry at once;
+# other processes may keep their local copy for AUTH_USER_CACHE_LOCAL_TTL.
+# With a per-process cache nothing is cleared across workers, so the cached
+# entry lives no longer than the local copy
+AUTH_USER_CACHE_LOCAL_TTL = config("AUTH_USER_CACHE_LOCAL_TTL", default=5, cast=int)
+AUTH_USER_CACHE_TTL = config(
+    "AUTH_USER_CACHE_TTL",
+    default=60 if SHARED_CACHE else AUTH_USER_CACHE_LOCAL_TTL,
+    cast=int,
+)
+
+# Seconds a rendered public storefront stays cached; any change to the
+# association bumps its version first. The bump only reaches other workers
+# through a shared cache, so without one this TTL is all that bounds staleness
+STOREFRONT_CACHE_TTL = config(
+    "STOREFRONT_CACHE_TTL", default=300 if SHARED_CACHE else 10, cast=int
+)
+
+# How verified payments reach parked payment-status requests (see
+# transactions/status.py). CacheChannel needs PAYMENT_STATUS_CACHE to be
+# shared by every worker and process_webhooks, so without a shared cache the
+# waiters poll the database instead
+PAYMENT_STATUS_CHANNEL = config(
+    "PAYMENT_STATUS_CHANNEL",
+    default="transactions.status.CacheChannel"
+    if SHARED_CACHE
+    else "transactions.status.DatabaseChannel",
+)
+PAYMENT_STATUS_CACHE = config("PAYMENT_STATUS_CACHE", default="default")
+PAYMENT_STATUS_WAIT_TIMEOUT = config("PAYMENT_STATUS_WAIT_TIMEOUT", default=25, cast=int)
+# The wait/ and events/ endpoints park a request for up to
+# PAYMENT_STATUS_WAIT_TIMEOUT seconds. Only turn them on when config.asgi is
+# served by an ASGI server (e.g. gunicorn -k uvicorn.workers.UvicornWorker);
+# under sync gunicorn workers each waiter blocks a whole worker
+PAYMENT_STATUS_LONG_POLL = config("PAYMENT_STATUS_LONG_POLL", default=False, cast=bool)
+
+# Mail pacing for bulk sends (main.mail.send_bulk) and the run_outbox worker:
+# messages sent between pauses, and the pause in seconds
+MAIL_BATCH_SIZE = config("MAIL_BATCH_SIZE", default=50, cast=int)
+MAIL_BATCH_PAUSE = config("MAIL_BATCH_PAUSE", default=1.0, cast=float)
+
 NUBAPI_TOKEN = config("NUBAPI_KEY", default="")
 
 PLATFORM_PAYOUT_FEE_NGN = 55
 PLATFORM_PAYIN_PERCENT = 0.018
 
-KORAPAY_BASE_URL = "https://api.korapay.com/merchant/api/v1"
+# Point both at `manage.py simulate_gateways` (<url>/korapay, <url>/paystack)
+# to run without the real providers
+KORAPAY_BASE_URL = config(
+    "KORAPAY_BASE_URL", default="https://api.korapay.com/merchant/api/v1"
+)
+PAYSTACK_BASE_URL = config("PAYSTACK_BASE_URL", default="https://api.paystack.co")
+
+# Keep-alive pools for outbound provider calls (see gateways/)
+GATEWAYS = {
+    "paystack": {"pool_maxsize": config("PAYSTACK_POOL_SIZE", default=16, cast=int)},
+    "korapay": {"pool_maxsize": config("KORAPAY_POOL_SIZE", default=16, cast=int)},
+}
 
 GOOGLE_CLIENT_ID = config("GOOGLE_CLIENT_ID", default="")
 
+# Bearer token required by /api/main/metrics/; the endpoint 404s when unset
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # OCR_SPACE_API_KEY = config('OCR_SPACE_API_KEY', default='helloworld')
 
 # Logging configuration
+# App loggers write through a queue; a listener thread does the JSON
+# formatting and console/file I/O (see utils/log.py)
+LOG_JSON = config("LOG_JSON", default=True, cast=bool)
+LOG_FILE = config("LOG_FILE", default="korapay_webhooks.log")
+LOG_DEBUG_TRACING = config("LOG_DEBUG_TRACING", default=False, cast=bool)
+LOG_DEBUG_SAMPLE_RATE = config("LOG_DEBUG_SAMPLE_RATE", default=0.05, cast=float)
+
+APP_LOG_LEVEL = "DEBUG" if LOG_DEBUG_TRACING else "INFO"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
-    "handlers": {
-        "file": {
-            "level": "INFO",
-            "class": "logging.FileHandler",
-            "filename": "korapay_webhooks.log",
+    "filters": {
+        "sampled_debug": {
+            "()": "utils.log.SampledDebugFilter",
+            "rate": LOG_DEBUG_SAMPLE_RATE,
         },
-        "console": {
-            "level": "INFO",
-            "class": "logging.StreamHandler",
+    },
+    "handlers": {
+        "async": {
+            "()": "utils.log.AsyncLogHandler",
+            "filename": LOG_FILE,
+            "json_format": LOG_JSON,
+            "filters": ["sampled_debug"],
         },
     },
     "loggers": {
-        "main.views": {
-            "handlers": ["file", "console"],
-            "level": "INFO",
-            "propagate": True,
-        },
-        "main.services": {
-            "handlers": ["file", "console"],
-            "level": "INFO",
-            "propagate": True,
-        },
-        "payments.services": {
-            "handlers": ["file", "console"],
-            "level": "INFO",
-            "propagate": True,
-        },
+        app: {"handlers": ["async"], "level": APP_LOG_LEVEL, "propagate": False}
+        for app in (
+            "main",
+            "association",
+            "payers",
+            "payments",
+            "transactions",
+            "gateways",
+            "utils",
+        )
     },
 }
@@ -0,0 +1,28 @@
+"""
+Settings for load tests (see loadtest/).
+
+Same as dev, but nothing leaves the machine: provider calls go to
+``manage.py simulate_gateways``, mail stays in memory and webhook signatures
+use a shared test secret the locustfile also knows.
+"""
+
+from decouple import config
+
+from .dev import *
+
+# DEBUG would keep every query in memory for the life of the worker
+DEBUG = False
+
+PAYSTACK_BASE_URL = config(
+    "PAYSTACK_BASE_URL", default="http://127.0.0.1:8010/paystack"
+)
+KORAPAY_BASE_URL = config("KORAPAY_BASE_URL", default="http://127.0.0.1:8010/korapay")
+PAYSTACK_SECRET = config("LOADTEST_PAYSTACK_SECRET", default="sk_test_loadtest")
+PAYSTACK_WEBHOOK_SECRET = config(
+    "LOADTEST_WEBHOOK_SECRET", default="loadtest-webhook-secret"
+)
+KORAPAY_WEBHOOK_SECRET = config(
+    "LOADTEST_KORAPAY_WEBHOOK_SECRET", default="loadtest-korapay-secret"
+)
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
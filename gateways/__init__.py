@@ -0,0 +1,33 @@
+"""
+Pooled HTTP clients for the payment providers.
+
+    from gateways import korapay
+    resp = korapay().post("charges/initialize", endpoint="charges.initialize", json=payload)
+
+Pool sizes, retries and timeouts can be tuned per provider through
+``settings.GATEWAYS``, e.g. ``{"korapay": {"pool_maxsize": 32, "timeouts":
+{"transactions.disburse": (3.05, 60)}}}``.
+"""
+
+from .client import GatewayClient, get_client, json_body, reset_clients
+from .providers import KorapayClient, PaystackClient
+
+
+def paystack() -> PaystackClient:
+    return get_client(PaystackClient)
+
+
+def korapay() -> KorapayClient:
+    return get_client(KorapayClient)
+
+
+__all__ = [
+    "GatewayClient",
+    "KorapayClient",
+    "PaystackClient",
+    "get_client",
+    "json_body",
+    "korapay",
+    "paystack",
+    "reset_clients",
+]
@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from main import metrics
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULTS = {
+    "pool_connections": 4,
+    "pool_maxsize": 16,
+    # Extra attempts for idempotent calls. Failures to connect are retried for
+    # every method since nothing reached the provider yet
+    "retries": 2,
+    "backoff": 0.3,
+    # (connect, read) seconds
+    "timeout": (3.05, 30),
+}
+
+
+class GatewayClient:
+    """
+    Keep-alive HTTP client for one payment provider.
+
+    One instance per provider per process (see ``get_client``) owns a
+    ``requests.Session`` whose pool is sized from ``settings.GATEWAYS``, so
+    repeated calls reuse TLS connections instead of handshaking each time.
+    Subclasses set ``name``, ``base_url`` and per-endpoint ``timeouts`` and
+    supply auth headers.
+    """
+
+    name = ""
+    base_url = ""
+    timeouts = {}
+
+    def __init__(self, **options):
+        self.options = {**DEFAULTS, **options}
+        self.session = self.build_session()
+
+    def build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.options["pool_connections"],
+            pool_maxsize=self.options["pool_maxsize"],
+            # Retrying happens in request(), where the method is known
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+
+    def auth_headers(self, **kwargs):
+        return {}
+
+    def timeout_for(self, endpoint):
+        overrides = self.options.get("timeouts") or {}
+        return (
+            overrides.get(endpoint)
+            or self.timeouts.get(endpoint)
+            or self.options["timeout"]
+        )
+
+    def url(self, path):
+        return f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
+
+    def request(
+        self,
+        method,
+        path,
+        *,
+        endpoint,
+        idempotent=None,
+        timeout=None,
+        headers=None,
+        auth=None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send one call and return the ``requests.Response``.
+
+        ``endpoint`` names the call for timeouts and logs. Idempotent calls
+        (GET/HEAD by default, or ``idempotent=True`` for read-only POSTs) are
+        retried with exponential backoff on timeouts, dropped connections and
+        429/5xx responses.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + self.options["retries"]
+        request_headers = {**self.auth_headers(**(auth or {})), **(headers or {})}
+        timeout = timeout or self.timeout_for(endpoint)
+
+        for attempt in range(1, attempts + 1):
+            try:
+                with metrics.track_outbound(self.name, endpoint):
+                    response = self.session.request(
+                        method,
+                        self.url(path),
+                        headers=request_headers,
+                        timeout=timeout,
+                        **kwargs,
+                    )
+                metrics.record_outbound_status(
+                    self.name, endpoint, response.status_code
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == attempts or not (idempotent or never_sent(error)):
+                    raise
+                logger.warning(
+                    "[%s] %s attempt %s failed: %s",
+                    self.name.upper(),
+                    endpoint,
+                    attempt,
+                    error,
+                )
+            else:
+                if (
+                    not idempotent
+                    or response.status_code not in RETRY_STATUSES
+                    or attempt == attempts
+                ):
+                    return response
+                logger.warning(
+                    "[%s] %s attempt %s status=%s",
+                    self.name.upper(),
+                    endpoint,
+                    attempt,
+                    response.status_code,
+                )
+            time.sleep(self.options["backoff"] * 2 ** (attempt - 1))
+
+    def get(self, path, *, endpoint, **kwargs) -> requests.Response:
+        return self.request("GET", path, endpoint=endpoint, **kwargs)
+
+    def post(self, path, *, endpoint, **kwargs) -> requests.Response:
+        return self.request("POST", path, endpoint=endpoint, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def never_sent(error):
+    """True when the request failed before a connection was established."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0] if error.args else None, "reason", None)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def json_body(response):
+    """Parsed JSON body, or ``{"text": ...}`` when the provider sent something else."""
+    try:
+        return response.json()
+    except ValueError:
+        return {"text": response.text}
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(client_class):
+    """
+    The process-wide client for ``client_class``. Rebuilt after a fork so
+    gunicorn workers never share pooled sockets with their parent.
+    """
+    key = (client_class, os.getpid())
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                options = getattr(settings, "GATEWAYS", {}).get(client_class.name, {})
+                client = _clients[key] = client_class(**options)
+    return client
+
+
+def reset_clients():
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,40 @@
+from django.conf import settings
+
+from .client import GatewayClient
+
+
+class PaystackClient(GatewayClient):
+    name = "paystack"
+    timeouts = {
+        "transaction.initialize": (3.05, 20),
+        "transaction.verify": (3.05, 15),
+    }
+
+    @property
+    def base_url(self):
+        return getattr(settings, "PAYSTACK_BASE_URL", "https://api.paystack.co")
+
+    def auth_headers(self):
+        return {"Authorization": f"Bearer {getattr(settings, 'PAYSTACK_SECRET', '')}"}
+
+
+class KorapayClient(GatewayClient):
+    name = "korapay"
+    timeouts = {
+        "charges.initialize": (3.05, 30),
+        "charges.bank_transfer": (3.05, 30),
+        "transactions.disburse": (3.05, 30),
+        "misc.banks": (3.05, 15),
+        "misc.banks.resolve": (3.05, 20),
+    }
+
+    @property
+    def base_url(self):
+        return getattr(
+            settings, "KORAPAY_BASE_URL", "https://api.korapay.com/merchant/api/v1"
+        )
+
+    def auth_headers(self, public=False):
+        # The misc endpoints (bank list, account resolution) take the public key
+        key = "KORAPAY_PUBLIC_KEY" if public else "KORAPAY_SECRET_KEY"
+        return {"Authorization": f"Bearer {getattr(settings, key, '')}"}
@@ -0,0 +1,310 @@
+"""
+Local stand-in for the Paystack and Korapay endpoints the app calls.
+
+``manage.py simulate_gateways`` serves this over HTTP. Paystack lives under
+``/paystack`` and Korapay under ``/korapay``, so pointing ``PAYSTACK_BASE_URL``
+and ``KORAPAY_BASE_URL`` at those prefixes routes all provider traffic here.
+Every call can be slowed down (``latency`` plus up to ``jitter`` seconds),
+failed with a 5xx (``error_rate``) or left hanging past the client's read
+timeout (``timeout_rate``).
+
+For ``webhook_rate`` of the initialized charges, a signed ``charge.success``
+webhook is posted back to ``webhook_url`` ``webhook_delay`` seconds later, the
+way the real provider reports a completed payment.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+PAYSTACK = "paystack"
+KORAPAY = "korapay"
+
+# Longer than any read timeout in gateways.providers
+HANG_SECONDS = 65
+
+BANKS = [
+    {"name": "Access Bank", "code": "044"},
+    {"name": "First Bank of Nigeria", "code": "011"},
+    {"name": "Guaranty Trust Bank", "code": "058"},
+    {"name": "United Bank for Africa", "code": "033"},
+    {"name": "Wema Bank", "code": "035"},
+    {"name": "Zenith Bank", "code": "057"},
+]
+
+
+class GatewaySimulator:
+    def __init__(
+        self,
+        *,
+        paystack_secret="",
+        korapay_secret="",
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        timeout_rate=0.0,
+        webhook_url=None,
+        webhook_rate=1.0,
+        webhook_delay=1.0,
+        seed=None,
+    ):
+        self.paystack_secret = paystack_secret
+        self.korapay_secret = korapay_secret
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.webhook_url = webhook_url
+        self.webhook_rate = webhook_rate
+        self.webhook_delay = webhook_delay
+        self.random = random.Random(seed)
+        # Disbursed references, so a repeated payout is rejected like Korapay does
+        self.payouts = set()
+        self.lock = threading.Lock()
+        self.routes = {
+            ("POST", "/paystack/transaction/initialize"): self.paystack_initialize,
+            ("POST", "/korapay/charges/initialize"): self.korapay_initialize,
+            ("POST", "/korapay/charges/bank-transfer"): self.korapay_bank_transfer,
+            ("POST", "/korapay/transactions/disburse"): self.korapay_disburse,
+            ("GET", "/korapay/misc/banks"): self.korapay_banks,
+            ("POST", "/korapay/misc/banks/resolve"): self.korapay_resolve,
+        }
+
+    def chance(self, rate):
+        return self.random.random() < rate
+
+    def handle(self, method, path, payload):
+        """Returns ``(status, body)`` for one call, after any injected delay."""
+        route = self.routes.get((method, urlsplit(path).path.rstrip("/")))
+        if route is None:
+            return 404, {"status": False, "message": "Not found"}
+
+        time.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if self.chance(self.timeout_rate):
+            time.sleep(HANG_SECONDS)
+        if self.chance(self.error_rate):
+            return 503, {"status": False, "message": "Simulated provider error"}
+        return route(payload)
+
+    # Paystack
+
+    def paystack_initialize(self, payload):
+        reference = payload.get("reference") or f"ps_{secrets.token_hex(6)}"
+        access_code = secrets.token_hex(8)
+        metadata = payload.get("metadata")
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                pass
+        self.maybe_pay(
+            PAYSTACK,
+            {
+                "id": self.random.randrange(10**9),
+                "reference": reference,
+                "status": "success",
+                "amount": payload.get("amount", 0),
+                "currency": payload.get("currency", "NGN"),
+                "customer": {"email": payload.get("email")},
+                "metadata": metadata,
+            },
+        )
+        return 200, {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"https://checkout.paystack.invalid/{access_code}",
+                "access_code": access_code,
+                "reference": reference,
+            },
+        }
+
+    # Korapay
+
+    def korapay_charge(self, payload):
+        return {
+            "reference": payload.get("reference"),
+            "currency": payload.get("currency", "NGN"),
+            "amount": payload.get("amount"),
+            "fee": 0,
+            "status": "success",
+        }
+
+    def korapay_initialize(self, payload):
+        reference = payload.get("reference")
+        self.maybe_pay(KORAPAY, self.korapay_charge(payload))
+        return 200, {
+            "status": True,
+            "message": "Charge created successfully",
+            "data": {
+                "reference": reference,
+                "checkout_url": f"https://checkout.korapay.invalid/{reference}",
+            },
+        }
+
+    def korapay_bank_transfer(self, payload):
+        reference = payload.get("reference")
+        self.maybe_pay(KORAPAY, self.korapay_charge(payload))
+        return 200, {
+            "status": True,
+            "message": "Bank transfer initiated successfully",
+            "data": {
+                "currency": payload.get("currency", "NGN"),
+                "amount": payload.get("amount"),
+                "amount_expected": payload.get("amount"),
+                "fee": 0,
+                "vat": 0,
+                "reference": reference,
+                "payment_reference": f"KPY-{secrets.token_hex(6).upper()}",
+                "status": "processing",
+                "narration": payload.get("narration", ""),
+                "bank_account": {
+                    "account_name": payload.get("account_name") or "DuesPay Checkout",
+                    "account_number": f"{self.random.randrange(10**10):010d}",
+                    "bank_name": "Wema Bank",
+                    "bank_code": "035",
+                },
+                "customer": payload.get("customer") or {},
+            },
+        }
+
+    def korapay_disburse(self, payload):
+        reference = payload.get("reference")
+        destination = payload.get("destination") or {}
+        with self.lock:
+            duplicate = reference in self.payouts
+            self.payouts.add(reference)
+        if duplicate:
+            return 400, {"status": False, "message": "Duplicate payout reference"}
+        return 200, {
+            "status": True,
+            "message": "Transfer initiated successfully",
+            "data": {
+                "amount": destination.get("amount"),
+                "fee": 0,
+                "currency": destination.get("currency", "NGN"),
+                "status": "processing",
+                "reference": reference,
+                "narration": destination.get("narration", ""),
+                "customer": destination.get("customer") or {},
+            },
+        }
+
+    def korapay_banks(self, payload):
+        return 200, {
+            "status": True,
+            "message": "Successful",
+            "data": [{**bank, "country": "NG"} for bank in BANKS],
+        }
+
+    def korapay_resolve(self, payload):
+        account = str(payload.get("account") or "")
+        bank = next((b for b in BANKS if b["code"] == str(payload.get("bank"))), None)
+        if bank is None or not account.isdigit() or len(account) != 10:
+            return 400, {"status": False, "message": "Unable to resolve account"}
+        return 200, {
+            "status": True,
+            "message": "Request completed",
+            "data": {
+                "bank_name": bank["name"],
+                "bank_code": bank["code"],
+                "account_number": account,
+                "account_name": f"SIMULATED ACCOUNT {account[-4:]}",
+            },
+        }
+
+    # Webhooks
+
+    def webhook(self, provider, data):
+        """Body and headers of a signed ``charge.success`` delivery."""
+        body = json.dumps({"event": "charge.success", "data": data}).encode()
+        if provider == PAYSTACK:
+            signature = hmac.new(
+                self.paystack_secret.encode(), body, hashlib.sha512
+            ).hexdigest()
+            header = "x-paystack-signature"
+        else:
+            # Korapay signs just the data object
+            signed = json.dumps(data, separators=(",", ":")).encode()
+            signature = hmac.new(
+                self.korapay_secret.encode(), signed, hashlib.sha256
+            ).hexdigest()
+            header = "x-korapay-signature"
+        return body, {"Content-Type": "application/json", header: signature}
+
+    def maybe_pay(self, provider, data):
+        if not self.webhook_url or not self.chance(self.webhook_rate):
+            return
+        timer = threading.Timer(self.webhook_delay, self.deliver, (provider, data))
+        timer.daemon = True
+        timer.start()
+
+    def deliver(self, provider, data):
+        body, headers = self.webhook(provider, data)
+        try:
+            response = requests.post(
+                self.webhook_url, data=body, headers=headers, timeout=10
+            )
+            logger.info(
+                "[SIMULATOR] %s webhook ref=%s status=%s",
+                provider,
+                data.get("reference"),
+                response.status_code,
+            )
+        except requests.RequestException as error:
+            logger.warning(
+                "[SIMULATOR] %s webhook ref=%s failed: %s",
+                provider,
+                data.get("reference"),
+                error,
+            )
+
+    # HTTP
+
+    def make_server(self, host="127.0.0.1", port=8010):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.dispatch("GET")
+
+            def do_POST(self):
+                self.dispatch("POST")
+
+            def dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    return self.reply(400, {"status": False, "message": "Invalid JSON"})
+                self.reply(*simulator.handle(method, self.path, payload))
+
+            def reply(self, status, body):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (e.g. an injected timeout)
+                    pass
+
+            def log_message(self, format, *args):
+                logger.debug("[SIMULATOR] " + format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
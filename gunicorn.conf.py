@@ -0,0 +1,24 @@
+# Loaded automatically by gunicorn from the working directory.
+import os
+import shutil
+import tempfile
+
+# Workers write their metrics here so /api/main/metrics/ can merge them.
+# prometheus_client picks its value class when it is first imported, so this
+# has to be set before anything imports it
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "duespay-prometheus"),
+)
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # Samples from a previous master would otherwise be merged in
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,40 @@
+"""
+Load tests for the payer checkout funnel and the admin dashboard.
+
+Run everything against local stand-ins so no real money, Paystack quota or
+mail is involved::
+
+    # 1. the app, on the load-test settings
+    export DJANGO_SETTINGS_MODULE=config.settings.loadtest
+    python manage.py migrate
+    python manage.py seed_loadtest --associations 5 --payers 200
+    gunicorn --bind :8000 --workers 2 config.wsgi
+
+    # 2. the provider simulator and the webhook worker. The locustfile posts
+    # the webhooks itself so they show up in its stats
+    python manage.py simulate_gateways --port 8010 --webhook-rate 0
+    python manage.py process_webhooks
+
+    # 3. the swarm
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8000
+
+``LOADTEST_ASSOCIATIONS``, ``LOADTEST_PASSWORD`` and
+``LOADTEST_WEBHOOK_SECRET`` must match what the app was seeded and configured
+with (the defaults do). Divide the sustained RPS by the gunicorn worker count
+for a per-worker capacity figure; ``/api/main/metrics/`` has the per-view
+latency and query counts behind it.
+"""
+
+import os
+
+ASSOCIATIONS = int(os.environ.get("LOADTEST_ASSOCIATIONS", "5"))
+PASSWORD = os.environ.get("LOADTEST_PASSWORD", "Loadtest-Passw0rd!")
+WEBHOOK_SECRET = os.environ.get("LOADTEST_WEBHOOK_SECRET", "loadtest-webhook-secret")
+
+
+def short_name(index):
+    return f"loadtest{index}"
+
+
+def admin_email(index):
+    return f"{short_name(index)}@duespay.test"
@@ -0,0 +1,200 @@
+"""
+Checkout funnel and admin dashboard traffic. See ``loadtest/__init__.py``
+for how to bring up the app and its stand-ins first.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from locust import HttpUser, between, task
+
+from loadtest import ASSOCIATIONS, PASSWORD, WEBHOOK_SECRET, admin_email, short_name
+
+# How long a payer waits for process_webhooks to verify the payment
+STATUS_POLLS = 10
+STATUS_POLL_INTERVAL = 0.5
+
+
+def unwrap(response):
+    """Payload inside the ``{"success", "message", "data"}`` API envelope."""
+    body = response.json()
+    return body.get("data", body) if isinstance(body, dict) else body
+
+
+class PayerUser(HttpUser):
+    """A student paying their dues from the public association page."""
+
+    weight = 10
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.short_name = short_name(random.randrange(ASSOCIATIONS))
+
+    @task
+    def checkout(self):
+        association = self.load_association()
+        if association is None:
+            return
+        payer_id = self.check_payer()
+        if payer_id is None:
+            return
+        payment = self.initiate(association, payer_id)
+        if payment is None:
+            return
+        reference = payment["reference_id"]
+        self.deliver_webhook(reference, Decimal(payment["amount"]))
+        receipt_id = self.poll_status(reference)
+        if receipt_id:
+            self.client.get(
+                f"/api/transactions/receipts/{receipt_id}/",
+                name="/api/transactions/receipts/[receipt_id]/",
+            )
+
+    def load_association(self):
+        with self.client.get(
+            f"/api/association/get-association/{self.short_name}/",
+            name="/api/association/get-association/[short_name]/",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"status {response.status_code}")
+                return None
+            data = unwrap(response)
+            items = data.get("payment_items") or []
+            if not data.get("current_session") or not items:
+                response.failure("association has no session or payment items")
+                return None
+            chosen = random.sample(items, k=random.randint(1, len(items)))
+            return {
+                "id": data["id"],
+                "session_id": data["current_session"],
+                "item_ids": [item["id"] for item in chosen],
+            }
+
+    def check_payer(self):
+        tag = uuid.uuid4().hex[:10]
+        with self.client.post(
+            "/api/payers/check/",
+            json={
+                "association_short_name": self.short_name,
+                "matric_number": f"LT/{tag}",
+                "email": f"{tag}@students.duespay.test",
+                "level": random.choice(["100", "200", "300", "400", "500"]),
+                "phone_number": f"080{int(tag, 16) % 10**8:08d}",
+                "first_name": "Load",
+                "last_name": f"Payer{tag}",
+                "faculty": "Science",
+                "department": "Computer Science",
+            },
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(response.text[:200])
+                return None
+            return unwrap(response)["payer_id"]
+
+    def initiate(self, association, payer_id):
+        with self.client.post(
+            "/api/transactions/payment/initiate/",
+            json={
+                "payer_id": payer_id,
+                "association_id": association["id"],
+                "session_id": association["session_id"],
+                "payment_item_ids": association["item_ids"],
+            },
+            catch_response=True,
+        ) as response:
+            if response.status_code != 201:
+                response.failure(response.text[:200])
+                return None
+            return unwrap(response)
+
+    def deliver_webhook(self, reference, amount):
+        """What Paystack sends once the card is charged."""
+        body = json.dumps(
+            {
+                "event": "charge.success",
+                "data": {
+                    "id": random.randrange(10**9),
+                    "reference": reference,
+                    "status": "success",
+                    # Paystack reports kobo
+                    "amount": int(amount * 100),
+                    "currency": "NGN",
+                },
+            }
+        ).encode()
+        signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha512).hexdigest()
+        self.client.post(
+            "/api/transactions/webhook/",
+            data=body,
+            headers={
+                "Content-Type": "application/json",
+                "x-paystack-signature": signature,
+            },
+        )
+
+    def poll_status(self, reference):
+        """Poll like the callback page does; returns the receipt id once verified."""
+        for _ in range(STATUS_POLLS):
+            response = self.client.get(
+                f"/api/transactions/payment/status/{reference}/",
+                name="/api/transactions/payment/status/[reference]/",
+            )
+            if response.status_code == 200:
+                data = unwrap(response)
+                if data.get("is_verified") and data.get("receipt_id"):
+                    return data["receipt_id"]
+            time.sleep(STATUS_POLL_INTERVAL)
+        return None
+
+
+class DashboardUser(HttpUser):
+    """An association admin watching payments come in."""
+
+    weight = 1
+    wait_time = between(2, 8)
+
+    def on_start(self):
+        response = self.client.post(
+            "/api/auth/login/",
+            json={
+                "email": admin_email(random.randrange(ASSOCIATIONS)),
+                "password": PASSWORD,
+            },
+        )
+        if response.status_code == 200:
+            self.client.headers["Authorization"] = (
+                f"Bearer {unwrap(response)['access']}"
+            )
+
+    @task(4)
+    def transactions(self):
+        self.client.get("/api/transactions/", name="/api/transactions/")
+
+    @task(2)
+    def transactions_verified(self):
+        self.client.get(
+            "/api/transactions/?status=verified&pagination=cursor",
+            name="/api/transactions/?status=verified",
+        )
+
+    @task(2)
+    def payers(self):
+        self.client.get("/api/payers/", name="/api/payers/")
+
+    @task(1)
+    def payer_search(self):
+        self.client.get(
+            f"/api/payers/?search={random.choice(['load', 'lt', 'science'])}",
+            name="/api/payers/?search",
+        )
+
+    @task(1)
+    def unread_notifications(self):
+        self.client.get("/api/association/notifications/unread-count/")
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
 
-from .models import AdminUser, PlatformVBA
+from . import outbox
+from .models import AdminUser, OutboxMessage, PlatformVBA
 
 
 @admin.register(AdminUser)
@@ -38,3 +39,24 @@ class PlatformVbaAdmin(ModelAdmin):
         "unique_id",
     )
     list_filter = ("account_status", "currency")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(ModelAdmin):
+    list_display = ("kind", "status", "attempts", "available_at", "created_at", "sent_at")
+    search_fields = ("kind", "last_error")
+    list_filter = ("status", "kind")
+    readonly_fields = (
+        "kind",
+        "payload",
+        "attempts",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
+    actions = ["requeue_messages"]
+
+    @admin.action(description="Requeue selected messages")
+    def requeue_messages(self, request, queryset):
+        requeued = outbox.requeue(queryset)
+        self.message_user(request, f"Requeued {requeued} message(s).")
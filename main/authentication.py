@@ -1,10 +1,110 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+import pickle
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_PREFIX = "auth:user"
+
+_local = TTLCache(
+    maxsize=getattr(settings, "AUTH_USER_CACHE_LOCAL_SIZE", 1024),
+    ttl=getattr(settings, "AUTH_USER_CACHE_LOCAL_TTL", 5),
+)
+_local_lock = threading.Lock()
+
+
+def user_cache_key(user_id, token_version):
+    return f"{USER_CACHE_PREFIX}:{user_id}:{token_version}"
+
+
+def get_cached_user(user_id, token_version):
+    """
+    The user (with association and current session attached, password
+    deferred) for this token version, from this process or the shared
+    cache. ``None`` on a miss.
+    """
+    key = user_cache_key(user_id, token_version)
+    with _local_lock:
+        snapshot = _local.get(key)
+    if snapshot is None:
+        snapshot = cache.get(key)
+        if snapshot is None:
+            return None
+        with _local_lock:
+            _local[key] = snapshot
+    # Every request gets its own copy, so views can change it freely
+    return pickle.loads(snapshot)
+
+
+def cache_user(user):
+    key = user_cache_key(user.pk, user.token_version)
+    snapshot = pickle.dumps(user)
+    cache.set(key, snapshot, getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+    with _local_lock:
+        _local[key] = snapshot
+
+
+def invalidate_user(user_id, token_version):
+    """
+    Drop the snapshot for one token version. Other processes keep their
+    local copy for at most ``AUTH_USER_CACHE_LOCAL_TTL`` seconds.
+    """
+    key = user_cache_key(user_id, token_version)
+    cache.delete(key)
+    with _local_lock:
+        _local.pop(key, None)
+
+
+def clear_local_user_cache():
+    with _local_lock:
+        _local.clear()
+
 
 class VersionedJWTAuthentication(JWTAuthentication):
+    """
+    JWT auth that rejects tokens minted before the user's last
+    ``logout_all``. The user is served from a short-lived snapshot keyed by
+    user id and token version, so most requests authenticate without a
+    query; ``logout_all`` and password changes invalidate it.
+    """
+
     def get_user(self, validated_token):
-        user = super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
         token_version = validated_token.get("token_version", None)
-        if token_version is None or token_version != user.token_version:
-            raise AuthenticationFailed("Token is invalid or expired", code="token_not_valid")
-        return user
\ No newline at end of file
+
+        user = None
+        if token_version is not None:
+            user = get_cached_user(user_id, token_version)
+        if user is None:
+            user = self.load_user(user_id)
+            if token_version is None or token_version != user.token_version:
+                raise AuthenticationFailed(
+                    "Token is invalid or expired", code="token_not_valid"
+                )
+            cache_user(user)
+        return user
+
+    def load_user(self, user_id):
+        # Nearly every view reads the association and its current session
+        # next, so they are fetched in the same query and kept in the snapshot.
+        # The password hash is left out of it; the few views that need it
+        # load it on first access, and save() skips it unless it was set
+        try:
+            user = (
+                self.user_model.objects.select_related("association__current_session")
+                .defer("password")
+                .get(**{api_settings.USER_ID_FIELD: user_id})
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import outbox
+from .models import AdminUser
+
+PASSWORD_RESET_EMAIL = "main.password_reset"
+
+
+def build_password_reset_email(user):
+    token = default_token_generator.make_token(user)
+
+    frontend_url = getattr(settings, "FRONTEND_URL", "https://duespay.vercel.app")
+    reset_url = f"{frontend_url}/reset-password?token={token}&uid={user.pk}"
+
+    # Context for email template
+    context = {
+        "user": user,
+        "reset_url": reset_url,
+        "now": timezone.now(),
+    }
+
+    # Render HTML template
+    html_content = render_to_string("emails/password_reset.html", context)
+
+    msg = EmailMultiAlternatives(
+        subject="Password Reset - DuesPay",
+        body=f"Click the link to reset your password: {reset_url}",  # Plain text fallback
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+@outbox.handler(PASSWORD_RESET_EMAIL)
+def password_reset_from_outbox(payload):
+    # The token is minted at send time so it never sits in the outbox table
+    user = AdminUser.objects.filter(pk=payload["user_id"], is_active=True).first()
+    if user is None:
+        return None
+    return build_password_reset_email(user)
@@ -0,0 +1,52 @@
+"""
+Bulk email helpers.
+
+``send_bulk`` sends an iterable of messages over a single mail connection,
+pausing ``MAIL_BATCH_PAUSE`` seconds after every ``MAIL_BATCH_SIZE``
+messages to stay under provider rate limits. Each message is sent on its
+own, so one bad address or failed build doesn't take the rest of the batch
+down with it. One-off transactional mail still goes through ``main.outbox``,
+whose ``run_outbox`` worker paces itself with the same settings.
+"""
+
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+SENT = "sent"
+FAILED = "failed"
+
+
+def send_bulk(items, build=None, batch_size=None, pause=None, connection=None):
+    """
+    Send ``items`` over one connection, building each message with
+    ``build(item)`` when given. Returns a Counter of ``sent``/``failed``;
+    every failure is logged with the item it belongs to.
+    """
+    batch_size = batch_size or getattr(settings, "MAIL_BATCH_SIZE", 50)
+    if pause is None:
+        pause = getattr(settings, "MAIL_BATCH_PAUSE", 1.0)
+    connection = connection or get_connection()
+    counts = Counter()
+    with connection:
+        for position, item in enumerate(items):
+            if position and position % batch_size == 0:
+                logger.info("Bulk mail: sent %s, failed %s", counts[SENT], counts[FAILED])
+                if pause:
+                    time.sleep(pause)
+            try:
+                message = build(item) if build else item
+                message.connection = connection
+                message.send(fail_silently=False)
+            except Exception as error:
+                logger.error("Bulk mail: %r failed: %s", item, error)
+                counts[FAILED] += 1
+            else:
+                counts[SENT] += 1
+    logger.info("Bulk mail: sent %s, failed %s", counts[SENT], counts[FAILED])
+    return counts
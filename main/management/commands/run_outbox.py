@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from main import outbox
+from main.models import OutboxMessage
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over a reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "MAIL_BATCH_SIZE", outbox.BATCH_SIZE),
+            help="Messages claimed and sent per batch. Defaults to MAIL_BATCH_SIZE.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=getattr(settings, "MAIL_BATCH_PAUSE", 1.0),
+            help=(
+                "Seconds to wait after a full batch, to stay under the mail "
+                "provider's rate limit. Defaults to MAIL_BATCH_PAUSE."
+            ),
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when nothing is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain everything currently due, then exit.",
+        )
+        parser.add_argument(
+            "--requeue-dead",
+            action="store_true",
+            help="Move dead-lettered messages back to pending before starting.",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue_dead"]:
+            requeued = outbox.requeue(
+                OutboxMessage.objects.filter(status=OutboxMessage.STATUS_DEAD)
+            )
+            self.stdout.write(f"Requeued {requeued} dead message(s).")
+
+        try:
+            while True:
+                # Drop a dead or expired connection (CONN_MAX_AGE) before it
+                # fails every later poll; never inside a caller's transaction
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                counts = outbox.deliver_batch(options["batch_size"])
+                if counts:
+                    self.stdout.write(
+                        " ".join(f"{status}={n}" for status, n in sorted(counts.items()))
+                    )
+                    # A full batch means more are probably due, e.g. a bulk resend
+                    if sum(counts.values()) >= options["batch_size"]:
+                        time.sleep(options["pause"])
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("Outbox worker stopped."))
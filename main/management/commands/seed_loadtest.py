@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from association.models import Session
+from loadtest import PASSWORD, admin_email, short_name
+from main.models import AdminUser
+from utils.factories import make_payers, make_payment_items, make_transaction
+
+
+class Command(BaseCommand):
+    help = "Create the associations, admins and payers the load tests expect."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--associations", type=int, default=5)
+        parser.add_argument(
+            "--payers",
+            type=int,
+            default=200,
+            help="Existing payers per association, each with one transaction.",
+        )
+        parser.add_argument("--items", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if options["items"] < 1:
+            raise CommandError("--items must be at least 1")
+        for index in range(options["associations"]):
+            with transaction.atomic():
+                association, created = self.seed_association(index, options)
+            self.stdout.write(
+                f"{'Created' if created else 'Kept'} {association.association_short_name}"
+                f" (admin {admin_email(index)})"
+            )
+
+    def seed_association(self, index, options):
+        email = admin_email(index)
+        admin = AdminUser.objects.filter(email=email).first()
+        if admin is not None:
+            return admin.association, False
+
+        admin = AdminUser.objects.create_user(
+            email=email,
+            username=email,
+            password=PASSWORD,
+            first_name="Loadtest",
+            last_name=str(index),
+            is_first_login=False,
+        )
+        association = admin.association
+        association.association_short_name = short_name(index)
+        association.save(update_fields=["association_short_name"])
+
+        session = Session.objects.create(
+            association=association,
+            title=Session.generate_default_title(),
+            is_active=True,
+        )
+        association.current_session = session
+        association.save(update_fields=["current_session"])
+
+        items = make_payment_items(association, session, options["items"])
+        for position, payer in enumerate(
+            make_payers(association, session, options["payers"])
+        ):
+            make_transaction(payer, items[: position % len(items) + 1], position % 2 == 0)
+        return association, True
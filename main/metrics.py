@@ -0,0 +1,92 @@
+"""
+Prometheus metrics.
+
+Under gunicorn each worker is its own process, so when
+``PROMETHEUS_MULTIPROC_DIR`` is set (``gunicorn.conf.py`` does this)
+prometheus_client keeps every sample in memory-mapped files in that
+directory and ``render`` merges all workers' files on scrape. Without it
+(runserver, tests) the in-process registry is used.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    "duespay_http_request_duration_seconds",
+    "Request latency by resolved view.",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "duespay_http_requests_in_flight",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "duespay_db_queries_per_request",
+    "Database queries run while handling one request.",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_TIME = Histogram(
+    "duespay_db_query_seconds_per_request",
+    "Time spent in the database while handling one request.",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+OUTBOUND_LATENCY = Histogram(
+    "duespay_outbound_request_duration_seconds",
+    "Latency of calls to external providers.",
+    ["provider", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+OUTBOUND_ERRORS = Counter(
+    "duespay_outbound_request_errors_total",
+    "Failed calls to external providers (exceptions and 5xx responses).",
+    ["provider", "endpoint", "kind"],
+)
+
+
+@contextmanager
+def track_outbound(provider, endpoint):
+    """Time one call to ``provider``; an exception counts as an error."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as error:
+        OUTBOUND_ERRORS.labels(provider, endpoint, type(error).__name__).inc()
+        raise
+    finally:
+        OUTBOUND_LATENCY.labels(provider, endpoint).observe(
+            time.perf_counter() - start
+        )
+
+
+def record_outbound_status(provider, endpoint, status_code):
+    if status_code >= 500:
+        OUTBOUND_ERRORS.labels(provider, endpoint, f"http_{status_code}").inc()
+
+
+def render():
+    """Exposition body and content type, merged across workers when needed."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
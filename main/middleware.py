@@ -0,0 +1,93 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from . import metrics
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+# Query totals of the request running in this context. Under ASGI the view's
+# queries run in a sync_to_async thread, which inherits a copy of the context
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries["count"] += 1
+        queries["seconds"] += time.perf_counter() - start
+
+
+def install_query_counter():
+    """Wrap this thread's connections with ``count_query`` once."""
+    for connection in connections.all():
+        if count_query not in connection.execute_wrappers:
+            # First, so execute_wrapper() blocks pushed later still pop their own
+            connection.execute_wrappers.insert(0, count_query)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency, in-flight requests and per-request query count
+    and time, labelled by the resolved view name. Goes first in MIDDLEWARE so
+    the timing covers the rest of the stack. Runs natively under both WSGI
+    and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_counter()
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+        status = "500"
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            _request_queries.reset(token)
+            self.record(request, status, start, queries)
+
+    async def __acall__(self, request):
+        # Sync views and ORM calls share the thread-sensitive executor thread
+        await sync_to_async(install_query_counter)()
+        queries = {"count": 0, "seconds": 0.0}
+        token = _request_queries.set(queries)
+        status = "500"
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            _request_queries.reset(token)
+            self.record(request, status, start, queries)
+
+    def record(self, request, status, start, queries):
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else UNRESOLVED_VIEW
+        metrics.REQUEST_LATENCY.labels(view, request.method, status).observe(
+            time.perf_counter() - start
+        )
+        metrics.DB_QUERIES.labels(view).observe(queries["count"])
+        metrics.DB_QUERY_TIME.labels(view).observe(queries["seconds"])
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("payer", "Payer"), ("transaction", "Transaction")],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("token", models.CharField(max_length=100)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "token"], name="searchtoken_kind_token_idx"
+                    ),
+                    models.Index(
+                        fields=["kind", "object_id"], name="searchtoken_kind_obj_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
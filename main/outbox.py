@@ -0,0 +1,181 @@
+"""
+Transactional email outbox.
+
+Code that wants to send mail calls ``enqueue(kind, **payload)`` while it is
+still inside the database transaction that made the change: the message row
+commits or rolls back together with that change, and the request never waits
+on the mail server. The ``run_outbox`` command then builds each due message
+with the handler registered for its kind and sends the batch over one mail
+connection, retrying failures with exponential backoff and dead-lettering
+them after ``OUTBOX_MAX_ATTEMPTS`` tries.
+
+Handlers live in each app's ``emails`` module and are registered with
+``@outbox.handler(kind)``. A handler receives the payload and returns an
+``EmailMessage``, or ``None`` when there is nothing left to send.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+# How long a claimed message stays invisible to other workers
+LEASE = timedelta(minutes=5)
+
+_handlers = {}
+_discovered = False
+
+
+def handler(kind):
+    def register(build):
+        _handlers[kind] = build
+        return build
+
+    return register
+
+
+def get_handler(kind):
+    global _discovered
+    if not _discovered:
+        autodiscover_modules("emails")
+        _discovered = True
+    return _handlers.get(kind)
+
+
+def enqueue(kind, **payload):
+    return OutboxMessage.objects.create(kind=kind, payload=payload)
+
+
+def enqueue_many(kind, payloads, batch_size=1000):
+    """Queue one message per payload with batched INSERTs. Returns the count."""
+    messages = OutboxMessage.objects.bulk_create(
+        (OutboxMessage(kind=kind, payload=payload) for payload in payloads),
+        batch_size=batch_size,
+    )
+    return len(messages)
+
+
+def max_attempts():
+    return getattr(settings, "OUTBOX_MAX_ATTEMPTS", 8)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    ceiling = getattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), ceiling))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Lease up to ``batch_size`` due messages so concurrent workers skip them."""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxMessage.STATUS_PENDING, available_at__lte=now
+            )[:batch_size]
+        )
+        if messages:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+                attempts=F("attempts") + 1, available_at=now + LEASE
+            )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+def _mark(message, status, **fields):
+    message.status = status
+    for name, value in fields.items():
+        setattr(message, name, value)
+    OutboxMessage.objects.filter(pk=message.pk).update(status=status, **fields)
+    return status
+
+
+def _record_failure(message, error, retry=True):
+    last_error = f"{type(error).__name__}: {error}"
+    if not retry or message.attempts >= max_attempts():
+        logger.error(
+            "Outbox message %s (%s) dead after %s attempt(s): %s",
+            message.pk,
+            message.kind,
+            message.attempts,
+            last_error,
+        )
+        return _mark(message, OutboxMessage.STATUS_DEAD, last_error=last_error)
+
+    logger.warning(
+        "Outbox message %s (%s) failed attempt %s: %s",
+        message.pk,
+        message.kind,
+        message.attempts,
+        last_error,
+    )
+    return _mark(
+        message,
+        OutboxMessage.STATUS_PENDING,
+        last_error=last_error,
+        available_at=timezone.now() + retry_delay(message.attempts),
+    )
+
+
+def _deliver(message, connection):
+    build = get_handler(message.kind)
+    if build is None:
+        return _record_failure(
+            message, LookupError(f"No outbox handler for {message.kind!r}"), False
+        )
+
+    try:
+        email = build(message.payload)
+        if email is None:
+            return _mark(message, OutboxMessage.STATUS_SKIPPED, sent_at=timezone.now())
+        email.connection = connection
+        email.send(fail_silently=False)
+    except Exception as error:
+        return _record_failure(message, error)
+    return _mark(message, OutboxMessage.STATUS_SENT, sent_at=timezone.now())
+
+
+def deliver_batch(batch_size=BATCH_SIZE):
+    """Send one batch of due messages. Returns a Counter of resulting statuses."""
+    counts = Counter()
+    messages = claim_batch(batch_size)
+    if not messages:
+        return counts
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Mail server unreachable: back the whole batch off together
+        for message in messages:
+            counts[_record_failure(message, error)] += 1
+        return counts
+
+    try:
+        for message in messages:
+            counts[_deliver(message, connection)] += 1
+    finally:
+        connection.close()
+    return counts
+
+
+def requeue(queryset):
+    """Put dead (or any) messages back in line for a fresh set of attempts."""
+    return queryset.update(
+        status=OutboxMessage.STATUS_PENDING,
+        attempts=0,
+        available_at=timezone.now(),
+        last_error="",
+    )
@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Send ``?pagination=cursor`` (or any ``?cursor=<token>``) to switch modes.
+    Rows are then ordered newest first by ``(keyset_field, id)`` and each page
+    is fetched with a ``WHERE (keyset_field, id) < (...)`` seek plus one extra
+    row to tell whether more exist, so deep pages cost the same as page 1 and
+    no COUNT(*) is run. The envelope keeps ``count``/``next``/``previous``/
+    ``results``; ``count`` is ``None`` and ``has_more`` is added.
+
+    Cursor pages always follow the keyset order, so combining them with
+    ``?ordering=`` is rejected rather than silently ignored. A malformed or
+    tampered cursor is a 400.
+    """
+
+    page_size = 7
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    keyset_field = "created_at"
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    ordering_query_param = "ordering"
+    invalid_cursor_message = "Invalid cursor"
+
+    def use_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        if request.query_params.get(self.ordering_query_param):
+            raise ValidationError(
+                {
+                    self.ordering_query_param: "Ordering is not supported with "
+                    "cursor pagination; use page numbers."
+                }
+            )
+
+        field = self.keyset_field
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        backwards = cursor is not None and cursor["direction"] == "prev"
+
+        if cursor is not None:
+            pk = cursor["id"]
+            try:
+                value = queryset.model._meta.get_field(field).to_python(
+                    cursor["value"]
+                )
+            except (DjangoValidationError, TypeError, ValueError):
+                value = None
+            if value is None:
+                self.invalid_cursor()
+            if backwards:
+                seek = Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk})
+            else:
+                seek = Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": pk})
+            queryset = queryset.filter(seek)
+
+        if backwards:
+            queryset = queryset.order_by(field, "id")
+        else:
+            queryset = queryset.order_by(f"-{field}", "-id")
+
+        rows = list(queryset[: page_size + 1])
+        has_extra = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if backwards:
+            rows.reverse()
+            self.has_previous, self.has_next = has_extra, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_extra
+
+        self.page_rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "count": None,
+                "has_more": self.has_next,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self._cursor_link(self.page_rows[-1], "next")
+
+    def get_previous_link(self):
+        if not getattr(self, "cursor_mode", False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self._cursor_link(self.page_rows[0], "prev")
+
+    def _cursor_link(self, row, direction):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        token = self.encode_cursor(row, direction)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def encode_cursor(self, row, direction):
+        value = getattr(row, self.keyset_field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps({"v": value, "id": row.pk, "d": direction})
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def invalid_cursor(self):
+        raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            value = payload["v"]
+            direction = payload["d"]
+            pk = int(payload["id"])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            self.invalid_cursor()
+        if direction not in ("next", "prev"):
+            self.invalid_cursor()
+        return {"value": value, "id": pk, "direction": direction}
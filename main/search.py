@@ -0,0 +1,114 @@
+"""
+Precomputed search for the dashboard listings.
+
+Every searchable row stores a lower-cased ``search_text`` column and a
+search matches any row whose text contains the normalized term, like the
+``icontains`` filters it replaced. On PostgreSQL that column carries a
+``gin_trgm_ops`` index, so the substring ``LIKE`` is served from the index.
+Other backends (SQLite in tests and benchmarks) first narrow the candidates
+through the ``SearchToken`` table, one row per normalized word, where every
+query word must occur inside one of the object's tokens; the same substring
+test on ``search_text`` then decides.
+"""
+
+import re
+
+from django.db import connection
+
+TOKEN_SPLIT_RE = re.compile(r"[^0-9a-z@.]+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+TOKEN_MAX_LENGTH = 100
+
+PAYER = "payer"
+TRANSACTION = "transaction"
+
+
+def normalize(*parts):
+    text = " ".join(str(part) for part in parts if part)
+    return WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def tokenize(text):
+    tokens = set()
+    for word in TOKEN_SPLIT_RE.split(normalize(text)):
+        word = word.strip(".")
+        if word:
+            tokens.add(word[:TOKEN_MAX_LENGTH])
+            # e-mails also match on their local part and domain
+            if "@" in word:
+                tokens.update(
+                    piece[:TOKEN_MAX_LENGTH] for piece in word.split("@") if piece
+                )
+    return tokens
+
+
+def payer_search_text(payer):
+    return normalize(
+        payer.first_name,
+        payer.last_name,
+        payer.matric_number,
+        payer.email,
+        payer.faculty,
+        payer.department,
+    )
+
+
+def transaction_search_text(transaction, payer_text=None):
+    if payer_text is None:
+        payer_text = payer_search_text(transaction.payer)
+    return normalize(transaction.reference_id, payer_text)
+
+
+def uses_trigram_index(using=None):
+    return (using.vendor if using else connection.vendor) == "postgresql"
+
+
+def filter_queryset(queryset, kind, term):
+    """Narrow ``queryset`` to rows whose search text matches ``term``."""
+    from .models import SearchToken
+
+    term = normalize(term)
+    if not term:
+        return queryset
+
+    if not uses_trigram_index():
+        for token in tokenize(term):
+            matches = SearchToken.objects.filter(kind=kind, token__contains=token)
+            queryset = queryset.filter(pk__in=matches.values("object_id"))
+    return queryset.filter(search_text__contains=term)
+
+
+def index_objects(kind, rows, token_model=None):
+    """Replace the fallback tokens for ``rows``, an iterable of (object_id, text)."""
+    if uses_trigram_index():
+        return
+
+    if token_model is None:
+        from .models import SearchToken
+
+        token_model = SearchToken
+
+    rows = list(rows)
+    if not rows:
+        return
+    token_model.objects.filter(
+        kind=kind, object_id__in=[object_id for object_id, _ in rows]
+    ).delete()
+    token_model.objects.bulk_create(
+        [
+            token_model(kind=kind, object_id=object_id, token=token)
+            for object_id, text in rows
+            for token in tokenize(text)
+        ],
+        batch_size=2000,
+    )
+
+
+def unindex_object(kind, object_id):
+    if uses_trigram_index():
+        return
+
+    from .models import SearchToken
+
+    SearchToken.objects.filter(kind=kind, object_id=object_id).delete()
@@ -3,6 +3,7 @@ import re
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .authentication import invalidate_user
 from .models import AdminUser
 
 
@@ -56,6 +57,8 @@ class AdminUserSerializer(serializers.ModelSerializer):
             check_password(password)  
             instance.set_password(password)
         instance.save()
+        # The auth snapshot holds the old profile
+        invalidate_user(instance.pk, instance.token_version)
         return instance
     
 
@@ -0,0 +1,85 @@
+"""
+The association and session an admin request works on.
+
+Dashboard viewsets used to look up ``request.user.association``, then
+``association.current_session`` and then any ``?session_id=`` separately, in
+``get_queryset()``, ``list()`` and ``perform_create()`` alike. ``TenantMixin``
+resolves them once per request (the authenticated user normally arrives with
+its association and current session attached, see
+``main.authentication``) and memoizes the result on the request.
+"""
+
+from functools import cached_property
+
+from association.models import Association, Session
+
+SESSION_PARAM = "session_id"
+
+
+class Tenant:
+    def __init__(self, user, session_id=None):
+        self.user = user
+        self.session_id = session_id or None
+
+    @cached_property
+    def association(self):
+        user = self.user
+        if not getattr(user, "is_authenticated", False):
+            return None
+        if "association" in user._state.fields_cache:
+            return user._state.fields_cache["association"]
+        association = (
+            Association.objects.select_related("current_session")
+            .filter(admin=user)
+            .first()
+        )
+        # Later attribute access on the user reuses this lookup
+        user._state.fields_cache["association"] = association
+        return association
+
+    @cached_property
+    def current_session(self):
+        association = self.association
+        return association.current_session if association else None
+
+    @cached_property
+    def session(self):
+        """
+        The ``?session_id=`` session when it belongs to the association,
+        otherwise the current session. ``None`` when neither exists.
+        """
+        if not self.session_id:
+            return self.current_session
+        current = self.current_session
+        if current is not None and str(current.pk) == str(self.session_id):
+            return current
+        if self.association is None or not str(self.session_id).isdigit():
+            return None
+        return Session.objects.filter(
+            pk=self.session_id, association=self.association
+        ).first()
+
+    @property
+    def session_not_found(self):
+        """A ``session_id`` was asked for but is not one of this association's."""
+        return bool(self.session_id) and self.session is None
+
+
+def get_tenant(request):
+    """The request's ``Tenant``, built on first use."""
+    # Stored on the Django request so every view and DRF wrapper shares it
+    http_request = getattr(request, "_request", request)
+    tenant = getattr(http_request, "_tenant", None)
+    if tenant is None:
+        params = getattr(request, "query_params", request.GET)
+        tenant = Tenant(request.user, params.get(SESSION_PARAM))
+        http_request._tenant = tenant
+    return tenant
+
+
+class TenantMixin:
+    """Gives a view ``self.tenant``; see ``Tenant``."""
+
+    @property
+    def tenant(self):
+        return get_tenant(self.request)
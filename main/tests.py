@@ -1 +1,629 @@
-# Create your tests here.
+import base64
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from payers.models import Payer
+from utils.log import AsyncLogHandler, SampledDebugFilter
+from utils.testing import (
+    PASSWORD,
+    QueryBudgetMixin,
+    api_client,
+    make_session,
+    make_transaction,
+    seed_association,
+)
+
+from . import metrics, outbox, search
+from .authentication import clear_local_user_cache, get_cached_user, user_cache_key
+from .emails import PASSWORD_RESET_EMAIL
+from .mail import send_bulk
+from .models import AdminUser, OutboxMessage
+from .serializers import CustomTokenObtainPairSerializer
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE_SECONDS=10)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = AdminUser.objects.create_user(
+            email="admin@example.com", username="admin@example.com", password="x"
+        )
+
+    def run_outbox(self):
+        call_command("run_outbox", once=True, stdout=StringIO())
+
+    def test_password_reset_is_queued_not_sent(self):
+        response = APIClient().post(
+            "/api/auth/password-reset/", {"email": self.user.email}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.kind, PASSWORD_RESET_EMAIL)
+        self.assertEqual(message.payload, {"user_id": self.user.pk})
+
+        self.run_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("reset-password?token=", mail.outbox[0].body)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_SENT)
+        self.assertIsNotNone(message.sent_at)
+
+    def test_rolled_back_change_leaves_nothing_queued(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                outbox.enqueue(PASSWORD_RESET_EMAIL, user_id=self.user.pk)
+                raise RuntimeError
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_batch_shares_one_connection(self):
+        for _ in range(3):
+            outbox.enqueue(PASSWORD_RESET_EMAIL, user_id=self.user.pk)
+        with mock.patch(
+            "main.outbox.get_connection", wraps=outbox.get_connection
+        ) as get_connection:
+            counts = outbox.deliver_batch()
+        self.assertEqual(counts[OutboxMessage.STATUS_SENT], 3)
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failures_back_off_then_dead_letter(self):
+        message = outbox.enqueue(PASSWORD_RESET_EMAIL, user_id=self.user.pk)
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=OSError("smtp down")
+        ):
+            for attempt in range(1, 4):
+                before = timezone.now()
+                outbox.deliver_batch()
+                message.refresh_from_db()
+                self.assertEqual(message.attempts, attempt)
+                if attempt < 3:
+                    self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+                    self.assertGreaterEqual(
+                        message.available_at,
+                        before + timedelta(seconds=10 * 2 ** (attempt - 1)),
+                    )
+                    # Not due yet, so the next run leaves it alone
+                    self.assertFalse(outbox.deliver_batch())
+                    OutboxMessage.objects.update(available_at=timezone.now())
+
+        self.assertEqual(message.status, OutboxMessage.STATUS_DEAD)
+        self.assertIn("smtp down", message.last_error)
+
+        call_command("run_outbox", once=True, requeue_dead=True, stdout=StringIO())
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_SENT)
+
+    def test_missing_object_is_skipped(self):
+        outbox.enqueue(PASSWORD_RESET_EMAIL, user_id=self.user.pk + 1)
+        self.run_outbox()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            OutboxMessage.objects.get().status, OutboxMessage.STATUS_SKIPPED
+        )
+
+    def test_unknown_kind_is_dead_lettered(self):
+        outbox.enqueue("main.nope")
+        self.run_outbox()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.STATUS_DEAD)
+        self.assertEqual(message.attempts, 1)
+
+
+class BulkMailTests(TestCase):
+    def messages(self, count):
+        return (
+            mail.EmailMessage("Hi", "Body", to=[f"payer{n}@example.com"])
+            for n in range(count)
+        )
+
+    def test_send_bulk_paces_over_one_connection(self):
+        with mock.patch(
+            "main.mail.get_connection", wraps=mail.get_connection
+        ) as get_connection, mock.patch("main.mail.time.sleep") as sleep:
+            counts = send_bulk(self.messages(5), batch_size=2, pause=0.25)
+        self.assertEqual(counts, {"sent": 5})
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(get_connection.call_count, 1)
+        # Three batches, so two pauses between them
+        sleep.assert_has_calls([mock.call(0.25)] * 2)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_send_bulk_isolates_failures(self):
+        def build(n):
+            if n == 1:
+                raise ValueError("no address")
+            return mail.EmailMessage("Hi", "Body", to=[f"payer{n}@example.com"])
+
+        counts = send_bulk(range(4), build=build, pause=0)
+        self.assertEqual(counts, {"sent": 3, "failed": 1})
+        self.assertEqual(
+            [message.to[0] for message in mail.outbox],
+            ["payer0@example.com", "payer2@example.com", "payer3@example.com"],
+        )
+
+    def test_run_outbox_pauses_after_full_batches(self):
+        user = AdminUser.objects.create_user(
+            email="admin@example.com", username="admin@example.com", password="x"
+        )
+        outbox.enqueue_many(PASSWORD_RESET_EMAIL, ({"user_id": user.pk} for _ in range(5)))
+        with mock.patch(
+            "main.management.commands.run_outbox.time.sleep"
+        ) as sleep:
+            call_command(
+                "run_outbox", once=True, batch_size=2, pause=0.5, stdout=StringIO()
+            )
+        self.assertEqual(len(mail.outbox), 5)
+        # Two full batches of two, then a last one of one
+        sleep.assert_has_calls([mock.call(0.5)] * 2)
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_enqueue_many(self):
+        user = AdminUser.objects.create_user(
+            email="admin@example.com", username="admin@example.com", password="x"
+        )
+        with self.assertNumQueries(1):
+            queued = outbox.enqueue_many(
+                PASSWORD_RESET_EMAIL, ({"user_id": user.pk} for _ in range(3))
+            )
+        self.assertEqual(queued, 3)
+        self.assertEqual(
+            OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING).count(),
+            3,
+        )
+
+
+class OutboxWorkerConnectionTests(TransactionTestCase):
+    def test_stale_connections_are_dropped_each_poll(self):
+        with mock.patch(
+            "main.management.commands.run_outbox.close_old_connections"
+        ) as close_old, mock.patch(
+            "main.management.commands.run_outbox.time.sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ):
+            call_command("run_outbox", stdout=StringIO())
+        self.assertEqual(close_old.call_count, 2)
+
+
+class AsyncLoggingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "app.log")
+        self.handler = AsyncLogHandler(filename=self.path, console=False)
+        self.logger = logging.getLogger("transactions.tests.async")
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def read_entries(self):
+        self.handler.stop()
+        with open(self.path) as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_records_are_written_as_json_by_the_listener(self):
+        payload = {"status": "pending"}
+        self.logger.info(
+            "ref=%s data=%s", "TX-1", payload, extra={"provider": "korapay"}
+        )
+        # Mutating the args afterwards must not change what was logged
+        payload["status"] = "changed"
+        try:
+            raise ValueError("bad amount")
+        except ValueError:
+            self.logger.exception("charge failed")
+
+        first, second = self.read_entries()
+        self.assertEqual(first["message"], "ref=TX-1 data={'status': 'pending'}")
+        self.assertEqual(first["provider"], "korapay")
+        self.assertEqual(first["level"], "INFO")
+        self.assertIn("ValueError: bad amount", second["exc_info"])
+
+    def test_debug_records_are_sampled(self):
+        record = logging.LogRecord("t", logging.DEBUG, "", 0, "trace", None, None)
+        warning = logging.LogRecord("t", logging.WARNING, "", 0, "warn", None, None)
+        self.assertFalse(SampledDebugFilter(rate=0).filter(record))
+        self.assertTrue(SampledDebugFilter(rate=1).filter(record))
+        self.assertTrue(SampledDebugFilter(rate=0).filter(warning))
+
+
+@override_settings(METRICS_TOKEN="scrape-me")
+class MetricsTests(TestCase):
+    def scrape(self, **headers):
+        headers.setdefault("HTTP_AUTHORIZATION", "Bearer scrape-me")
+        return self.client.get("/api/main/metrics/", **headers)
+
+    def test_request_latency_and_queries_are_labelled_by_view(self):
+        self.client.get("/api/main/ping/")
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'duespay_http_request_duration_seconds_count{method="GET",status="200",view="ping-view"}',
+            body,
+        )
+        self.assertIn('duespay_db_queries_per_request_count{view="ping-view"}', body)
+        self.assertIn("duespay_http_requests_in_flight", body)
+
+    def test_outbound_errors_are_counted(self):
+        before = self.sample("kind", "ConnectionError")
+        with self.assertRaises(ConnectionError):
+            with metrics.track_outbound("test", "boom"):
+                raise ConnectionError("refused")
+        metrics.record_outbound_status("test", "boom", 503)
+
+        self.assertEqual(self.sample("kind", "ConnectionError"), before + 1)
+        self.assertEqual(self.sample("kind", "http_503"), 1)
+
+    def test_token_guard(self):
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION="").status_code, 403)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION="Bearer no").status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_hidden_without_token(self):
+        self.assertEqual(self.scrape().status_code, 404)
+
+    def test_async_requests_are_measured(self):
+        scenario = seed_association()
+        token = CustomTokenObtainPairSerializer.get_token(scenario.admin).access_token
+        cache.clear()
+        clear_local_user_cache()
+        labels = {"view": "user-profile"}
+        before = self.queries_sum(labels)
+
+        response = async_to_sync(self.async_client.get)(
+            "/api/main/adminuser/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        # The user lookup ran in a sync_to_async thread and was still counted
+        self.assertGreaterEqual(self.queries_sum(labels), before + 1)
+
+    def queries_sum(self, labels):
+        return (
+            REGISTRY.get_sample_value("duespay_db_queries_per_request_sum", labels)
+            or 0
+        )
+
+    def test_worker_samples_are_merged_under_gunicorn(self):
+        # Fresh interpreter: load gunicorn.conf.py the way the master does,
+        # then count in a forked worker and scrape from the master
+        script = textwrap.dedent(
+            """
+            import multiprocessing, runpy
+            config = runpy.run_path("gunicorn.conf.py")
+            config["on_starting"](None)
+            from main import metrics
+
+            def worker():
+                metrics.OUTBOUND_ERRORS.labels("test", "fork", "boom").inc()
+
+            child = multiprocessing.get_context("fork").Process(target=worker)
+            child.start()
+            child.join()
+            print(metrics.render()[0].decode())
+            """
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        # Left for gunicorn.conf.py to set, under a private temp dir
+        env = {
+            name: value
+            for name, value in os.environ.items()
+            if name.lower() != "prometheus_multiproc_dir"
+        }
+        env["TMPDIR"] = directory
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertIn(
+            'duespay_outbound_request_errors_total{endpoint="fork",kind="boom",'
+            'provider="test"} 1.0',
+            result.stdout,
+        )
+
+    def sample(self, label, value):
+        return (
+            REGISTRY.get_sample_value(
+                "duespay_outbound_request_errors_total",
+                {"provider": "test", "endpoint": "boom", label: value},
+            )
+            or 0
+        )
+
+
+class UserProfileQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Seconds per request; generous, so only a runaway endpoint trips it
+    max_seconds = 2.0
+
+    def test_profile(self):
+        scenario = seed_association(payers=3)
+        client = api_client(scenario.admin)
+        self.assertQueryBudget(
+            lambda: client.get("/api/main/adminuser/"), max_queries=1
+        )
+
+
+class AuthUserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_user_cache()
+        self.scenario = seed_association()
+        self.client = api_client(self.scenario.admin)
+
+    def test_repeat_request_skips_user_lookup(self):
+        self.assertEqual(self.client.get("/api/main/adminuser/").status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/main/adminuser/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_snapshot_shared_between_processes(self):
+        self.client.get("/api/main/adminuser/")
+        # Another worker only has the shared cache
+        clear_local_user_cache()
+        with self.assertNumQueries(0):
+            self.client.get("/api/main/adminuser/")
+
+    def test_logout_all_revokes_cached_token(self):
+        self.client.get("/api/main/adminuser/")
+        self.assertEqual(self.client.post("/api/auth/logout/").status_code, 200)
+        self.assertEqual(self.client.get("/api/main/adminuser/").status_code, 401)
+        clear_local_user_cache()
+        self.assertEqual(self.client.get("/api/main/adminuser/").status_code, 401)
+
+    def test_password_reset_drops_snapshot(self):
+        admin = self.scenario.admin
+        self.client.get("/api/main/adminuser/")
+        response = APIClient().post(
+            "/api/auth/password-reset-confirm/",
+            {
+                "uid": admin.pk,
+                "token": default_token_generator.make_token(admin),
+                "password": "N3w-Passw0rd!",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/main/adminuser/")
+        self.assertIn("main_adminuser", queries.captured_queries[0]["sql"])
+        fresh = api_client(AdminUser.objects.get(pk=admin.pk))
+        self.assertEqual(fresh.get("/api/main/adminuser/").status_code, 200)
+
+    def test_new_session_refreshes_snapshot(self):
+        self.client.get("/api/main/adminuser/")
+        session = make_session(self.scenario.association)
+        response = self.client.get("/api/association/sessions/")
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            self.client.get("/api/main/adminuser/")
+        user = self.client.get("/api/main/adminuser/").wsgi_request.user
+        self.assertEqual(user.association.current_session_id, session.pk)
+
+    def test_snapshot_leaves_out_the_password(self):
+        admin = self.scenario.admin
+        self.client.get("/api/main/adminuser/")
+        snapshot = cache.get(user_cache_key(admin.pk, admin.token_version))
+        self.assertNotIn(admin.password.encode(), snapshot)
+        user = get_cached_user(admin.pk, admin.token_version)
+        self.assertIn("password", user.get_deferred_fields())
+
+    def test_profile_updates_on_the_snapshot(self):
+        admin = self.scenario.admin
+        self.client.get("/api/main/adminuser/")
+        response = self.client.patch(
+            "/api/main/adminuser/", {"first_name": "Ada"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        admin.refresh_from_db()
+        self.assertEqual(admin.first_name, "Ada")
+        self.assertTrue(admin.check_password(PASSWORD))
+
+        self.client.get("/api/main/adminuser/")
+        response = self.client.patch(
+            "/api/main/adminuser/", {"password": "N3w-Passw0rd!"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        admin.refresh_from_db()
+        self.assertTrue(admin.check_password("N3w-Passw0rd!"))
+
+
+class TenantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_user_cache()
+        self.scenario = seed_association(payers=2)
+        self.client = api_client(self.scenario.admin)
+
+    def test_resolves_association_and_session_once(self):
+        self.client.get("/api/payers/")
+        # Cached user: only the page's own COUNT and SELECT are left
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/payers/")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_session_id_param(self):
+        session = self.scenario.session
+        response = self.client.get(f"/api/transactions/?session_id={session.pk}")
+        self.assertEqual(response.data["count"], 2)
+
+        other = seed_association()
+        for session_id in (other.session.pk, "abc"):
+            response = self.client.get(f"/api/transactions/?session_id={session_id}")
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(f"/api/payers/?session_id={session_id}")
+            self.assertEqual(response.data["count"], 0)
+
+    def test_older_session(self):
+        older = self.scenario.session
+        make_session(self.scenario.association)
+        response = self.client.get(f"/api/payers/?session_id={older.pk}")
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(self.client.get("/api/payers/").data["count"], 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(payers=7, transactions_per_payer=0)
+        self.client = api_client(self.scenario.admin)
+        # Every payer shares one created_at, so only the id breaks ties
+        Payer.objects.update(created_at=timezone.now())
+        self.expected = list(
+            Payer.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_walk_forward_and_back(self):
+        data = self.page("/api/payers/", {"pagination": "cursor", "page_size": 3})
+        self.assertIsNone(data["count"])
+        self.assertIsNone(data["previous"])
+        pages = [[row["id"] for row in data["results"]]]
+        while data["next"]:
+            data = self.page(data["next"])
+            pages.append([row["id"] for row in data["results"]])
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+        # The last page says so
+        self.assertFalse(data["has_more"])
+        self.assertIsNone(data["next"])
+
+        # Stepping back from the last page returns the one before it
+        data = self.page(data["previous"])
+        self.assertEqual([row["id"] for row in data["results"]], pages[1])
+        self.assertTrue(data["has_more"])
+        data = self.page(data["previous"])
+        self.assertEqual([row["id"] for row in data["results"]], pages[0])
+        self.assertIsNone(data["previous"])
+
+    def test_invalid_cursors_are_rejected(self):
+        def encode(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in (
+            "not-base64!",
+            encode(["v", "id"]),
+            encode({"v": "yesterday", "id": 1, "d": "next"}),
+            encode({"v": 12, "id": 1, "d": "next"}),
+            encode({"v": timezone.now().isoformat(), "id": "x", "d": "next"}),
+            encode({"v": timezone.now().isoformat(), "id": 1, "d": "sideways"}),
+        ):
+            response = self.client.get("/api/payers/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_ordering_needs_page_numbers(self):
+        response = self.client.get(
+            "/api/payers/", {"pagination": "cursor", "ordering": "last_name"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/payers/", {"ordering": "last_name"})
+        self.assertEqual(response.status_code, 200)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(payers=0, items=1, transactions_per_payer=0)
+        self.client = api_client(self.scenario.admin)
+        association, session = self.scenario.association, self.scenario.session
+        self.ada = Payer.objects.create(
+            association=association,
+            session=session,
+            first_name="Adaeze",
+            last_name="Okafor",
+            email="ada.okafor@uni.edu.ng",
+            phone_number="08011111111",
+            matric_number="CSC/2019/04512",
+            department="Computer Science",
+        )
+        self.bola = Payer.objects.create(
+            association=association,
+            session=session,
+            first_name="Bola",
+            last_name="Adeyemi",
+            email="bola@example.com",
+            phone_number="08022222222",
+            matric_number="MTH/2020/00931",
+        )
+        self.txn = make_transaction(self.ada, self.scenario.items)
+
+    def payers(self, term):
+        response = self.client.get("/api/payers/", {"search": term, "page_size": 50})
+        return {row["id"] for row in response.json()["data"]["results"]}
+
+    def transactions(self, term):
+        response = self.client.get("/api/transactions/", {"search": term})
+        return {row["id"] for row in response.json()["data"]["results"]}
+
+    def test_fallback_path_is_in_use(self):
+        self.assertFalse(search.uses_trigram_index())
+
+    def test_substring_matches(self):
+        ada, bola = self.ada.pk, self.bola.pk
+        # Middle of a matric number, of a name and of an email
+        self.assertEqual(self.payers("2019/045"), {ada})
+        self.assertEqual(self.payers("045"), {ada})
+        self.assertEqual(self.payers("eze"), {ada})
+        self.assertEqual(self.payers("okafor@uni"), {ada})
+        # Case-insensitive, and across word boundaries
+        self.assertEqual(self.payers("COMPUTER sci"), {ada})
+        self.assertEqual(self.payers("ade"), {bola})
+        self.assertEqual(self.payers("ada"), {ada})
+        self.assertEqual(self.payers("/20"), {ada, bola})
+        self.assertEqual(self.payers("nobody"), set())
+
+    def test_transactions_match_reference_and_payer(self):
+        reference = self.txn.reference_id
+        self.assertEqual(self.transactions(reference[3:9].lower()), {self.txn.pk})
+        self.assertEqual(self.transactions("okafor"), {self.txn.pk})
+        self.assertEqual(self.transactions("bola"), set())
+
+    def test_payer_rename_reaches_transactions(self):
+        self.ada.first_name = "Chiamaka"
+        self.ada.save()
+        self.assertEqual(self.transactions("chiamaka"), {self.txn.pk})
+        self.assertEqual(self.transactions("adaeze"), set())
+
+    def test_transaction_save_does_not_load_the_payer(self):
+        from transactions.models import Transaction
+
+        txn = Transaction.objects.get(pk=self.txn.pk)
+        txn.is_verified = True
+        with CaptureQueriesContext(connection) as queries:
+            txn.save()
+        self.assertFalse(
+            any('FROM "payers_payer"' in query["sql"] for query in queries)
+        )
+        self.assertFalse(
+            any("main_searchtoken" in query["sql"] for query in queries)
+        )
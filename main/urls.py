@@ -1,8 +1,9 @@
 from django.urls import path
 
-from .views import UserProfileView, ping_view
+from .views import UserProfileView, metrics_view, ping_view
 
 urlpatterns = [
     path("adminuser/", UserProfileView.as_view(), name="user-profile"),
     path("ping/", ping_view, name="ping-view"),
+    path("metrics/", metrics_view, name="metrics"),
 ]
@@ -1,10 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import EmailMultiAlternatives
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import redirect
-from django.template.loader import render_to_string
-from django.utils import timezone
 from google.auth.transport import requests
 from google.oauth2 import id_token
 from rest_framework import generics
@@ -15,6 +12,9 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from . import metrics, outbox
+from .authentication import invalidate_user
+from .emails import PASSWORD_RESET_EMAIL
 from .models import AdminUser
 from .serializers import (
     AdminUserSerializer,
@@ -34,6 +34,17 @@ def ping_view(request):
     return HttpResponse("Pong", status=200)
 
 
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    # Without a configured token the endpoint doesn't exist
+    if not token:
+        raise Http404
+    if request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = AdminUserSerializer
     permission_classes = [IsAuthenticated]
@@ -55,9 +66,10 @@ class GoogleLoginView(APIView):
 
         try:
             # Verify token with Google
-            idinfo = id_token.verify_oauth2_token(
-                token, requests.Request(), settings.GOOGLE_CLIENT_ID
-            )
+            with metrics.track_outbound("google", "verify_oauth2_token"):
+                idinfo = id_token.verify_oauth2_token(
+                    token, requests.Request(), settings.GOOGLE_CLIENT_ID
+                )
 
             email = idinfo["email"]
             first_name = idinfo.get("given_name", "")
@@ -131,30 +143,7 @@ class PasswordResetRequestView(APIView):
                 status=200,
             )
 
-        token = default_token_generator.make_token(user)
-
-        frontend_url = getattr(settings, "FRONTEND_URL", "https://duespay.vercel.app")
-        reset_url = f"{frontend_url}/reset-password?token={token}&uid={user.pk}"
-
-        # Context for email template
-        context = {
-            "user": user,
-            "reset_url": reset_url,
-            "now": timezone.now(),
-        }
-
-        # Render HTML template
-        html_content = render_to_string("emails/password_reset.html", context)
-
-        # Create email message
-        msg = EmailMultiAlternatives(
-            subject="Password Reset - DuesPay",
-            body=f"Click the link to reset your password: {reset_url}",  # Plain text fallback
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[email],
-        )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send()
+        outbox.enqueue(PASSWORD_RESET_EMAIL, user_id=user.pk)
 
         return Response(
             {"message": "If the email exists, a reset link will be sent."}, status=200
@@ -184,6 +173,7 @@ class PasswordResetConfirmView(APIView):
 
         user.set_password(password)
         user.save()
+        invalidate_user(user.pk, user.token_version)
         return Response(
             {"message": "Password has been reset successfully."}, status=200
         )
@@ -193,6 +183,8 @@ class PasswordResetConfirmView(APIView):
 @permission_classes([IsAuthenticated])
 def logout_all(request):
     user = request.user
+    previous_version = user.token_version
     user.token_version += 1
     user.save(update_fields=["token_version"])
+    invalidate_user(user.pk, previous_version)
     return Response({"message": "Logged out from all devices"})
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PayersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "payers"
+
+    def ready(self):
+        import payers.signals  # noqa
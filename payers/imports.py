@@ -0,0 +1,180 @@
+"""
+Bulk payer import from CSV.
+
+``import_payers`` validates every row in one pass, then diagnoses clashes
+with the session's existing payers using a single batched lookup. Rows whose
+email or phone number already belongs to another matric number in the
+session (``unique_email_per_session``/``unique_phone_per_session``) are
+reported and left out; the rest are upserted on ``(session, matric_number)``
+with chunked ``bulk_create(update_conflicts=True)``. Headers may be the field
+names or the labels written by the payer export.
+
+Clashes are judged against the session as it stands before the import, so
+a file can't move an email or phone number from one existing payer to
+another: swapping the emails of two existing payers reports both rows as
+conflicts and changes neither. Free the values first (e.g. import one side
+with placeholder addresses), then import the swap.
+"""
+
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from main import search
+
+from .models import Payer
+from .services import UPSERT_FIELDS
+from .signals import sync_payers_transaction_search_text
+
+IMPORT_CHUNK_SIZE = 500
+
+REQUIRED_FIELDS = ["matric_number", "first_name", "last_name", "email", "phone_number"]
+OPTIONAL_FIELDS = ["level", "faculty", "department"]
+
+LEVELS = {value for value, _ in Payer.LEVEL_CHOICES}
+LEVEL_LABELS = {label.lower(): value for value, label in Payer.LEVEL_CHOICES}
+MAX_LENGTHS = {
+    name: Payer._meta.get_field(name).max_length
+    for name in REQUIRED_FIELDS + OPTIONAL_FIELDS
+}
+
+LABELS = {
+    "matric_number": "matric number",
+    "email": "email",
+    "phone_number": "phone number",
+}
+CONFLICT_MESSAGE = "A payer with {label} '{value}' already exists in this session."
+DUPLICATE_MESSAGE = "The {label} '{value}' is already used on row {line}."
+
+
+def header_key(header):
+    return "_".join((header or "").strip().lower().split())
+
+
+def read_rows(file):
+    """``(line number, row dict)`` pairs from a CSV text stream."""
+    reader = csv.DictReader(file)
+    columns = {header_key(name): name for name in reader.fieldnames or []}
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, {
+            name: (row.get(columns[name]) or "").strip()
+            for name in REQUIRED_FIELDS + OPTIONAL_FIELDS
+            if name in columns
+        }
+
+
+def clean_row(row):
+    """``(values, errors)`` for one row, checked without touching the database."""
+    errors = {}
+    for name in REQUIRED_FIELDS:
+        if not row.get(name):
+            errors[name] = "This field is required."
+    for name, limit in MAX_LENGTHS.items():
+        if len(row.get(name, "")) > limit:
+            errors[name] = f"Ensure this field has no more than {limit} characters."
+    if "email" not in errors:
+        try:
+            validate_email(row["email"])
+        except ValidationError:
+            errors["email"] = "Enter a valid email address."
+
+    level = row.get("level") or "100"
+    level = LEVEL_LABELS.get(level.lower(), level)
+    if level not in LEVELS:
+        errors["level"] = f"'{level}' is not a valid level."
+
+    values = {
+        **{name: row.get(name, "") for name in REQUIRED_FIELDS},
+        "level": level,
+        "faculty": row.get("faculty") or None,
+        "department": row.get("department") or None,
+    }
+    return values, errors
+
+
+def import_payers(session, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Upsert ``rows`` (from ``read_rows``) into ``session``. Returns a report
+    with ``created``/``updated`` counts and per-row ``errors``.
+    """
+    errors = {}
+    valid = []
+    claimed = {name: {} for name in LABELS}
+    for line, row in rows:
+        values, row_errors = clean_row(row)
+        if not row_errors:
+            for name, lines in claimed.items():
+                first = lines.setdefault(values[name], line)
+                if first != line:
+                    row_errors[name] = DUPLICATE_MESSAGE.format(
+                        label=LABELS[name], value=values[name], line=first
+                    )
+        if row_errors:
+            errors[line] = (row.get("matric_number", ""), row_errors)
+        else:
+            valid.append((line, values))
+
+    # One lookup finds the rows to update and every email/phone clash
+    existing = Payer.objects.filter(session=session).filter(
+        Q(matric_number__in=[values["matric_number"] for _, values in valid])
+        | Q(email__in=[values["email"] for _, values in valid])
+        | Q(phone_number__in=[values["phone_number"] for _, values in valid])
+    )
+    current = {}
+    owners = {"email": {}, "phone_number": {}}
+    for pk, matric, email, phone, text in existing.values_list(
+        "pk", "matric_number", "email", "phone_number", "search_text"
+    ):
+        current[matric] = (pk, text)
+        owners["email"][email] = matric
+        owners["phone_number"][phone] = matric
+
+    payers = []
+    for line, values in valid:
+        clashes = {
+            name: CONFLICT_MESSAGE.format(label=LABELS[name], value=values[name])
+            for name, holders in owners.items()
+            if holders.get(values[name], values["matric_number"])
+            != values["matric_number"]
+        }
+        if clashes:
+            errors[line] = (values["matric_number"], clashes)
+            continue
+        payer = Payer(association_id=session.association_id, session=session, **values)
+        payer.search_text = search.payer_search_text(payer)
+        payers.append(payer)
+
+    with transaction.atomic():
+        Payer.objects.bulk_create(
+            payers,
+            batch_size=chunk_size,
+            update_conflicts=True,
+            unique_fields=["session", "matric_number"],
+            update_fields=UPSERT_FIELDS,
+        )
+        # bulk_create skips the search signals, so index here
+        search.index_objects(
+            search.PAYER, [(payer.pk, payer.search_text) for payer in payers]
+        )
+        sync_payers_transaction_search_text(
+            current[payer.matric_number][0]
+            for payer in payers
+            if payer.matric_number in current
+            and current[payer.matric_number][1] != payer.search_text
+        )
+
+    updated = sum(payer.matric_number in current for payer in payers)
+    return {
+        "created": len(payers) - updated,
+        "updated": updated,
+        "errors": [
+            {"row": line, "matric_number": matric_number, "errors": row_errors}
+            for line, (matric_number, row_errors) in sorted(errors.items())
+        ],
+    }
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from association.models import Session
+from payers.imports import IMPORT_CHUNK_SIZE, import_payers, read_rows
+
+
+class Command(BaseCommand):
+    help = "Create or update a session's payers from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("session", type=int, help="Session id.")
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Rows per INSERT ... ON CONFLICT statement.",
+        )
+
+    def handle(self, *args, **options):
+        session = Session.objects.filter(pk=options["session"]).first()
+        if session is None:
+            raise CommandError(f"No Session with id {options['session']}")
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as file:
+                report = import_payers(
+                    session, read_rows(file), chunk_size=options["chunk_size"]
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        for error in report["errors"]:
+            details = "; ".join(
+                f"{field}: {message}" for field, message in error["errors"].items()
+            )
+            self.stderr.write(f"row {error['row']} ({error['matric_number']}): {details}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']}, updated {report['updated']}, "
+                f"rejected {len(report['errors'])} payer row(s)."
+            )
+        )
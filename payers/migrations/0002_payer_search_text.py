@@ -0,0 +1,117 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:32
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of the main.search helpers as they were when this migration
+# was written, so later changes there can't alter what replaying it does
+TOKEN_SPLIT_RE = re.compile(r"[^0-9a-z@.]+")
+WHITESPACE_RE = re.compile(r"\s+")
+TOKEN_MAX_LENGTH = 100
+
+
+def normalize(*parts):
+    text = " ".join(str(part) for part in parts if part)
+    return WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def tokenize(text):
+    tokens = set()
+    for word in TOKEN_SPLIT_RE.split(normalize(text)):
+        word = word.strip(".")
+        if word:
+            tokens.add(word[:TOKEN_MAX_LENGTH])
+            if "@" in word:
+                tokens.update(
+                    piece[:TOKEN_MAX_LENGTH] for piece in word.split("@") if piece
+                )
+    return tokens
+
+
+def payer_search_text(payer):
+    return normalize(
+        payer.first_name,
+        payer.last_name,
+        payer.matric_number,
+        payer.email,
+        payer.faculty,
+        payer.department,
+    )
+
+
+def index_objects(schema_editor, SearchToken, kind, rows):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+    SearchToken.objects.filter(
+        kind=kind, object_id__in=[object_id for object_id, _ in rows]
+    ).delete()
+    SearchToken.objects.bulk_create(
+        [
+            SearchToken(kind=kind, object_id=object_id, token=token)
+            for object_id, text in rows
+            for token in tokenize(text)
+        ],
+        batch_size=2000,
+    )
+
+
+def backfill_search_text(apps, schema_editor):
+    Payer = apps.get_model("payers", "Payer")
+    SearchToken = apps.get_model("main", "SearchToken")
+
+    batch = []
+    for payer in Payer.objects.order_by("id").iterator(chunk_size=2000):
+        payer.search_text = payer_search_text(payer)
+        batch.append(payer)
+        if len(batch) >= 2000:
+            Payer.objects.bulk_update(batch, ["search_text"])
+            index_objects(
+                schema_editor,
+                SearchToken,
+                "payer",
+                [(p.id, p.search_text) for p in batch],
+            )
+            batch = []
+    if batch:
+        Payer.objects.bulk_update(batch, ["search_text"])
+        index_objects(
+            schema_editor,
+            SearchToken,
+            "payer",
+            [(p.id, p.search_text) for p in batch],
+        )
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS payer_search_text_trgm "
+        "ON payers_payer USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS payer_search_text_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0002_searchtoken"),
+        ("payers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payer",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,4 +1,8 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Count, DecimalField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
 
 from association.models import Association, Session
 
@@ -28,6 +32,7 @@ class Payer(models.Model):
     faculty = models.CharField(max_length=100, blank=True, null=True)
     department = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         constraints = [
@@ -41,3 +46,23 @@ class Payer(models.Model):
                 fields=["session", "matric_number"], name="unique_matric_per_session"
             ),
         ]
+
+    @classmethod
+    def with_totals(cls, queryset=None):
+        """
+        ``queryset`` annotated with ``total_transactions``,
+        ``verified_total_paid`` and ``last_paid_at`` (latest verified
+        payment), aggregated over one join on transactions.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        verified = Q(transactions__is_verified=True)
+        return queryset.annotate(
+            total_transactions=Count("transactions"),
+            verified_total_paid=Coalesce(
+                Sum("transactions__amount_paid", filter=verified),
+                Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            last_paid_at=Max("transactions__submitted_at", filter=verified),
+        )
@@ -4,15 +4,30 @@ from .models import Payer
 
 
 class PayerSerializer(serializers.ModelSerializer):
-    total_transactions = serializers.SerializerMethodField()
+    # Annotated by Payer.with_totals
+    total_transactions = serializers.IntegerField(read_only=True)
+    verified_total_paid = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+    last_paid_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Payer
         fields = "__all__"
         read_only_fields = ["association"]
 
-    def get_total_transactions(self, obj):
-        return obj.transactions.count()
+    def to_representation(self, instance):
+        # PayerViewSet's queryset carries the totals; a payer just created
+        # through it doesn't
+        if not hasattr(instance, "total_transactions"):
+            totals = (
+                Payer.with_totals(Payer.objects.filter(pk=instance.pk))
+                .values("total_transactions", "verified_total_paid", "last_paid_at")
+                .get()
+            )
+            for name, value in totals.items():
+                setattr(instance, name, value)
+        return super().to_representation(instance)
 
     def create(self, validated_data):
         user = self.context["request"].user
@@ -1,8 +1,45 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from main import search
+
 from .models import Payer
-from django.db import IntegrityError
+from .signals import sync_transaction_search_text
+
+# Columns an upsert on (session, matric_number) overwrites
+UPSERT_FIELDS = [
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "level",
+    "faculty",
+    "department",
+    "search_text",
+]
 
 
 class PayerService:
+    @staticmethod
+    def conflict_error(session, matric_number, email, phone_number):
+        """
+        The error for another payer in the session already holding ``email``
+        or ``phone_number``, or ``None``. One query covers both constraints.
+        """
+        clashes = list(
+            Payer.objects.filter(session=session)
+            .filter(Q(email=email) | Q(phone_number=phone_number))
+            .exclude(matric_number=matric_number)
+            .values_list("email", "phone_number")[:2]
+        )
+        if any(other_email == email for other_email, _ in clashes):
+            return f"A payer with email '{email}' already exists in this session."
+        if clashes:
+            return (
+                f"A payer with phone number '{phone_number}' already exists in this session."
+            )
+        return None
+
     @staticmethod
     def check_or_update_payer(
         association,
@@ -16,101 +53,49 @@ class PayerService:
         faculty="",
         department="",
     ):
+        """
+        Create the session's payer for ``matric_number`` or update their
+        details, in a single INSERT ... ON CONFLICT keyed on
+        (session, matric_number). Returns ``(payer, error)``.
+        """
         try:
-            # Look for existing payer in the current session
-            payer = Payer.objects.get(
-                association=association, session=session, matric_number=matric_number
+            error = PayerService.conflict_error(
+                session, matric_number, email, phone_number
             )
-            # Update existing payer details
-            payer.email = email
-            payer.phone_number = phone_number
-            payer.first_name = first_name
-            payer.last_name = last_name
-            payer.level = level
-            payer.faculty = faculty
-            payer.department = department
-            payer.save()
-            return payer, None
-        except Payer.DoesNotExist:
-            # Check for email uniqueness within this session
-            if Payer.objects.filter(
-                association=association, session=session, email=email
-            ).exists():
-                return (
-                    None,
-                    f"A payer with email '{email}' already exists in this session.",
-                )
-
-            # Check for phone number uniqueness within this session
-            if Payer.objects.filter(
-                association=association, session=session, phone_number=phone_number
-            ).exists():
-                return (
-                    None,
-                    f"A payer with phone number '{phone_number}' already exists in this session.",
-                )
-
-            # Check for matric number uniqueness within this session (redundant check but good practice)
-            if Payer.objects.filter(
-                association=association, session=session, matric_number=matric_number
-            ).exists():
-                return (
-                    None,
-                    f"A payer with matric number '{matric_number}' already exists in this session.",
-                )
+            if error:
+                return None, error
 
-            try:
-                # Create new payer in the current session
-                payer = Payer.objects.create(
-                    association=association,
-                    session=session,
-                    matric_number=matric_number,
-                    email=email,
-                    level=level,
-                    phone_number=phone_number,
-                    first_name=first_name,
-                    last_name=last_name,
-                    faculty=faculty,
-                    department=department,
-                )
-                return payer, None
-            except IntegrityError as e:
-                # Check which field caused the error
-                msg = str(e)
-                if "email" in msg:
-                    return (
-                        None,
-                        f"A payer with email '{email}' already exists in this session.",
-                    )
-                if "phone_number" in msg:
-                    return (
-                        None,
-                        f"A payer with phone number '{phone_number}' already exists in this session.",
-                    )
-                if "matric_number" in msg:
-                    return (
-                        None,
-                        f"A payer with matric number '{matric_number}' already exists in this session.",
-                    )
-                return None, "A unique constraint failed while creating payer."
-        except IntegrityError as e:
-            # Catch any IntegrityError that bubbles up
-            msg = str(e)
-            if "email" in msg:
-                return (
-                    None,
-                    f"A payer with email '{email}' already exists in this session.",
-                )
-            if "phone_number" in msg:
-                return (
-                    None,
-                    f"A payer with phone number '{phone_number}' already exists in this session.",
-                )
-            if "matric_number" in msg:
-                return (
-                    None,
-                    f"A payer with matric number '{matric_number}' already exists in this session.",
+            payer = Payer(
+                association=association,
+                session=session,
+                matric_number=matric_number,
+                email=email,
+                level=level,
+                phone_number=phone_number,
+                first_name=first_name,
+                last_name=last_name,
+                faculty=faculty,
+                department=department,
+            )
+            payer.search_text = search.payer_search_text(payer)
+            with transaction.atomic():
+                # Concurrent submissions for the same student update one row
+                Payer.objects.bulk_create(
+                    [payer],
+                    update_conflicts=True,
+                    unique_fields=["session", "matric_number"],
+                    update_fields=UPSERT_FIELDS,
                 )
-            return None, "A unique constraint failed while creating payer."
+                # bulk_create skips the payer signals
+                search.index_objects(search.PAYER, [(payer.pk, payer.search_text)])
+                sync_transaction_search_text(payer.pk, payer.search_text)
+            return payer, None
+        except IntegrityError:
+            # Another submission claimed the email or phone number since the
+            # check; the constraints caught it, so say which one
+            error = PayerService.conflict_error(
+                session, matric_number, email, phone_number
+            )
+            return None, error or "A unique constraint failed while creating payer."
         except Exception as e:
             return None, f"Unexpected error: {str(e)}"
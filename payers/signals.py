@@ -0,0 +1,83 @@
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Concat, Lower
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from main import search
+from transactions.models import Transaction
+
+from .models import Payer
+
+
+@receiver(pre_save, sender=Payer)
+def set_payer_search_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        instance.search_text = search.payer_search_text(instance)
+
+
+@receiver(post_save, sender=Payer)
+def sync_payer_search_index(sender, instance, created, update_fields=None, **kwargs):
+    text = search.payer_search_text(instance)
+    if text != instance.search_text:
+        # Partial saves skip pre_save's column update
+        Payer.objects.filter(pk=instance.pk).update(search_text=text)
+        instance.search_text = text
+    search.index_objects(search.PAYER, [(instance.pk, text)])
+
+    if not created:
+        sync_transaction_search_text(instance.pk, text)
+
+
+def sync_transaction_search_text(payer_id, text):
+    """Refresh the search text of the payer's transactions after a rename."""
+    # Transactions embed the payer's text after their reference id
+    suffix = f" {text}" if text else ""
+    stale = Transaction.objects.filter(payer_id=payer_id).exclude(
+        search_text__endswith=suffix
+    )
+    if search.uses_trigram_index():
+        stale.update(search_text=Concat(Lower("reference_id"), Value(suffix)))
+        return
+    rows = [
+        (txn_id, search.normalize(reference_id, text))
+        for txn_id, reference_id in stale.values_list("id", "reference_id")
+    ]
+    if rows:
+        Transaction.objects.filter(id__in=[txn_id for txn_id, _ in rows]).update(
+            search_text=Concat(Lower("reference_id"), Value(suffix))
+        )
+        search.index_objects(search.TRANSACTION, rows)
+
+
+def sync_payers_transaction_search_text(payer_ids, chunk_size=500):
+    """
+    ``sync_transaction_search_text`` for many payers at once, for bulk writes
+    that already stored each payer's new search text. One UPDATE per chunk
+    copies it into the transactions instead of one per payer.
+    """
+    payer_ids = list(payer_ids)
+    payer_text = Payer.objects.filter(pk=OuterRef("payer_id")).values("search_text")[
+        :1
+    ]
+    for start in range(0, len(payer_ids), chunk_size):
+        transactions = Transaction.objects.filter(
+            payer_id__in=payer_ids[start : start + chunk_size]
+        )
+        transactions.update(
+            search_text=Concat(
+                Lower("reference_id"),
+                Value(" "),
+                Subquery(payer_text),
+                output_field=TextField(),
+            )
+        )
+        if not search.uses_trigram_index():
+            search.index_objects(
+                search.TRANSACTION,
+                transactions.values_list("id", "search_text"),
+            )
+
+
+@receiver(post_delete, sender=Payer)
+def remove_payer_search_index(sender, instance, **kwargs):
+    search.unindex_object(search.PAYER, instance.pk)
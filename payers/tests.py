@@ -1 +1,356 @@
-# Create your tests here.
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from utils.testing import (
+    PAYER_EMAIL_DOMAIN,
+    QueryBudgetMixin,
+    api_client,
+    grow,
+    make_transaction,
+    seed_association,
+)
+
+from .models import Payer
+
+IMPORT_HEADER = "Matric Number,First Name,Last Name,Email,Phone Number,Level,Faculty\n"
+
+
+class PayerQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Seconds per request; generous, so only a runaway endpoint trips it
+    max_seconds = 2.0
+
+    def setUp(self):
+        self.scenario = seed_association(items=3)
+        self.client = api_client(self.scenario.admin)
+
+    def test_list(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/payers/", {"page_size": 100}),
+            lambda n: grow(self.scenario, n, transactions_per_payer=2),
+            max_queries=5,
+        )
+
+    def test_list_cursor_mode(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/payers/", {"pagination": "cursor"}),
+            lambda n: grow(self.scenario, n),
+            max_queries=4,
+        )
+
+    def test_list_search(self):
+        self.assertFlatQueries(
+            lambda: self.client.get(
+                "/api/payers/", {"search": PAYER_EMAIL_DOMAIN, "page_size": 100}
+            ),
+            lambda n: grow(self.scenario, n),
+            max_queries=5,
+        )
+
+    def test_detail(self):
+        grow(self.scenario, 1, transactions_per_payer=0)
+        payer = self.scenario.payers[0]
+
+        def add_transactions(n):
+            for _ in range(n):
+                make_transaction(payer, self.scenario.items[:1])
+
+        self.assertFlatQueries(
+            lambda: self.client.get(f"/api/payers/{payer.pk}/"),
+            add_transactions,
+            max_queries=5,
+        )
+
+
+class PayerTotalsTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(payers=3, items=1, transactions_per_payer=0)
+        self.client = api_client(self.scenario.admin)
+        self.unpaid, self.once, self.twice = self.scenario.payers
+        items = self.scenario.items
+        make_transaction(self.unpaid, items, verified=False)
+        make_transaction(self.once, items, verified=True)
+        make_transaction(self.twice, items, verified=True)
+        self.last = make_transaction(self.twice, items, verified=True)
+        self.amount = items[0].amount
+
+    def list(self, **params):
+        response = self.client.get("/api/payers/", {"page_size": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]["results"]
+
+    def test_totals(self):
+        rows = {row["id"]: row for row in self.list()}
+        self.assertEqual(rows[self.unpaid.pk]["total_transactions"], 1)
+        self.assertEqual(rows[self.unpaid.pk]["verified_total_paid"], "0.00")
+        self.assertIsNone(rows[self.unpaid.pk]["last_paid_at"])
+        self.assertEqual(rows[self.twice.pk]["total_transactions"], 2)
+        self.assertEqual(
+            rows[self.twice.pk]["verified_total_paid"], f"{self.amount * 2:.2f}"
+        )
+        self.assertEqual(
+            rows[self.twice.pk]["last_paid_at"],
+            self.last.submitted_at.isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_filter_and_order(self):
+        self.assertEqual(
+            [row["id"] for row in self.list(paid="false")], [self.unpaid.pk]
+        )
+        self.assertEqual(
+            [row["id"] for row in self.list(ordering="-verified_total_paid")],
+            [self.twice.pk, self.once.pk, self.unpaid.pk],
+        )
+        self.assertEqual(
+            [row["id"] for row in self.list(min_total_paid=str(self.amount * 2))],
+            [self.twice.pk],
+        )
+        response = self.client.get("/api/payers/", {"max_total_paid": "lots"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_created_payer_has_totals(self):
+        response = self.client.post(
+            "/api/payers/",
+            {
+                "first_name": "Ada",
+                "last_name": "Obi",
+                "email": "new@example.com",
+                "phone_number": "08011112222",
+                "matric_number": "NEW/00001",
+                "session": self.scenario.session.pk,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual(data["total_transactions"], 0)
+        self.assertEqual(data["verified_total_paid"], "0.00")
+
+
+class PayerImportTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(payers=2, items=1, transactions_per_payer=1)
+        self.client = api_client(self.scenario.admin)
+        self.existing, self.other = self.scenario.payers
+
+    def upload(self, body):
+        return self.client.post(
+            "/api/payers/import/",
+            {"file": SimpleUploadedFile("payers.csv", (IMPORT_HEADER + body).encode())},
+            format="multipart",
+        )
+
+    def test_import_creates_updates_and_reports(self):
+        existing, other = self.existing, self.other
+        body = (
+            "CSC/00001,Ada,Obi,ada@example.com,08000000001,200 Level,Science\n"
+            f"{existing.matric_number},Renamed,Payer,{existing.email},"
+            f"{existing.phone_number},300,\n"
+            f"CSC/00003,Clash,Email,{other.email},08000000003,100,\n"
+            "CSC/00004,Dup,Phone,dup@example.com,08000000001,100,\n"
+            "CSC/00005,,Blank,not-an-email,08000000005,900,\n"
+        )
+        # Auth, one lookup, one upsert, the payer search tokens and the
+        # renamed payer's transaction search text; nothing per row
+        with self.assertNumQueries(11):
+            response = self.upload(body)
+        self.assertEqual(response.status_code, 200)
+        report = response.json()["data"]
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["updated"], 1)
+        errors = {error["row"]: error for error in report["errors"]}
+        self.assertEqual(sorted(errors), [4, 5, 6])
+        self.assertEqual(
+            errors[4]["errors"],
+            {
+                "email": f"A payer with email '{other.email}' already exists "
+                "in this session."
+            },
+        )
+        self.assertIn("row 2", errors[5]["errors"]["phone_number"])
+        self.assertEqual(
+            sorted(errors[6]["errors"]), ["email", "first_name", "level"]
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.first_name, "Renamed")
+        self.assertEqual(existing.level, "300")
+        self.assertIn("renamed", existing.search_text)
+        # Renames reach the payer's transactions' search text
+        self.assertIn("renamed", existing.transactions.get().search_text)
+        created = Payer.objects.get(matric_number="CSC/00001")
+        self.assertEqual(created.session, self.scenario.session)
+        self.assertEqual(created.level, "200")
+        self.assertEqual(
+            self.client.get("/api/payers/", {"search": "ada@example.com"})
+            .json()["data"]["count"],
+            1,
+        )
+
+    def test_renames_sync_transactions_in_one_pass(self):
+        body = "".join(
+            f"{payer.matric_number},Renamed{n},Payer,{payer.email},"
+            f"{payer.phone_number},100,\n"
+            for n, payer in enumerate((self.existing, self.other))
+        )
+        # Same as a single rename: the transactions are updated together
+        with self.assertNumQueries(11):
+            self.upload(body)
+        for n, payer in enumerate((self.existing, self.other)):
+            payer.refresh_from_db()
+            txn = payer.transactions.get()
+            self.assertEqual(
+                txn.search_text, f"{txn.reference_id.lower()} {payer.search_text}"
+            )
+            self.assertIn(f"renamed{n}", txn.search_text)
+
+    def test_email_swap_between_existing_payers_is_rejected(self):
+        existing, other = self.existing, self.other
+        body = (
+            f"{existing.matric_number},A,B,{other.email},{existing.phone_number},100,\n"
+            f"{other.matric_number},C,D,{existing.email},{other.phone_number},100,\n"
+        )
+        report = self.upload(body).json()["data"]
+        self.assertEqual(report["updated"], 0)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3])
+        existing.refresh_from_db()
+        self.assertNotEqual(existing.email, other.email)
+
+    def test_missing_columns_rejected(self):
+        response = self.client.post(
+            "/api/payers/import/",
+            {"file": SimpleUploadedFile("payers.csv", b"Email\nx@example.com\n")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Payer.objects.count(), 2)
+
+    def test_command(self):
+        rows = "".join(
+            f"IMP/{n:05d},First,Last{n},imp{n}@example.com,0810{n:07d},100,\n"
+            for n in range(25)
+        )
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write(IMPORT_HEADER + rows)
+        self.addCleanup(os.unlink, file.name)
+        out = StringIO()
+        call_command(
+            "import_payers",
+            str(self.scenario.session.pk),
+            file.name,
+            chunk_size=10,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        self.assertIn("Created 25, updated 0, rejected 0", out.getvalue())
+
+        out = StringIO()
+        call_command(
+            "import_payers", str(self.scenario.session.pk), file.name, stdout=out
+        )
+        self.assertIn("Created 0, updated 25, rejected 0", out.getvalue())
+        self.assertEqual(
+            Payer.objects.filter(matric_number__startswith="IMP/").count(), 25
+        )
+
+
+def check_payload(association, n, **overrides):
+    return {
+        "association_short_name": association.association_short_name,
+        "matric_number": f"CHK/{n:05d}",
+        "email": f"check{n}@example.com",
+        "level": "100",
+        "phone_number": f"0820{n:07d}",
+        "first_name": "Ada",
+        "last_name": f"Obi{n}",
+        **overrides,
+    }
+
+
+class PayerCheckTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(items=1, transactions_per_payer=0)
+        self.association = self.scenario.association
+        self.client = APIClient()
+
+    def check(self, n, **overrides):
+        return self.client.post(
+            "/api/payers/check/",
+            check_payload(self.association, n, **overrides),
+            format="json",
+        )
+
+    def test_create_then_update(self):
+        response = self.check(1)
+        self.assertEqual(response.status_code, 200)
+        payer_id = response.json()["payer_id"]
+
+        # Association lookup, conflict check, upsert and the search upkeep
+        with self.assertNumQueries(8):
+            response = self.check(1, first_name="Renamed", level="200")
+        self.assertEqual(response.json()["payer_id"], payer_id)
+        payer = Payer.objects.get()
+        self.assertEqual((payer.first_name, payer.level), ("Renamed", "200"))
+        self.assertIn("renamed", payer.search_text)
+        self.assertEqual(
+            api_client(self.scenario.admin)
+            .get("/api/payers/", {"search": "renamed"})
+            .json()["data"]["count"],
+            1,
+        )
+
+    def test_conflicts_keep_their_messages(self):
+        self.check(1)
+        response = self.check(2, email="check1@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["data"]["error"],
+            "A payer with email 'check1@example.com' already exists in this session.",
+        )
+        response = self.check(2, phone_number="08200000001")
+        self.assertEqual(
+            response.json()["data"]["error"],
+            "A payer with phone number '08200000001' already exists in this session.",
+        )
+        # Updating a payer to another payer's email is rejected as well
+        self.check(2)
+        response = self.check(2, email="check1@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Payer.objects.count(), 2)
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "needs a database with concurrent writers"
+)
+class ConcurrentPayerCheckTests(TransactionTestCase):
+    submissions = 40
+    workers = 8
+
+    def test_simultaneous_submissions_for_one_student(self):
+        scenario = seed_association(items=1, transactions_per_payer=0)
+
+        def submit(n):
+            try:
+                response = APIClient().post(
+                    "/api/payers/check/",
+                    check_payload(scenario.association, 1, last_name=f"Try{n}"),
+                    format="json",
+                )
+                return response.status_code, response.json().get("payer_id")
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(submit, range(self.submissions)))
+
+        self.assertEqual({code for code, _ in results}, {200})
+        payer = Payer.objects.get()
+        self.assertEqual({payer_id for _, payer_id in results}, {payer.pk})
@@ -1,22 +1,32 @@
-from django.db import models
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
 
-from association.models import Association, Session
+from association.models import Association
+from main import search
+from main.pagination import KeysetPageNumberPagination
+from main.tenancy import TenantMixin
+from utils.exports import EXPORT_CHUNK_SIZE, streaming_export_response
 
+from .imports import import_payers, read_rows
 from .models import Payer
 from .serializers import PayerCheckSerializer, PayerSerializer
 from .services import PayerService
 
 
-class PayerPagination(PageNumberPagination):
+class PayerPagination(KeysetPageNumberPagination):
     page_size = 7
-    page_size_query_param = 'page_size'  
+    page_size_query_param = 'page_size'
     max_page_size = 1000
+    keyset_field = "created_at"
 
 class PayerCheckView(APIView):
     def post(self, request):
@@ -27,9 +37,9 @@ class PayerCheckView(APIView):
 
         assoc_short_name = data.get("association_short_name")
         try:
-            association = Association.objects.get(
-                association_short_name=assoc_short_name
-            )
+            association = Association.objects.select_related(
+                "current_session"
+            ).get(association_short_name=assoc_short_name)
         except Association.DoesNotExist:
             return Response(
                 {"error": "Association not found."}, status=status.HTTP_404_NOT_FOUND
@@ -68,50 +78,54 @@ class PayerCheckView(APIView):
         )
 
 
-class PayerViewSet(viewsets.ModelViewSet):
+# Annotated by Payer.with_totals, and the query parameters that filter on them
+TOTALS_FIELDS = ("total_transactions", "verified_total_paid", "last_paid_at")
+TOTALS_FILTERS = ("paid", "min_total_paid", "max_total_paid")
+
+
+class PayerViewSet(TenantMixin, viewsets.ModelViewSet):
     queryset = Payer.objects.all()
     serializer_class = PayerSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = PayerPagination
+    # Page-number mode only; cursor pages always seek on created_at
+    ordering_fields = [
+        "created_at",
+        "last_name",
+        "total_transactions",
+        "verified_total_paid",
+        "last_paid_at",
+    ]
 
     def get_queryset(self):
-        association = getattr(self.request.user, "association", None)
-        queryset = Payer.objects.none()
-
-        if association:
-            # Get session_id from query params or use current session
-            session_id = self.request.query_params.get("session_id")
-
-            if session_id:
-                # Validate that session belongs to this association
-                try:
-                    session = Session.objects.get(
-                        id=session_id, association=association
-                    )
-                    queryset = Payer.objects.filter(session=session)
-                except Session.DoesNotExist:
-                    queryset = Payer.objects.none()
-            elif association.current_session:
-                # Use current session if no session_id provided
-                queryset = Payer.objects.filter(session=association.current_session)
-            else:
-                # No session available, return empty queryset
-                queryset = Payer.objects.none()
-
-        # Order by creation date
-        queryset = queryset.order_by("-created_at")
+        session = self.tenant.session
+        if session is not None:
+            queryset = Payer.objects.filter(session=session)
+        else:
+            # No association, unknown session_id or no session yet
+            queryset = Payer.objects.none()
+
+        # Transaction count, verified total and last verified payment, in
+        # the same query as the payers. The GROUP BY is only paid where the
+        # totals are shown, filtered or sorted on, not by exports or writes
+        ordering = self.request.query_params.get("ordering", "")
+        if (
+            self.action in ("list", "retrieve")
+            or ordering.lstrip("-") in TOTALS_FIELDS
+            or any(self.request.query_params.get(name) for name in TOTALS_FILTERS)
+        ):
+            queryset = Payer.with_totals(queryset)
+
+        # Order by creation date unless ?ordering= names an allowed field
+        if ordering.lstrip("-") in self.ordering_fields:
+            queryset = queryset.order_by(ordering, "-id")
+        else:
+            queryset = queryset.order_by("-created_at")
 
         # Search by name, matric number, email, faculty, department
-        search = self.request.query_params.get("search")
-        if search:
-            queryset = queryset.filter(
-                models.Q(first_name__icontains=search)
-                | models.Q(last_name__icontains=search)
-                | models.Q(matric_number__icontains=search)
-                | models.Q(email__icontains=search)
-                | models.Q(faculty__icontains=search)
-                | models.Q(department__icontains=search)
-            )
+        search_term = self.request.query_params.get("search")
+        if search_term:
+            queryset = search.filter_queryset(queryset, search.PAYER, search_term)
 
         # Filter by faculty
         faculty = self.request.query_params.get("faculty")
@@ -128,26 +142,91 @@ class PayerViewSet(viewsets.ModelViewSet):
         if level:
             queryset = queryset.filter(level=level)
 
+        # Filter by payment standing: ?paid=false finds payers with no
+        # verified payment
+        paid = self.request.query_params.get("paid")
+        if paid is not None:
+            if paid.lower() == "true":
+                queryset = queryset.filter(last_paid_at__isnull=False)
+            elif paid.lower() == "false":
+                queryset = queryset.filter(last_paid_at__isnull=True)
+
+        # Filter by verified amount paid
+        for param, lookup in (
+            ("min_total_paid", "verified_total_paid__gte"),
+            ("max_total_paid", "verified_total_paid__lte"),
+        ):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    amount = Decimal(value)
+                except InvalidOperation:
+                    amount = None
+                if amount is None or not amount.is_finite():
+                    raise ValidationError({param: "Enter a number."})
+                queryset = queryset.filter(**{lookup: amount})
+
         return queryset
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Stream the filtered session payers as CSV (default) or XLSX"""
+        fields = [
+            ("first_name", "First Name"),
+            ("last_name", "Last Name"),
+            ("matric_number", "Matric Number"),
+            ("email", "Email"),
+            ("phone_number", "Phone Number"),
+            ("level", "Level"),
+            ("faculty", "Faculty"),
+            ("department", "Department"),
+            ("created_at", "Created At"),
+        ]
+        rows = (
+            self.get_queryset()
+            .order_by("-created_at", "-id")
+            .values_list(*[name for name, _ in fields])
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export_response(
+            [label for _, label in fields],
+            rows,
+            filename=f"payers-{timezone.now():%Y%m%d-%H%M}",
+            file_format=request.query_params.get("file_format", "csv"),
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_csv(self, request):
+        """Upsert payers from an uploaded CSV ``file`` into the session"""
+        session = self.tenant.session
+        if session is None:
+            raise ValidationError(
+                "No current session available. Please create a session first."
+            )
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "Upload a CSV file."})
+        try:
+            rows = read_rows(
+                io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+            )
+            report = import_payers(session, rows)
+        except (ValueError, UnicodeDecodeError) as error:
+            raise ValidationError({"file": str(error)})
+        return Response(report)
+
     def perform_create(self, serializer):
-        association = getattr(self.request.user, "association", None)
-        if not association or not association.current_session:
+        if not self.tenant.current_session:
             raise ValidationError(
                 "No current session available. Please create a session first."
             )
 
         serializer.save(
-            association=association,
-            session=association.current_session,  # Auto-assign current session
+            association=self.tenant.association,
+            session=self.tenant.current_session,  # Auto-assign current session
         )
-
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
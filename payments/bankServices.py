@@ -1,15 +1,10 @@
 import logging
-from datetime import datetime, timezone
 
-import requests
-from django.conf import settings
 from django.core.cache import cache
 
-logger = logging.getLogger(__name__)
-
+from gateways import korapay
 
-def _ts():
-    return datetime.now(timezone.utc).isoformat()
+logger = logging.getLogger(__name__)
 
 
 class VerifyBankService:
@@ -17,14 +12,6 @@ class VerifyBankService:
     Korapay bank list and resolution service
     """
 
-    BASE_URL = getattr(
-        settings, "KORAPAY_BASE_URL", "https://api.korapay.com/merchant/api/v1"
-    )
-    HEADERS = {
-        # Korapay requires PUBLIC key for these misc endpoints
-        "Authorization": f"Bearer {getattr(settings, 'KORAPAY_PUBLIC_KEY', '')}",
-        "Content-Type": "application/json",
-    }
     BANK_LIST_CACHE_KEY = "korapay_bank_list"
     BANK_LIST_CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
 
@@ -34,13 +21,10 @@ class VerifyBankService:
         Fetch list of Nigerian banks and their codes from Korapay.
         Returns a list of { name, code } dicts (same shape as before).
         """
-        print(f"[{_ts()}] [BANKS] Fetching bank list...")
+        logger.debug("[BANKS] Fetching bank list")
         cached_banks = cache.get(VerifyBankService.BANK_LIST_CACHE_KEY)
         if cached_banks:
-            logger.info(
-                f"[{_ts()}][BANKS] Using cached banks count={len(cached_banks)}"
-            )
-            print(f"[{_ts()}] [BANKS] Cached banks: {len(cached_banks)}")
+            logger.debug("[BANKS] Using cached banks count=%s", len(cached_banks))
             return cached_banks
 
         # Fallback list (same as before) in case Korapay is unreachable
@@ -58,11 +42,14 @@ class VerifyBankService:
             {"name": "Test Bank", "code": "100004"},
         ]
 
-        url = f"{VerifyBankService.BASE_URL.rstrip('/')}/misc/banks"
         params = {"countryCode": "NG"}
         try:
-            resp = requests.get(
-                url, headers=VerifyBankService.HEADERS, params=params, timeout=15
+            # Korapay requires PUBLIC key for these misc endpoints
+            resp = korapay().get(
+                "misc/banks",
+                endpoint="misc.banks",
+                params=params,
+                auth={"public": True},
             )
             data = (
                 resp.json()
@@ -71,9 +58,8 @@ class VerifyBankService:
             )
             if not resp.ok or not data.get("status"):
                 logger.error(
-                    f"[{_ts()}][BANKS][ERR] status={resp.status_code} body={data}"
+                    "[BANKS][ERR] status=%s body=%s", resp.status_code, data
                 )
-                print(f"[{_ts()}] [BANKS][ERR] status={resp.status_code}")
                 raise RuntimeError("Korapay bank list error")
 
             banks_raw = data.get("data") or []
@@ -88,12 +74,15 @@ class VerifyBankService:
                 banks,
                 VerifyBankService.BANK_LIST_CACHE_TIMEOUT,
             )
-            logger.info(f"[{_ts()}][BANKS][OK] fetched={len(banks)}")
-            print(f"[{_ts()}] [BANKS][OK] fetched={len(banks)}")
+            logger.info("[BANKS][OK] fetched=%s", len(banks))
             return banks
         except Exception as e:
-            logger.error(f"[{_ts()}][BANKS][EXC] {e}", exc_info=True)
-            print(f"[{_ts()}] [BANKS] Using fallback banks: {len(fallback_banks)}")
+            logger.error(
+                "[BANKS][EXC] %s; using fallback banks count=%s",
+                e,
+                len(fallback_banks),
+                exc_info=True,
+            )
             return fallback_banks
 
     @staticmethod
@@ -102,13 +91,17 @@ class VerifyBankService:
         Verify bank account using Korapay.
         Returns dict with keys: account_name, bank_name, account_number, bank_code (same shape used by the view).
         """
-        print(f"[{_ts()}] [VERIFY] acct={account_number} bank={bank_code}")
-        url = f"{VerifyBankService.BASE_URL.rstrip('/')}/misc/banks/resolve/"
+        logger.debug("[VERIFY] acct=%s bank=%s", account_number, bank_code)
         payload = {"bank": str(bank_code), "account": str(account_number)}
 
         try:
-            resp = requests.post(
-                url, headers=VerifyBankService.HEADERS, json=payload, timeout=20
+            # A lookup, so safe to retry even though it is a POST
+            resp = korapay().post(
+                "misc/banks/resolve/",
+                endpoint="misc.banks.resolve",
+                idempotent=True,
+                json=payload,
+                auth={"public": True},
             )
             data = (
                 resp.json()
@@ -117,9 +110,8 @@ class VerifyBankService:
             )
             if not resp.ok or not data.get("status"):
                 logger.error(
-                    f"[{_ts()}][VERIFY][ERR] status={resp.status_code} body={data}"
+                    "[VERIFY][ERR] status=%s body=%s", resp.status_code, data
                 )
-                print(f"[{_ts()}] [VERIFY][ERR] status={resp.status_code}")
                 return None
 
             d = data.get("data") or {}
@@ -134,13 +126,14 @@ class VerifyBankService:
                     "bank_name": d.get("bank_name"),
                 }
                 logger.info(
-                    f"[{_ts()}][VERIFY][OK] acct={result['account_number']} bank={result['bank_code']}"
+                    "[VERIFY][OK] acct=%s bank=%s",
+                    result["account_number"],
+                    result["bank_code"],
                 )
-                print(f"[{_ts()}] [VERIFY][OK] acct={result['account_number']}")
                 return result
 
-            logger.warning(f"[{_ts()}][VERIFY] No account_name in response: {data}")
+            logger.warning("[VERIFY] No account_name in response: %s", data)
             return None
         except Exception as e:
-            logger.error(f"[{_ts()}][VERIFY][EXC] {e}", exc_info=True)
+            logger.error("[VERIFY][EXC] %s", e, exc_info=True)
             return None
@@ -1 +1,60 @@
-# Create your tests here.
+from django.test import TestCase
+
+from payments.models import ReceiverBankAccount
+from utils.testing import (
+    QueryBudgetMixin,
+    api_client,
+    make_payment_items,
+    seed_association,
+)
+
+
+class PaymentQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Seconds per request; generous, so only a runaway endpoint trips it
+    max_seconds = 2.0
+
+    def setUp(self):
+        self.scenario = seed_association(items=0)
+        self.client = api_client(self.scenario.admin)
+
+    def add_items(self, n):
+        self.scenario.items += make_payment_items(
+            self.scenario.association, self.scenario.session, n
+        )
+
+    def test_payment_item_list(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/payments/payment-items/"),
+            self.add_items,
+            max_queries=6,
+        )
+
+    def test_payment_item_list_filtered(self):
+        self.assertFlatQueries(
+            lambda: self.client.get(
+                "/api/payments/payment-items/", {"status": "true", "search": "a"}
+            ),
+            self.add_items,
+            max_queries=6,
+        )
+
+    def test_payment_item_detail(self):
+        self.add_items(1)
+        item = self.scenario.items[0]
+        self.assertFlatQueries(
+            lambda: self.client.get(f"/api/payments/payment-items/{item.pk}/"),
+            self.add_items,
+            max_queries=4,
+        )
+
+    def test_bank_account(self):
+        ReceiverBankAccount.objects.create(
+            association=self.scenario.association,
+            bank_name="Test Bank",
+            account_name="Test Account",
+            account_number="0123456789",
+            bank_code="058",
+        )
+        self.assertQueryBudget(
+            lambda: self.client.get("/api/payments/bank-account/"), max_queries=3
+        )
@@ -6,7 +6,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from association.models import Session
+from main.tenancy import TenantMixin
 
 from .bankServices import VerifyBankService
 from .models import PaymentItem, ReceiverBankAccount
@@ -19,39 +19,27 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 
 
-class PaymentItemViewSet(viewsets.ModelViewSet):
+class PaymentItemViewSet(TenantMixin, viewsets.ModelViewSet):
     queryset = PaymentItem.objects.all()
     serializer_class = PaymentItemSerializer
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        association = getattr(self.request.user, "association", None)
-        if not association or not association.current_session:
+        if not self.tenant.current_session:
             raise ValidationError(
                 "No current session available. Please create a session first."
             )
 
-        serializer.save(association=association, session=association.current_session)
+        serializer.save(
+            association=self.tenant.association, session=self.tenant.current_session
+        )
 
     def get_queryset(self):
-        association = getattr(self.request.user, "association", None)
-        queryset = PaymentItem.objects.none()
-
-        if association:
-            session_id = self.request.query_params.get("session_id")
-
-            if session_id:
-                try:
-                    session = Session.objects.get(
-                        id=session_id, association=association
-                    )
-                    queryset = PaymentItem.objects.filter(session=session)
-                except Session.DoesNotExist:
-                    queryset = PaymentItem.objects.none()
-            elif association.current_session:
-                queryset = PaymentItem.objects.filter(
-                    session=association.current_session
-                )
+        session = self.tenant.session
+        if session is not None:
+            queryset = PaymentItem.objects.filter(session=session)
+        else:
+            queryset = PaymentItem.objects.none()
 
         # Search by title
         search = self.request.query_params.get("search")
@@ -228,15 +216,14 @@ class VerifyBankAccountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        print(f"VerifyBankAccountView called with data: {request.data}")
-        logger.info(f"Verification request from user: {request.user}")
-        logger.info(f"Request data: {request.data}")
+        logger.info("Verification request from user: %s", request.user)
+        logger.debug("Request data: %s", request.data)
 
         try:
             # Check if user has association
             try:
                 association = request.user.association
-                logger.info(f"User association found: {association}")
+                logger.debug("User association found: %s", association)
             except AttributeError:
                 logger.error("User has no association")
                 return Response(
@@ -251,7 +238,7 @@ class VerifyBankAccountView(APIView):
             # Validate input data
             serializer = BankAccountVerificationSerializer(data=request.data)
             if not serializer.is_valid():
-                logger.error(f"Validation errors: {serializer.errors}")
+                logger.error("Validation errors: %s", serializer.errors)
                 return Response(
                     {
                         "success": False,
@@ -264,7 +251,7 @@ class VerifyBankAccountView(APIView):
             account_number = serializer.validated_data["account_number"]
             bank_code = serializer.validated_data["bank_code"]
             logger.info(
-                f"Attempting to verify: {account_number} with bank code: {bank_code}"
+                "Attempting to verify: %s with bank code: %s", account_number, bank_code
             )
 
             # Verify with Nubapi
@@ -272,9 +259,9 @@ class VerifyBankAccountView(APIView):
                 verification_data = VerifyBankService.verify_account(
                     account_number, bank_code
                 )
-                logger.info(f"Verification result: {verification_data}")
+                logger.info("Verification result: %s", verification_data)
             except Exception as e:
-                logger.error(f"VerifyBankService error: {str(e)}")
+                logger.error("VerifyBankService error: %s", e)
                 return Response(
                     {
                         "success": False,
@@ -312,7 +299,7 @@ class VerifyBankAccountView(APIView):
             )
 
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            logger.error("Unexpected error: %s", e, exc_info=True)
             return Response(
                 {
                     "success": False,
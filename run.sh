@@ -1,3 +1,12 @@
 #!/usr/bin/env bash
 set -o errexit
-gunicorn config.wsgi:application --env DJANGO_SETTINGS_MODULE=config.settings.prod
\ No newline at end of file
+export DJANGO_SETTINGS_MODULE=config.settings.prod
+
+# Background workers run next to the web server; if any of them exits, the
+# whole service exits so the platform restarts it
+python manage.py run_outbox &
+python manage.py process_webhooks &
+gunicorn config.wsgi:application &
+
+wait -n
+exit $?
@@ -1,7 +1,22 @@
 from django.contrib import admin
-from unfold.admin import ModelAdmin
+from unfold.admin import ModelAdmin, TabularInline
 
-from .models import Transaction, TransactionReceipt
+from . import webhooks
+from .models import (
+    ReceiptSequence,
+    SessionRollup,
+    Transaction,
+    TransactionLineItem,
+    TransactionReceipt,
+    WebhookEvent,
+)
+
+
+class TransactionLineItemInline(TabularInline):
+    model = TransactionLineItem
+    extra = 0
+    readonly_fields = ("payment_item", "title", "amount")
+    can_delete = False
 
 
 @admin.register(Transaction)
@@ -21,10 +36,68 @@ class TransactionAdmin(ModelAdmin):
         "association__association_name",
     )
     list_filter = ("is_verified", "association", "submitted_at")
+    inlines = [TransactionLineItemInline]
 
 
 @admin.register(TransactionReceipt)
 class TransactionReceiptAdmin(ModelAdmin):
-    list_display = ("receipt_no", "transaction", "issued_at")
+    list_display = ("receipt_no", "transaction", "association", "issued_at")
     search_fields = ("receipt_no", "transaction__reference_id")
-    list_filter = ("issued_at",)
+    list_filter = ("issued_at", "association")
+
+
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(ModelAdmin):
+    list_display = ("association", "last_number", "updated_at")
+    readonly_fields = ("last_number", "updated_at")
+
+
+@admin.register(SessionRollup)
+class SessionRollupAdmin(ModelAdmin):
+    list_display = (
+        "session",
+        "total_count",
+        "total_amount",
+        "verified_count",
+        "pending_count",
+        "updated_at",
+    )
+    readonly_fields = (
+        "total_count",
+        "total_amount",
+        "verified_count",
+        "verified_amount",
+        "pending_count",
+        "pending_amount",
+    )
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(ModelAdmin):
+    list_display = (
+        "provider",
+        "event_type",
+        "event_id",
+        "status",
+        "attempts",
+        "received_at",
+        "processed_at",
+    )
+    search_fields = ("event_id", "event_type")
+    list_filter = ("provider", "status", "event_type")
+    readonly_fields = (
+        "provider",
+        "event_type",
+        "event_id",
+        "body",
+        "attempts",
+        "last_error",
+        "received_at",
+        "processed_at",
+    )
+    actions = ["replay_events"]
+
+    @admin.action(description="Queue selected events for reprocessing")
+    def replay_events(self, request, queryset):
+        requeued = webhooks.requeue(queryset)
+        self.message_user(request, f"Queued {requeued} event(s) for process_webhooks.")
@@ -3,21 +3,13 @@ import hmac
 import json
 import logging
 import re
-from datetime import datetime
-from datetime import timezone as dt_tz
 from decimal import ROUND_HALF_UP, Decimal
 
-import requests
 from django.conf import settings
 
-KORAPAY_BASE_URL = getattr(
-    settings, "KORAPAY_BASE_URL", "https://api.korapay.com/merchant/api/v1"
-)
-logger = logging.getLogger(__name__)
-
+from gateways import json_body, korapay
 
-def _ts():
-    return datetime.now(dt_tz.utc).isoformat()
+logger = logging.getLogger(__name__)
 
 
 def get_webhook_secret() -> str:
@@ -79,11 +71,6 @@ def korapay_init_charge(
     redirect_url: str,
     metadata: dict | None = None,
 ) -> dict:
-    url = f"{KORAPAY_BASE_URL}/charges/initialize"
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'KORAPAY_SECRET_KEY', '')}",
-        "Content-Type": "application/json",
-    }
 
     platform_name = getattr(settings, "PLATFORM_NAME", "Duespay")
     platform_email = getattr(settings, "PLATFORM_EMAIL", "justondev05@gmail.com")
@@ -96,9 +83,7 @@ def korapay_init_charge(
 
     if not str(redirect_url).startswith("https://"):
         if getattr(settings, "DEBUG", False):
-            logger.debug(
-                f"[{_ts()}] Using non-HTTPS redirect_url in DEBUG: {redirect_url}"
-            )
+            logger.debug("Using non-HTTPS redirect_url in DEBUG: %s", redirect_url)
         else:
             raise ValueError("redirect_url must be https in production")
 
@@ -125,27 +110,22 @@ def korapay_init_charge(
     }
 
     logger.info(
-        f"[{_ts()}][CHARGE][REQ] ref={reference} amount={payload['amount']} email={email} meta={meta}"
-    )
-    print(
-        f"[{_ts()}] CHARGE REQ ref={reference} amount={payload['amount']} email={email}"
+        "[CHARGE][REQ] ref=%s amount=%s email=%s", reference, payload["amount"], email
     )
+    logger.debug("[CHARGE][REQ] ref=%s meta=%s", reference, meta)
 
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-    try:
-        body = resp.json()
-    except Exception:
-        body = {"text": resp.text}
+    resp = korapay().post(
+        "charges/initialize", endpoint="charges.initialize", json=payload
+    )
+    body = json_body(resp)
 
     if not resp.ok:
         logger.error(
-            f"[{_ts()}][CHARGE][ERR] ref={reference} status={resp.status_code} body={body}"
+            "[CHARGE][ERR] ref=%s status=%s body=%s", reference, resp.status_code, body
         )
-        print(f"[{_ts()}] CHARGE ERR ref={reference} status={resp.status_code}")
         resp.raise_for_status()
 
-    logger.info(f"[{_ts()}][CHARGE][OK] ref={reference} status={resp.status_code}")
-    print(f"[{_ts()}] CHARGE OK ref={reference} status={resp.status_code}")
+    logger.info("[CHARGE][OK] ref=%s status=%s", reference, resp.status_code)
     return body
 
 
@@ -158,11 +138,6 @@ def korapay_payout_bank(
     narration: str,
     customer: dict,
 ) -> dict:
-    url = f"{KORAPAY_BASE_URL}/transactions/disburse"
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'KORAPAY_SECRET_KEY', '')}",
-        "Content-Type": "application/json",
-    }
 
     # Validations to prevent bad disbursements
     try:
@@ -171,7 +146,7 @@ def korapay_payout_bank(
             raise ValueError("Amount must be > 0")
     except Exception as e:
         logger.error(
-            f"[{_ts()}][PAYOUT][VALIDATION] bad amount={amount} ref={reference} err={e}"
+            "[PAYOUT][VALIDATION] bad amount=%s ref=%s err=%s", amount, reference, e
         )
         raise
 
@@ -198,21 +173,20 @@ def korapay_payout_bank(
     }
 
     logger.info(
-        f"[{_ts()}][PAYOUT][REQ] ref={reference} amount={amt_num} bank={bank} acct={acct}"
-    )
-    print(
-        f"[{_ts()}] PAYOUT REQ ref={reference} amount={amt_num} bank={bank} acct={acct}"
+        "[PAYOUT][REQ] ref=%s amount=%s bank=%s acct=%s", reference, amt_num, bank, acct
     )
 
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-    try:
-        data = resp.json()
-    except Exception:
-        data = {"text": resp.text}
+    # Safe to retry: Korapay rejects a reused reference and that is treated as OK below
+    resp = korapay().post(
+        "transactions/disburse",
+        endpoint="transactions.disburse",
+        idempotent=True,
+        json=payload,
+    )
+    data = json_body(resp)
 
     if resp.status_code in (200, 201):
-        logger.info(f"[{_ts()}][PAYOUT][OK] ref={reference} resp={data}")
-        print(f"[{_ts()}] PAYOUT OK ref={reference}")
+        logger.info("[PAYOUT][OK] ref=%s resp=%s", reference, data)
         return data
 
     # Idempotency: treat duplicate reference as OK
@@ -228,14 +202,12 @@ def korapay_payout_bank(
     except Exception:
         pass
     if duplicate:
-        logger.info(f"[{_ts()}][PAYOUT][DUP] ref={reference} resp={data}")
-        print(f"[{_ts()}] PAYOUT DUP ref={reference}")
+        logger.info("[PAYOUT][DUP] ref=%s resp=%s", reference, data)
         return data
 
     logger.error(
-        f"[{_ts()}][PAYOUT][ERR] ref={reference} status={resp.status_code} resp={data}"
+        "[PAYOUT][ERR] ref=%s status=%s resp=%s", reference, resp.status_code, data
     )
-    print(f"[{_ts()}] PAYOUT ERR ref={reference} status={resp.status_code}")
     resp.raise_for_status()
     return data
 
@@ -256,11 +228,6 @@ def korapay_init_bank_transfer(
     Create Korapay bank transfer payment with dynamic virtual account.
     Customer bears cost by default (merchant_bears_cost=False).
     """
-    url = f"{KORAPAY_BASE_URL}/charges/bank-transfer"
-    headers = {
-        "Authorization": f"Bearer {getattr(settings, 'KORAPAY_SECRET_KEY', '')}",
-        "Content-Type": "application/json",
-    }
 
     platform_name = getattr(settings, "PLATFORM_NAME", "Duespay")
     platform_email = getattr(settings, "PLATFORM_EMAIL", "justondev05@gmail.com")
@@ -307,25 +274,26 @@ def korapay_init_bank_transfer(
         payload["metadata"] = meta
 
     logger.info(
-        f"[{_ts()}][BANK_TRANSFER][REQ] ref={reference} amount={payload['amount']} email={email} merchant_bears_cost={merchant_bears_cost}"
-    )
-    print(
-        f"[{_ts()}] BANK_TRANSFER REQ ref={reference} amount={payload['amount']} email={email}"
+        "[BANK_TRANSFER][REQ] ref=%s amount=%s email=%s merchant_bears_cost=%s",
+        reference,
+        payload["amount"],
+        email,
+        merchant_bears_cost,
     )
 
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-    try:
-        body = resp.json()
-    except Exception:
-        body = {"text": resp.text}
+    resp = korapay().post(
+        "charges/bank-transfer", endpoint="charges.bank_transfer", json=payload
+    )
+    body = json_body(resp)
 
     if not resp.ok:
         logger.error(
-            f"[{_ts()}][BANK_TRANSFER][ERR] ref={reference} status={resp.status_code} body={body}"
+            "[BANK_TRANSFER][ERR] ref=%s status=%s body=%s",
+            reference,
+            resp.status_code,
+            body,
         )
-        print(f"[{_ts()}] BANK_TRANSFER ERR ref={reference} status={resp.status_code}")
         resp.raise_for_status()
 
-    logger.info(f"[{_ts()}][BANK_TRANSFER][OK] ref={reference} status={resp.status_code}")
-    print(f"[{_ts()}] BANK_TRANSFER OK ref={reference} status={resp.status_code}")
+    logger.info("[BANK_TRANSFER][OK] ref=%s status=%s", reference, resp.status_code)
     return body
@@ -1,11 +1,23 @@
+import logging
 from datetime import datetime
 
 from django.conf import settings
 from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.template.loader import render_to_string
 
+from main import outbox
+from main.mail import send_bulk
 
-def send_admin_new_transaction_email(admin, association, transaction):
+from . import pdf
+from .models import Transaction, TransactionReceipt
+
+logger = logging.getLogger(__name__)
+
+NEW_TRANSACTION_EMAIL = "transactions.new_transaction"
+RECEIPT_EMAIL = "transactions.receipt"
+
+
+def build_admin_new_transaction_email(admin, association, transaction):
     subject = "New Transaction Alert"
     context = {
         "admin": admin,
@@ -29,11 +41,11 @@ def send_admin_new_transaction_email(admin, association, transaction):
         [admin.email],
     )
     email.attach_alternative(html_content, "text/html")
-    email.send(fail_silently=False)
+    return email
 
 
-def send_receipt_email(receipt):
-    """Email: Send receipt link to payer"""
+def build_receipt_email(receipt):
+    """Email: Receipt link for the payer"""
     transaction = receipt.transaction
     association = transaction.association
     current_year_short = str(datetime.now().year)[-2:]
@@ -51,7 +63,7 @@ def send_receipt_email(receipt):
         "association_logo": association.logo.url if association.logo else "",
         "association_no": association.admin.phone_number,
         "amount_paid": transaction.amount_paid,
-        "transaction_receipt_url": f"{settings.FRONTEND_URL}/transactions/receipt/{receipt.receipt_id}/",
+        "transaction_receipt_url": receipt.page_url,
     }
 
     message = render_to_string("transactions/receipt_template.html", context)
@@ -64,4 +76,84 @@ def send_receipt_email(receipt):
     )
 
     email.content_subtype = "html"
-    email.send(fail_silently=False)
+    attach_receipt_pdf(email, receipt)
+    return email
+
+
+def attach_receipt_pdf(email, receipt):
+    """Attach the PDF, storing it on the receipt the first time it's drawn."""
+    try:
+        data = pdf.render_receipt_pdf(receipt)
+    except Exception as error:
+        # The link in the body still works; don't hold the email back
+        logger.error("Receipt PDF for %s failed: %s", receipt.receipt_id, error)
+        return
+    email.attach(f"receipt-{receipt.receipt_no}.pdf", data, "application/pdf")
+    if not receipt.pdf_file:
+        try:
+            pdf.store_receipt_pdf(receipt, data)
+        except Exception as error:
+            logger.warning("Storing receipt PDF %s failed: %s", receipt.receipt_id, error)
+
+
+@outbox.handler(NEW_TRANSACTION_EMAIL)
+def new_transaction_email_from_outbox(payload):
+    transaction = (
+        Transaction.objects.select_related("association__admin", "payer")
+        .filter(pk=payload["transaction_id"])
+        .first()
+    )
+    if transaction is None or not transaction.association.admin.email:
+        return None
+    association = transaction.association
+    return build_admin_new_transaction_email(association.admin, association, transaction)
+
+
+def receipts_for_email():
+    return TransactionReceipt.objects.select_related(
+        "transaction__association__admin",
+        "transaction__payer",
+        "transaction__session",
+    )
+
+
+@outbox.handler(RECEIPT_EMAIL)
+def receipt_email_from_outbox(payload):
+    receipt = receipts_for_email().filter(pk=payload["receipt_id"]).first()
+    if receipt is None:
+        return None
+    return build_receipt_email(receipt)
+
+
+def session_receipts(session):
+    """Receipts of the session's verified transactions, oldest first."""
+    return TransactionReceipt.objects.filter(
+        transaction__session=session, transaction__is_verified=True
+    ).order_by("pk")
+
+
+def resend_session_receipts(session, batch_size=None, pause=None):
+    """
+    Email every receipt in ``session`` again now, over one connection.
+    Returns the ``send_bulk`` Counter of sent and failed receipts.
+    """
+    receipts = receipts_for_email().filter(
+        pk__in=session_receipts(session).values("pk")
+    )
+    return send_bulk(
+        receipts.order_by("pk").iterator(chunk_size=200),
+        build=build_receipt_email,
+        batch_size=batch_size,
+        pause=pause,
+    )
+
+
+def queue_session_receipts(session):
+    """Queue every receipt in ``session`` on the outbox for run_outbox to send."""
+    return outbox.enqueue_many(
+        RECEIPT_EMAIL,
+        (
+            {"receipt_id": pk}
+            for pk in session_receipts(session).values_list("pk", flat=True)
+        ),
+    )
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from transactions import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply pending payment provider webhook events in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=webhooks.BATCH_SIZE,
+            help="Events locked and processed per batch.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when nothing is pending.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process everything currently pending, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        try:
+            while True:
+                # Drop a dead or expired connection (CONN_MAX_AGE) before it
+                # stalls the inbox; never inside a caller's transaction
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                handled = webhooks.process_pending(options["batch_size"])
+                processed += handled
+                if handled:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} webhook event(s)."))
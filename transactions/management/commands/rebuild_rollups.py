@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from association.models import Session
+from transactions.models import SessionRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-session collection rollups from the transactions table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--session",
+            type=int,
+            action="append",
+            dest="session_ids",
+            help="Session id to rebuild. Can be repeated. Defaults to every session.",
+        )
+
+    def handle(self, *args, **options):
+        session_ids = options.get("session_ids")
+        sessions = Session.objects.all()
+        if session_ids:
+            sessions = sessions.filter(id__in=session_ids)
+            missing = set(session_ids) - set(sessions.values_list("id", flat=True))
+            if missing:
+                raise CommandError(
+                    f"No Session with id(s): {', '.join(map(str, sorted(missing)))}"
+                )
+
+        rebuilt = 0
+        for session_id in sessions.values_list("id", flat=True).iterator():
+            rollup = SessionRollup.rebuild(session_id)
+            rebuilt += 1
+            self.stdout.write(
+                f"session={session_id} total={rollup.total_count} "
+                f"verified={rollup.verified_count} pending={rollup.pending_count} "
+                f"collected={rollup.total_amount}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} session rollup(s)."))
@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from association.models import Session
+from transactions import pdf
+from transactions.models import TransactionReceipt
+
+
+def init_worker(logo_url):
+    # Forked children must open their own database connections
+    connections.close_all()
+    # Load fonts and the session's logo once per worker, not once per receipt
+    pdf.get_renderer().logo(logo_url)
+
+
+def render_one(receipt_pk):
+    """Render and store one receipt. Returns ``(pk, error or None)``."""
+    try:
+        receipt = TransactionReceipt.objects.get(pk=receipt_pk)
+        pdf.store_receipt_pdf(receipt)
+    except Exception as error:
+        return receipt_pk, f"{type(error).__name__}: {error}"
+    return receipt_pk, None
+
+
+class Command(BaseCommand):
+    help = "Render and store PDFs for every verified receipt in a session."
+
+    def add_arguments(self, parser):
+        parser.add_argument("session", type=int, help="Session id.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Rendering processes. 0 renders in this process.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render receipts that already have a PDF.",
+        )
+
+    def handle(self, *args, **options):
+        session = (
+            Session.objects.select_related("association")
+            .filter(pk=options["session"])
+            .first()
+        )
+        if session is None:
+            raise CommandError(f"No Session with id {options['session']}")
+
+        receipts = TransactionReceipt.objects.filter(
+            transaction__session=session, transaction__is_verified=True
+        )
+        if not options["all"]:
+            receipts = receipts.filter(pdf_file__isnull=True) | receipts.filter(
+                pdf_file=""
+            )
+        pks = list(receipts.order_by("pk").values_list("pk", flat=True))
+        logo_url = session.association.logo_url
+
+        if options["workers"] > 0 and len(pks) > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=init_worker,
+                initargs=(logo_url,),
+            ) as pool:
+                results = list(pool.map(render_one, pks, chunksize=8))
+        else:
+            pdf.get_renderer().logo(logo_url)
+            results = [render_one(pk) for pk in pks]
+
+        failed = [(pk, error) for pk, error in results if error]
+        for pk, error in failed:
+            self.stderr.write(f"receipt={pk} failed: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {len(results) - len(failed)} of {len(pks)} receipt PDF(s) "
+                f"for session {session.pk}."
+            )
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from transactions.models import TransactionReceipt
+
+
+class Command(BaseCommand):
+    help = "Render the stored public document for receipts issued without one."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Receipts rendered and saved per batch.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every receipt, not only those missing a document.",
+        )
+
+    def handle(self, *args, **options):
+        receipts = TransactionReceipt.objects.only("pk").order_by("pk")
+        if not options["all"]:
+            receipts = receipts.filter(document__isnull=True)
+
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(receipts.filter(pk__gt=last_pk)[: options["batch_size"]])
+            if not batch:
+                break
+            rendered += len(TransactionReceipt.render_documents(batch))
+            last_pk = batch[-1].pk
+            self.stdout.write(f"Rendered {rendered} receipt(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} receipt document(s)."))
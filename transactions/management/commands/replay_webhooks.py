@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import webhooks
+from transactions.models import WebhookEvent
+
+
+class Command(BaseCommand):
+    help = "Re-run webhook events that failed processing (or specific events by id)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event",
+            type=int,
+            action="append",
+            dest="event_ids",
+            help="WebhookEvent id to replay whatever its status. Can be repeated.",
+        )
+        parser.add_argument(
+            "--provider",
+            choices=[choice for choice, _ in WebhookEvent.PROVIDER_CHOICES],
+            help="Only replay failed events from this provider.",
+        )
+        parser.add_argument(
+            "--event-type",
+            help="Only replay failed events of this type, e.g. charge.success.",
+        )
+
+    def handle(self, *args, **options):
+        event_ids = options.get("event_ids")
+        if event_ids:
+            events = WebhookEvent.objects.filter(id__in=event_ids)
+            missing = set(event_ids) - set(events.values_list("id", flat=True))
+            if missing:
+                raise CommandError(
+                    f"No WebhookEvent with id(s): {', '.join(map(str, sorted(missing)))}"
+                )
+        else:
+            events = WebhookEvent.objects.filter(status=WebhookEvent.STATUS_FAILED)
+            if options.get("provider"):
+                events = events.filter(provider=options["provider"])
+            if options.get("event_type"):
+                events = events.filter(event_type=options["event_type"])
+
+        selected = list(events.values_list("id", flat=True))
+        webhooks.requeue(WebhookEvent.objects.filter(id__in=selected))
+
+        replayed = WebhookEvent.objects.filter(id__in=selected)
+        while webhooks.process_pending(queryset=replayed):
+            pass
+
+        counts = {
+            status: replayed.filter(status=status).count()
+            for status, _ in WebhookEvent.STATUS_CHOICES
+        }
+        self.stdout.write(
+            " ".join(f"{status}={n}" for status, n in counts.items() if n)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Replayed {len(selected)} webhook event(s).")
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from association.models import Session
+from transactions.emails import queue_session_receipts, resend_session_receipts
+
+
+class Command(BaseCommand):
+    help = "Email every verified receipt in a session to its payer again."
+
+    def add_arguments(self, parser):
+        parser.add_argument("session", type=int, help="Session id.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Messages sent between pauses. Defaults to MAIL_BATCH_SIZE.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=None,
+            help="Seconds between batches. Defaults to MAIL_BATCH_PAUSE.",
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Queue the emails on the outbox for run_outbox instead of sending now.",
+        )
+
+    def handle(self, *args, **options):
+        session = Session.objects.filter(pk=options["session"]).first()
+        if session is None:
+            raise CommandError(f"No Session with id {options['session']}")
+
+        if options["queue"]:
+            queued = queue_session_receipts(session)
+            self.stdout.write(self.style.SUCCESS(f"Queued {queued} receipt email(s)."))
+            return
+
+        counts = resend_session_receipts(
+            session, batch_size=options["batch_size"], pause=options["pause"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Sent {counts['sent']} receipt email(s).")
+        )
+        if counts["failed"]:
+            self.stderr.write(
+                f"{counts['failed']} receipt email(s) failed; see the log for which."
+            )
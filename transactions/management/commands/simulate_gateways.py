@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gateways.simulator import GatewaySimulator
+from transactions.chargeServices import get_webhook_secret
+from transactions.paystackServices import get_paystack_webhook_secret
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local Paystack/Korapay simulator. Point PAYSTACK_BASE_URL at "
+        "<url>/paystack and KORAPAY_BASE_URL at <url>/korapay."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8010)
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds added to every call."
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.0,
+            help="Up to this many extra random seconds per call.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of calls answered with a 503.",
+        )
+        parser.add_argument(
+            "--timeout-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of calls left hanging past the client's read timeout.",
+        )
+        parser.add_argument(
+            "--webhook-url",
+            default=f"{getattr(settings, 'BACKEND_URL', 'http://127.0.0.1:8000')}"
+            "/api/transactions/webhook/",
+        )
+        parser.add_argument(
+            "--webhook-rate",
+            type=float,
+            default=1.0,
+            help="Fraction of initialized charges that get a charge.success webhook.",
+        )
+        parser.add_argument(
+            "--webhook-delay",
+            type=float,
+            default=1.0,
+            help="Seconds between initializing a charge and its webhook.",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for repeatable runs.")
+
+    def handle(self, *args, **options):
+        paystack_secret = get_paystack_webhook_secret()
+        korapay_secret = get_webhook_secret()
+        if options["webhook_rate"] and not (paystack_secret and korapay_secret):
+            self.stderr.write(
+                "Webhook secrets are not configured; the app will reject "
+                "simulated webhooks."
+            )
+        simulator = GatewaySimulator(
+            paystack_secret=paystack_secret,
+            korapay_secret=korapay_secret,
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            timeout_rate=options["timeout_rate"],
+            webhook_url=options["webhook_url"] if options["webhook_rate"] else None,
+            webhook_rate=options["webhook_rate"],
+            webhook_delay=options["webhook_delay"],
+            seed=options["seed"],
+        )
+        server = simulator.make_server(options["host"], options["port"])
+        url = f"http://{options['host']}:{server.server_address[1]}"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Gateway simulator on {url} (paystack: {url}/paystack, "
+                f"korapay: {url}/korapay)"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("association", "0002_initial"),
+        ("transactions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SessionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_count", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("verified_count", models.PositiveIntegerField(default=0)),
+                (
+                    "verified_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("pending_count", models.PositiveIntegerField(default=0)),
+                (
+                    "pending_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "session",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollup",
+                        to="association.session",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_existing_items(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionLineItem = apps.get_model("transactions", "TransactionLineItem")
+    Through = Transaction.payment_items.through
+
+    batch = []
+    links = Through.objects.select_related("paymentitem").order_by("id")
+    for link in links.iterator(chunk_size=2000):
+        item = link.paymentitem
+        batch.append(
+            TransactionLineItem(
+                transaction_id=link.transaction_id,
+                payment_item_id=item.id,
+                title=item.title,
+                amount=item.amount,
+            )
+        )
+        if len(batch) >= 2000:
+            TransactionLineItem.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        TransactionLineItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0001_initial"),
+        ("transactions", "0002_sessionrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionLineItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=100)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "payment_item",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="line_items",
+                        to="payments.paymentitem",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="line_items",
+                        to="transactions.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:32
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of the main.search helpers as they were when this migration
+# was written, so later changes there can't alter what replaying it does
+TOKEN_SPLIT_RE = re.compile(r"[^0-9a-z@.]+")
+WHITESPACE_RE = re.compile(r"\s+")
+TOKEN_MAX_LENGTH = 100
+
+
+def normalize(*parts):
+    text = " ".join(str(part) for part in parts if part)
+    return WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def tokenize(text):
+    tokens = set()
+    for word in TOKEN_SPLIT_RE.split(normalize(text)):
+        word = word.strip(".")
+        if word:
+            tokens.add(word[:TOKEN_MAX_LENGTH])
+            if "@" in word:
+                tokens.update(
+                    piece[:TOKEN_MAX_LENGTH] for piece in word.split("@") if piece
+                )
+    return tokens
+
+
+def index_objects(schema_editor, SearchToken, kind, rows):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+    SearchToken.objects.filter(
+        kind=kind, object_id__in=[object_id for object_id, _ in rows]
+    ).delete()
+    SearchToken.objects.bulk_create(
+        [
+            SearchToken(kind=kind, object_id=object_id, token=token)
+            for object_id, text in rows
+            for token in tokenize(text)
+        ],
+        batch_size=2000,
+    )
+
+
+def backfill_search_text(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    SearchToken = apps.get_model("main", "SearchToken")
+
+    batch = []
+    transactions = Transaction.objects.select_related("payer").order_by("id")
+    for txn in transactions.iterator(chunk_size=2000):
+        txn.search_text = normalize(txn.reference_id, txn.payer.search_text)
+        batch.append(txn)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ["search_text"])
+            index_objects(
+                schema_editor,
+                SearchToken,
+                "transaction",
+                [(t.id, t.search_text) for t in batch],
+            )
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, ["search_text"])
+        index_objects(
+            schema_editor,
+            SearchToken,
+            "transaction",
+            [(t.id, t.search_text) for t in batch],
+        )
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS transaction_search_text_trgm "
+        "ON transactions_transaction USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS transaction_search_text_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payers", "0002_payer_search_text"),
+        ("transactions", "0003_transactionlineitem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:37
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_receipt_associations(apps, schema_editor):
+    """
+    Copy each receipt's association off its transaction, renumber receipts
+    that collided under the old max+1 scan, and seed one sequence row per
+    association with the highest number in use.
+    """
+    TransactionReceipt = apps.get_model("transactions", "TransactionReceipt")
+    ReceiptSequence = apps.get_model("transactions", "ReceiptSequence")
+
+    receipts = list(
+        TransactionReceipt.objects.select_related("transaction").order_by(
+            "issued_at", "id"
+        )
+    )
+    highest = defaultdict(int)
+    for receipt in receipts:
+        receipt.association_id = receipt.transaction.association_id
+        if receipt.receipt_no.isdigit():
+            number = int(receipt.receipt_no)
+            highest[receipt.association_id] = max(
+                highest[receipt.association_id], number
+            )
+
+    seen = defaultdict(set)
+    for receipt in receipts:
+        used = seen[receipt.association_id]
+        if not receipt.receipt_no.isdigit() or receipt.receipt_no in used:
+            highest[receipt.association_id] += 1
+            receipt.receipt_no = f"{highest[receipt.association_id]:05d}"
+        used.add(receipt.receipt_no)
+
+    TransactionReceipt.objects.bulk_update(
+        receipts, ["association", "receipt_no"], batch_size=2000
+    )
+    ReceiptSequence.objects.bulk_create(
+        ReceiptSequence(association_id=association_id, last_number=number)
+        for association_id, number in highest.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("association", "0002_initial"),
+        ("transactions", "0004_transaction_search_text"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReceiptSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_number", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "association",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="receipt_sequence",
+                        to="association.association",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="transactionreceipt",
+            name="association",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="receipts",
+                to="association.association",
+            ),
+        ),
+        migrations.RunPython(
+            backfill_receipt_associations, migrations.RunPython.noop
+        ),
+    ]
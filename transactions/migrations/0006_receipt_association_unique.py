@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("association", "0002_initial"),
+        ("transactions", "0005_receipt_sequence"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transactionreceipt",
+            name="association",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="receipts",
+                to="association.association",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="transactionreceipt",
+            constraint=models.UniqueConstraint(
+                fields=("association", "receipt_no"),
+                name="unique_receipt_no_per_association",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0007_webhookevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactionreceipt",
+            name="document",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="transactionreceipt",
+            name="document_etag",
+            field=models.CharField(blank=True, editable=False, max_length=66),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:20
+
+import cloudinary.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0008_receipt_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transactionreceipt",
+            name="pdf_file",
+            field=cloudinary.models.CloudinaryField(
+                blank=True, max_length=255, null=True, verbose_name="file"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("association", "0002_initial"),
+        ("payers", "0002_payer_search_text"),
+        ("payments", "0001_initial"),
+        ("transactions", "0009_receipt_pdf_file"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["payer", "is_verified"], name="transaction_payer_verified"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    # Every session gets its row up front, so the transaction signals only
+    # ever add to an existing row
+    Session = apps.get_model("association", "Session")
+    SessionRollup = apps.get_model("transactions", "SessionRollup")
+    Transaction = apps.get_model("transactions", "Transaction")
+
+    missing = Session.objects.filter(rollup__isnull=True).values_list("id", flat=True)
+    for session_id in list(missing):
+        totals = Transaction.objects.filter(session_id=session_id).aggregate(
+            total_count=Count("id"),
+            total_amount=Sum("amount_paid"),
+            verified_count=Count("id", filter=Q(is_verified=True)),
+            verified_amount=Sum("amount_paid", filter=Q(is_verified=True)),
+            pending_count=Count("id", filter=Q(is_verified=False)),
+            pending_amount=Sum("amount_paid", filter=Q(is_verified=False)),
+        )
+        SessionRollup.objects.create(
+            session_id=session_id,
+            **{name: value or 0 for name, value in totals.items()},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("association", "0002_initial"),
+        ("transactions", "0010_transaction_payer_verified_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,15 @@
+import hashlib
+import json
 import uuid
+from collections import defaultdict
 
 from cloudinary.models import CloudinaryField
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Cast
 
 from association.models import Association, Session
 from payers.models import Payer
@@ -10,6 +18,8 @@ from utils.utils import validate_file_type
 
 from .utils import generate_unique_reference_id
 
+REFERENCE_ID_MAX_ATTEMPTS = 5
+
 
 class Transaction(models.Model):
     payer = models.ForeignKey(
@@ -35,15 +45,58 @@ class Transaction(models.Model):
     session = models.ForeignKey(
         Session, on_delete=models.CASCADE, related_name="transactions"
     )
+    search_text = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # Per-payer totals in the payer list aggregate over this
+            models.Index(
+                fields=["payer", "is_verified"], name="transaction_payer_verified"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_rollup_state()
+        instance.snapshot_search_state()
+        return instance
+
+    def snapshot_search_state(self):
+        # search_text only depends on the immutable reference and the payer;
+        # payer renames push their own update (payers.signals)
+        self._search_state = (self.payer_id, self.search_text)
+
+    def snapshot_rollup_state(self):
+        # Remember what this row contributed to its session rollup so the
+        # next save/delete can apply just the difference
+        self._rollup_state = (self.session_id, self.is_verified, self.amount_paid)
 
     def save(self, *args, **kwargs):
         if not self.reference_id:
-            while True:
-                ref = generate_unique_reference_id()
-                if not Transaction.objects.filter(reference_id=ref).exists():
-                    self.reference_id = ref
-                    break
-        super().save(*args, **kwargs)
+            self.reference_id = generate_unique_reference_id()
+
+        attempts = 0
+        while True:
+            try:
+                # Keep the row and the session rollup update (post_save) in one
+                # DB transaction; the savepoint also makes a collision retryable
+                with db_transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                attempts += 1
+                # Only a reference collision on a new row is retried; that
+                # lookup runs on the failure path, never on a normal insert
+                if (
+                    not self._state.adding
+                    or attempts >= REFERENCE_ID_MAX_ATTEMPTS
+                    or not Transaction.objects.filter(
+                        reference_id=self.reference_id
+                    ).exists()
+                ):
+                    raise
+                self.reference_id = generate_unique_reference_id()
 
     def __str__(self):
         return f"Transaction {self.reference_id} by {self.payer}"
@@ -53,58 +106,214 @@ class Transaction(models.Model):
         return self.proof_of_payment.url if self.proof_of_payment else ""
 
 
+class TransactionLineItem(models.Model):
+    """What each payment item was charged at when the transaction was created."""
+
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.CASCADE, related_name="line_items"
+    )
+    payment_item = models.ForeignKey(
+        PaymentItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="line_items",
+    )
+    title = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.title} ({self.amount}) on {self.transaction_id}"
+
+    @classmethod
+    def snapshot(cls, transaction, payment_items, replace=False):
+        """
+        Record the items' titles and amounts as paid. ``replace`` drops the
+        transaction's earlier lines first, for when its items were changed.
+        """
+        if replace:
+            cls.objects.filter(transaction=transaction).delete()
+        lines = cls.objects.bulk_create(
+            cls(
+                transaction=transaction,
+                payment_item=item,
+                title=item.title,
+                amount=item.amount,
+            )
+            for item in payment_items
+        )
+        # Created already verified, so its receipt was issued before the lines
+        receipts = TransactionReceipt.objects.filter(transaction=transaction)
+        if transaction.is_verified and receipts.exists():
+            TransactionReceipt.render_documents(receipts)
+        return lines
+
+
+class ReceiptSequence(models.Model):
+    """Last receipt number handed out for an association."""
+
+    association = models.OneToOneField(
+        Association, on_delete=models.CASCADE, related_name="receipt_sequence"
+    )
+    last_number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Receipt sequence for {self.association} ({self.last_number})"
+
+    @classmethod
+    def allocate(cls, association_id, count=1):
+        """
+        Reserve ``count`` consecutive receipt numbers and return them as a range.
+
+        The sequence row is locked for the rest of the surrounding transaction,
+        so concurrent issuers for the same association queue up on it instead
+        of reading the same "last" number.
+        """
+        if count < 1:
+            return range(0)
+        with db_transaction.atomic():
+            cls.objects.get_or_create(
+                association_id=association_id,
+                defaults={"last_number": cls.highest_issued(association_id)},
+            )
+            sequence = cls.objects.select_for_update().get(
+                association_id=association_id
+            )
+            start = sequence.last_number + 1
+            cls.objects.filter(pk=sequence.pk).update(
+                last_number=F("last_number") + count
+            )
+        return range(start, start + count)
+
+    @staticmethod
+    def highest_issued(association_id):
+        # Only used to seed a missing sequence row
+        highest = TransactionReceipt.objects.filter(
+            association_id=association_id
+        ).aggregate(highest=Max(Cast("receipt_no", models.IntegerField())))["highest"]
+        return highest or 0
+
+
 # Transaction Receipt model
 class TransactionReceipt(models.Model):
     transaction = models.OneToOneField(
         Transaction, on_delete=models.CASCADE, related_name="receipt"
     )
+    association = models.ForeignKey(
+        Association,
+        on_delete=models.CASCADE,
+        related_name="receipts",
+        editable=False,
+    )
     receipt_id = models.CharField(
         default=uuid.uuid4, unique=True, editable=False, max_length=36
     )
     receipt_no = models.CharField(max_length=10, editable=False)
     issued_at = models.DateTimeField(auto_now_add=True)
+    # The public receipt payload, rendered once at issuance (see render_document)
+    document = models.JSONField(null=True, blank=True, editable=False)
+    document_etag = models.CharField(max_length=66, blank=True, editable=False)
+    # Rendered off the request path by transactions.pdf
+    pdf_file = CloudinaryField(
+        "file",
+        folder="Duespay/receipts",
+        resource_type="raw",
+        blank=True,
+        null=True,
+    )
 
     class Meta:
-        # Remove the constraint that uses lookup syntax
-        pass
+        constraints = [
+            models.UniqueConstraint(
+                fields=["association", "receipt_no"],
+                name="unique_receipt_no_per_association",
+            )
+        ]
+
+    @staticmethod
+    def format_number(number):
+        # 5-digit zero-padded, growing past 99999 if it ever has to
+        return f"{number:05d}"
 
     def save(self, *args, **kwargs):
-        if not self.receipt_no:
-            # Get the association from the related transaction
-            association = self.transaction.association
-
-            # Get the highest receipt number for this association
-            last_receipt = (
-                TransactionReceipt.objects.filter(transaction__association=association)
-                .order_by("-receipt_no")
-                .first()
+        if not self.association_id:
+            self.association_id = self.transaction.association_id
+
+        with db_transaction.atomic():
+            if not self.receipt_no:
+                number = ReceiptSequence.allocate(self.association_id)[0]
+                self.receipt_no = self.format_number(number)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def for_rendering(cls):
+        return cls.objects.select_related(
+            "transaction__payer", "transaction__association", "transaction__session"
+        ).prefetch_related("transaction__line_items")
+
+    def render_document(self):
+        """
+        Freeze the public payload and its ETag. A receipt never changes once
+        issued, so the detail view serves this instead of re-serializing.
+        """
+        from .serializers import TransactionReceiptDetailSerializer
+
+        body = json.dumps(
+            TransactionReceiptDetailSerializer(self).data,
+            cls=DjangoJSONEncoder,
+            sort_keys=True,
+        )
+        self.document = json.loads(body)
+        self.document_etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+        return self.document
+
+    @classmethod
+    def render_documents(cls, receipts):
+        """Render and store documents for ``receipts`` in one pass."""
+        rendered = list(cls.for_rendering().filter(pk__in=[r.pk for r in receipts]))
+        for receipt in rendered:
+            receipt.render_document()
+        cls.objects.bulk_update(rendered, ["document", "document_etag"])
+        return rendered
+
+    @classmethod
+    def issue_many(cls, transactions):
+        """
+        Create receipts for the given transactions that don't have one yet,
+        taking one block of numbers per association. Returns the new receipts.
+        """
+        transactions = {txn.pk: txn for txn in transactions}
+        issued = set(
+            cls.objects.filter(transaction_id__in=transactions).values_list(
+                "transaction_id", flat=True
             )
+        )
+        pending = defaultdict(list)
+        for pk, txn in transactions.items():
+            if pk not in issued:
+                pending[txn.association_id].append(txn)
 
-            if last_receipt:
-                # Extract the numeric part and increment
-                last_number = int(last_receipt.receipt_no)
-                new_number = last_number + 1
-            else:
-                # First receipt for this association
-                new_number = 1
-
-            # Format as 5-digit zero-padded string
-            self.receipt_no = f"{new_number:05d}"
-
-        super().save(*args, **kwargs)
-
-    def clean(self):
-        # Add validation to ensure uniqueness per association
-        if self.pk is None:  # Only for new instances
-            association = self.transaction.association
-            if TransactionReceipt.objects.filter(
-                transaction__association=association, receipt_no=self.receipt_no
-            ).exists():
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    "Receipt number already exists for this association"
+        receipts = []
+        with db_transaction.atomic():
+            # Lock sequences in a fixed order so bulk issuers can't deadlock
+            for association_id in sorted(pending):
+                batch = pending[association_id]
+                numbers = ReceiptSequence.allocate(association_id, len(batch))
+                receipts.extend(
+                    cls(
+                        transaction=txn,
+                        association_id=association_id,
+                        receipt_no=cls.format_number(number),
+                    )
+                    for txn, number in zip(batch, numbers)
                 )
+            receipts = cls.objects.bulk_create(receipts)
+            cls.render_documents(receipts)
+            return receipts
 
     def __str__(self):
         return f"Receipt {self.receipt_no} for {self.transaction.reference_id}"
@@ -112,3 +321,131 @@ class TransactionReceipt(models.Model):
     @property
     def pdf_file_url(self):
         return self.pdf_file.url if self.pdf_file else ""
+
+    @property
+    def page_url(self):
+        return f"{settings.FRONTEND_URL}/transactions/receipt/{self.receipt_id}/"
+
+
+class WebhookEvent(models.Model):
+    """A payment provider webhook delivery, stored as received."""
+
+    PROVIDER_PAYSTACK = "paystack"
+    PROVIDER_KORAPAY = "korapay"
+    PROVIDER_CHOICES = (
+        (PROVIDER_PAYSTACK, "Paystack"),
+        (PROVIDER_KORAPAY, "Korapay"),
+    )
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSED = "processed"
+    STATUS_IGNORED = "ignored"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_IGNORED, "Ignored"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES)
+    event_type = models.CharField(max_length=100, blank=True)
+    event_id = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "event_id"], name="unique_webhook_event"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "id"], name="webhookevent_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} ({self.status})"
+
+
+class SessionRollup(models.Model):
+    """Running collection totals per session, kept current by the transaction signals."""
+
+    session = models.OneToOneField(
+        Session, on_delete=models.CASCADE, related_name="rollup"
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    verified_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    pending_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Rollup for {self.session}"
+
+    @classmethod
+    def apply(cls, session_id, *, count=0, amount=0, verified=False, create_missing=True):
+        """Atomically add a transaction's contribution (negative to remove it)."""
+        if verified:
+            status_fields = {
+                "verified_count": F("verified_count") + count,
+                "verified_amount": F("verified_amount") + amount,
+            }
+        else:
+            status_fields = {
+                "pending_count": F("pending_count") + count,
+                "pending_amount": F("pending_amount") + amount,
+            }
+        rollup = cls.objects.filter(session_id=session_id)
+        updated = rollup.update(
+            total_count=F("total_count") + count,
+            total_amount=F("total_amount") + amount,
+            **status_fields,
+        )
+        if not updated and create_missing:
+            # Sessions get their row on creation; if it is missing anyway,
+            # create it empty and add to it, never recompute here: a
+            # concurrent first write would overwrite this one's count
+            cls.objects.get_or_create(session_id=session_id)
+            rollup.update(
+                total_count=F("total_count") + count,
+                total_amount=F("total_amount") + amount,
+                **status_fields,
+            )
+
+    @classmethod
+    def rebuild(cls, session_id):
+        """Recompute a session's rollup from its transactions."""
+        with db_transaction.atomic():
+            cls.objects.get_or_create(session_id=session_id)
+            # Holding the row lock makes concurrent apply() calls wait until
+            # these totals are written, and makes the aggregate below see
+            # every write that got the lock first
+            rollup = cls.objects.select_for_update().get(session_id=session_id)
+            totals = Transaction.objects.filter(session_id=session_id).aggregate(
+                total_count=Count("id"),
+                total_amount=Sum("amount_paid"),
+                verified_count=Count("id", filter=Q(is_verified=True)),
+                verified_amount=Sum("amount_paid", filter=Q(is_verified=True)),
+                pending_count=Count("id", filter=Q(is_verified=False)),
+                pending_amount=Sum("amount_paid", filter=Q(is_verified=False)),
+            )
+            for name, value in totals.items():
+                setattr(rollup, name, value or 0)
+            rollup.save()
+        return rollup
+
+    @classmethod
+    def for_session(cls, session):
+        try:
+            return cls.objects.get(session=session)
+        except cls.DoesNotExist:
+            return cls.rebuild(session.id)
@@ -0,0 +1,219 @@
+"""
+PDF receipts.
+
+A receipt PDF is drawn from the receipt's stored ``document`` (see
+``TransactionReceipt.render_document``), so rendering needs no joins. Fonts,
+paragraph styles and association logos are loaded once per process by
+``get_renderer()`` and reused for every receipt that process draws. Rendering
+happens off the request path: in ``run_outbox`` when the receipt email is
+built, and in bulk with ``manage.py render_receipt_pdfs``.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import qrcode
+import requests
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A5
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+# (label, document key) rows of the details block, top to bottom
+DETAIL_ROWS = [
+    ("Receipt No", "receipt_no"),
+    ("Session", "session_title"),
+    ("Reference", "transaction_reference_id"),
+    ("Payer", "payer_name"),
+    ("Level", "payer_level"),
+    ("Issued", "issued_at"),
+]
+
+LOGO_CACHE_SIZE = 64
+LOGO_TIMEOUT = (3.05, 10)
+
+
+class ReceiptRenderer:
+    page_size = A5
+    margin = 12 * mm
+
+    def __init__(self):
+        self.regular, self.bold = self.load_fonts()
+        self.logos = OrderedDict()
+        self.lock = threading.Lock()
+
+    def load_fonts(self):
+        """
+        ``RECEIPT_PDF_FONTS`` may point ``regular``/``bold`` at TTF files (for
+        the naira sign); otherwise the built-in Helvetica faces are used.
+        """
+        paths = getattr(settings, "RECEIPT_PDF_FONTS", {}) or {}
+        names = []
+        for style, fallback in (("regular", "Helvetica"), ("bold", "Helvetica-Bold")):
+            path = paths.get(style)
+            if path and os.path.exists(path):
+                name = f"Receipt-{style}"
+                pdfmetrics.registerFont(TTFont(name, path))
+                names.append(name)
+            else:
+                names.append(fallback)
+        return names
+
+    def logo(self, url):
+        """The association logo as an ``ImageReader``, fetched once per process."""
+        if not url:
+            return None
+        with self.lock:
+            if url in self.logos:
+                self.logos.move_to_end(url)
+                return self.logos[url]
+        try:
+            response = requests.get(url, timeout=LOGO_TIMEOUT)
+            response.raise_for_status()
+            image = ImageReader(BytesIO(response.content))
+        except Exception as error:
+            logger.warning("Receipt logo %s unavailable: %s", url, error)
+            image = None
+        with self.lock:
+            self.logos[url] = image
+            while len(self.logos) > LOGO_CACHE_SIZE:
+                self.logos.popitem(last=False)
+        return image
+
+    def qr_code(self, url):
+        image = qrcode.make(url, box_size=4, border=1)
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        buffer.seek(0)
+        return ImageReader(buffer)
+
+    def render(self, document, url=""):
+        """PDF bytes for one receipt ``document``."""
+        document = {
+            **document,
+            "payer_name": " ".join(
+                filter(
+                    None,
+                    [document.get("payer_first_name"), document.get("payer_last_name")],
+                )
+            ),
+        }
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=self.page_size)
+        pdf.setTitle(f"Receipt {document.get('receipt_no', '')}")
+        width, height = self.page_size
+        left, right = self.margin, width - self.margin
+
+        # Header band in the association's colour
+        try:
+            theme = colors.HexColor(document.get("association_theme_color") or "#9810fa")
+        except ValueError:
+            theme = colors.HexColor("#9810fa")
+        band = 30 * mm
+        pdf.setFillColor(theme)
+        pdf.rect(0, height - band, width, band, stroke=0, fill=1)
+        text_left = left
+        logo = self.logo(document.get("association_logo"))
+        if logo is not None:
+            size = 18 * mm
+            pdf.drawImage(
+                logo,
+                left,
+                height - band + (band - size) / 2,
+                size,
+                size,
+                preserveAspectRatio=True,
+                mask="auto",
+            )
+            text_left = left + size + 4 * mm
+        pdf.setFillColor(colors.white)
+        pdf.setFont(self.bold, 13)
+        pdf.drawString(
+            text_left, height - band / 2 + 2 * mm, document.get("association_name", "")
+        )
+        pdf.setFont(self.regular, 9)
+        pdf.drawString(text_left, height - band / 2 - 4 * mm, "Payment Receipt")
+
+        # Details
+        y = height - band - 12 * mm
+        for label, key in DETAIL_ROWS:
+            pdf.setFillColor(colors.grey)
+            pdf.setFont(self.regular, 9)
+            pdf.drawString(left, y, label)
+            pdf.setFillColor(colors.black)
+            pdf.setFont(self.bold, 9)
+            pdf.drawRightString(right, y, str(document.get(key) or "N/A"))
+            y -= 7 * mm
+
+        # Items
+        y -= 3 * mm
+        pdf.setStrokeColor(colors.lightgrey)
+        pdf.line(left, y + 4 * mm, right, y + 4 * mm)
+        pdf.setFont(self.bold, 10)
+        pdf.drawString(left, y - 2 * mm, "Items Paid")
+        y -= 9 * mm
+        pdf.setFont(self.regular, 9)
+        for title in document.get("items_paid") or []:
+            pdf.drawString(left + 3 * mm, y, f"- {title}")
+            y -= 6 * mm
+        pdf.line(left, y, right, y)
+        y -= 8 * mm
+        pdf.setFont(self.bold, 12)
+        pdf.drawString(left, y, "Amount Paid")
+        pdf.drawRightString(right, y, f"NGN {document.get('amount_paid', '')}")
+
+        # Verification QR code linking to the receipt page
+        if url:
+            size = 26 * mm
+            pdf.drawImage(self.qr_code(url), right - size, self.margin, size, size)
+            pdf.setFont(self.regular, 7)
+            pdf.setFillColor(colors.grey)
+            pdf.drawString(left, self.margin + 2 * mm, "Scan to verify this receipt.")
+
+        pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+
+
+_renderers = {}
+_lock = threading.Lock()
+
+
+def get_renderer():
+    """This process's renderer. Rebuilt after a fork, like gateway clients."""
+    pid = os.getpid()
+    renderer = _renderers.get(pid)
+    if renderer is None:
+        with _lock:
+            renderer = _renderers.get(pid)
+            if renderer is None:
+                renderer = _renderers[pid] = ReceiptRenderer()
+    return renderer
+
+
+def render_receipt_pdf(receipt):
+    """PDF bytes for ``receipt``, rendering its document first if needed."""
+    if receipt.document is None:
+        receipt.render_document()
+        receipt.save(update_fields=["document", "document_etag"])
+    return get_renderer().render(receipt.document, receipt.page_url)
+
+
+def store_receipt_pdf(receipt, data=None):
+    """Render (unless ``data`` is given) and upload the PDF to ``pdf_file``."""
+    data = data or render_receipt_pdf(receipt)
+    receipt.pdf_file = SimpleUploadedFile(
+        f"receipt-{receipt.receipt_id}.pdf", data, content_type="application/pdf"
+    )
+    receipt.save(update_fields=["pdf_file"])
+    return data
@@ -1,6 +1,7 @@
+from django.db import transaction as db_transaction
 from rest_framework import serializers
 
-from .models import Transaction, TransactionReceipt
+from .models import Transaction, TransactionLineItem, TransactionReceipt
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -18,7 +19,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ["payer_name", "payment_item", "payer_matric", "payer_email", "proof_of_payment_url"]
 
     def get_payment_item_titles(self, obj):
-        return [item.title for item in obj.payment_items.all()]
+        return [line.title for line in obj.line_items.all()]
 
     def get_payer_name(self, obj):
         return f"{obj.payer.first_name} {obj.payer.last_name}"
@@ -40,7 +41,21 @@ class TransactionSerializer(serializers.ModelSerializer):
                 )
             validated_data["session"] = session
 
-        return super().create(validated_data)
+        payment_items = validated_data.get("payment_items", [])
+        with db_transaction.atomic():
+            transaction = super().create(validated_data)
+            TransactionLineItem.snapshot(transaction, payment_items)
+        return transaction
+
+    def update(self, instance, validated_data):
+        with db_transaction.atomic():
+            transaction = super().update(instance, validated_data)
+            if "payment_items" in validated_data:
+                # Listings and receipts read the lines, not payment_items
+                TransactionLineItem.snapshot(
+                    transaction, validated_data["payment_items"], replace=True
+                )
+        return transaction
 
 
 class ProofAndTransactionSerializer(serializers.Serializer):
@@ -105,4 +120,4 @@ class TransactionReceiptDetailSerializer(serializers.ModelSerializer):
         return f"{association_short}/{receipt_no}/{current_year_short}"
 
     def get_items_paid(self, obj):
-        return [item.title for item in obj.transaction.payment_items.all()]
+        return [line.title for line in obj.transaction.line_items.all()]
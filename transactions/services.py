@@ -5,6 +5,10 @@ import re
 import google.generativeai as genai
 from decouple import config
 
+from main import metrics
+
+logger = logging.getLogger(__name__)
+
 
 class VerificationService:
     def __init__(self, proof_file, amount_paid, payment_items, bank_account):
@@ -46,13 +50,14 @@ class VerificationService:
                 image_part,
             ]
 
-            response = self.model.generate_content(prompt_parts)
+            with metrics.track_outbound("gemini", "generate_content"):
+                response = self.model.generate_content(prompt_parts)
             extracted_text = response.text
-            print(f"Extracted text: {extracted_text}")
+            logger.debug("Extracted text: %s", extracted_text)
             return extracted_text
 
         except Exception as e:
-            print(f"Error extracting text with Gemini API: {e}")
+            logger.warning("Error extracting text with Gemini API: %s", e)
             return ""
 
     def clean_amount(self, amount):
@@ -107,6 +112,3 @@ class VerificationService:
         # Add more checks as needed... beneficiary account number
 
         return True, "Proof verified successfully."
-
-
-logger = logging.getLogger(__name__)
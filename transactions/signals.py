@@ -1,45 +1,158 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .emails import send_admin_new_transaction_email, send_receipt_email
-from .models import Transaction, TransactionReceipt
+
+from association.models import Session
+from main import outbox, search
+from payers.models import Payer
+
+from . import status
+from .emails import NEW_TRANSACTION_EMAIL, RECEIPT_EMAIL
+from .models import SessionRollup, Transaction, TransactionReceipt
+
+logger = logging.getLogger(__name__)
+
+
+def search_state_changed(instance):
+    return getattr(instance, "_search_state", None) != (
+        instance.payer_id,
+        instance.search_text,
+    )
+
+
+@receiver(pre_save, sender=Transaction)
+def set_transaction_search_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None or not search_state_changed(instance):
+        return
+    if Transaction.payer.is_cached(instance):
+        payer_text = instance.payer.search_text or search.payer_search_text(
+            instance.payer
+        )
+    else:
+        # Only the payer's stored text is needed, not the whole row
+        payer_text = (
+            Payer.objects.filter(pk=instance.payer_id)
+            .values_list("search_text", flat=True)
+            .first()
+        )
+    instance.search_text = search.transaction_search_text(instance, payer_text or "")
 
 
 @receiver(post_save, sender=Transaction)
-def notify_admin_on_transaction(sender, instance, created, **kwargs):
+def sync_transaction_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None and search_state_changed(instance):
+        search.index_objects(
+            search.TRANSACTION, [(instance.pk, instance.search_text)]
+        )
+        instance.snapshot_search_state()
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_search_index(sender, instance, **kwargs):
+    search.unindex_object(search.TRANSACTION, instance.pk)
+
+
+@receiver(post_save, sender=Session)
+def create_session_rollup(sender, instance, created, **kwargs):
     if created:
-        association = instance.association
-        admin = association.admin
-        if admin.email:
-            send_admin_new_transaction_email(admin, association, instance)
+        SessionRollup.objects.get_or_create(session=instance)
 
 
 @receiver(post_save, sender=Transaction)
-def create_receipt_on_verification(sender, instance, created, **kwargs):
-    """Signal: Create and send receipt when transaction is verified"""
-    # Only proceed if transaction is verified
-    if instance.is_verified:
-        try:
-            # Get existing receipt or create new one
-            receipt, receipt_created = TransactionReceipt.objects.get_or_create(
-                transaction=instance
+def update_session_rollup(sender, instance, created, **kwargs):
+    """Move this transaction's contribution in the session rollup to its new state"""
+    previous = None if created else getattr(instance, "_rollup_state", None)
+    current = (instance.session_id, instance.is_verified, instance.amount_paid)
+
+    if previous != current:
+        if previous is not None:
+            session_id, is_verified, amount_paid = previous
+            SessionRollup.apply(
+                session_id,
+                count=-1,
+                amount=-amount_paid,
+                verified=is_verified,
+                create_missing=False,
             )
+        session_id, is_verified, amount_paid = current
+        SessionRollup.apply(
+            session_id, count=1, amount=amount_paid, verified=is_verified
+        )
 
-            # Always generate and send receipt (whether new or existing)
-            send_receipt_email(receipt)
+    instance.snapshot_rollup_state()
 
-            if receipt_created:
-                print(
-                    f"✅ New receipt created and sent for transaction {instance.reference_id}"
-                )
-            else:
-                print(
-                    f"✅ Existing receipt resent for transaction {instance.reference_id}"
-                )
 
-        except Exception as e:
-            import logging
+@receiver(post_delete, sender=Transaction)
+def remove_from_session_rollup(sender, instance, **kwargs):
+    session_id, is_verified, amount_paid = getattr(
+        instance,
+        "_rollup_state",
+        (instance.session_id, instance.is_verified, instance.amount_paid),
+    )
+    # Never recreate it here: during a session cascade the row is already gone
+    SessionRollup.apply(
+        session_id,
+        count=-1,
+        amount=-amount_paid,
+        verified=is_verified,
+        create_missing=False,
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def notify_admin_on_transaction(sender, instance, created, **kwargs):
+    if created:
+        # Sent by run_outbox once this transaction commits
+        outbox.enqueue(NEW_TRANSACTION_EMAIL, transaction_id=instance.pk)
 
-            logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=Transaction)
+def create_receipt_on_verification(sender, instance, created, **kwargs):
+    """Signal: Create receipt and queue its email when transaction is verified"""
+    if not instance.is_verified:
+        return
+    # Get existing receipt or create new one, and always queue its email
+    # (whether new or existing) before anything optional can go wrong
+    receipt, receipt_created = TransactionReceipt.objects.get_or_create(
+        transaction=instance
+    )
+    outbox.enqueue(RECEIPT_EMAIL, receipt_id=receipt.pk)
+    logger.info(
+        "Receipt %s and queued for transaction %s",
+        "created" if receipt_created else "requeued",
+        instance.reference_id,
+    )
+
+    if receipt.document is None:
+        try:
+            # A savepoint, so a failed render can't break the verification
+            # transaction; the receipt page renders it on first view instead
+            with transaction.atomic():
+                TransactionReceipt.render_documents([receipt])
+        except Exception as e:
             logger.error(
-                f"Failed to process receipt for transaction {instance.reference_id}: {str(e)}"
+                "Failed to render receipt document for transaction %s: %s",
+                instance.reference_id,
+                e,
             )
+
+
+@receiver(post_save, sender=Transaction)
+def publish_verified_status(sender, instance, created, update_fields=None, **kwargs):
+    """Wake checkout pages waiting on this reference (see transactions.status)"""
+    if not instance.is_verified:
+        return
+    if update_fields is not None and "is_verified" not in update_fields:
+        return
+    receipt_id = (
+        TransactionReceipt.objects.filter(transaction=instance)
+        .values_list("receipt_id", flat=True)
+        .first()
+    )
+    payload = status.status_payload(
+        instance.reference_id, instance.is_verified, instance.amount_paid, receipt_id
+    )
+    # Only announce the payment once other workers can read it too
+    transaction.on_commit(lambda: status.publish(instance.reference_id, payload))
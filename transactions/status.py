@@ -0,0 +1,183 @@
+"""
+Payment status notifications for the post-checkout page.
+
+Instead of polling ``PaymentStatusView``, the page can park one request on
+``payment/status/<reference>/wait/`` (long-poll) or ``.../events/`` (SSE)
+until webhook processing verifies the transaction. Verification publishes
+the status through the channel named by ``PAYMENT_STATUS_CHANNEL``:
+
+- ``DatabaseChannel`` (default without a shared cache) ignores publishes and
+  re-reads the transaction every ``PAYMENT_STATUS_POLL_INTERVAL`` seconds,
+  so it works across every worker and ``process_webhooks`` out of the box.
+- ``CacheChannel`` (default when ``REDIS_URL`` configures a shared cache)
+  stores the status under the reference in the cache ``PAYMENT_STATUS_CACHE``
+  and waiters re-check that key. It only works across processes when that
+  cache is shared by all of them; a per-process LocMemCache never wakes them.
+- ``LocalChannel`` wakes waiters in the same process directly; for
+  single-process setups and development.
+
+Published statuses are kept for ``PAYMENT_STATUS_TTL`` seconds, so a waiter
+that subscribes just after the publish still sees it. Waiters hold their
+request open, so the endpoints are only served when
+``PAYMENT_STATUS_LONG_POLL`` is on, which needs an ASGI server.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+STATUS_PREFIX = "payment-status"
+
+
+def status_payload(reference_id, is_verified, amount_paid, receipt_id=None):
+    return {
+        "exists": True,
+        "reference_id": reference_id,
+        "is_verified": is_verified,
+        "amount_paid": str(amount_paid),
+        "receipt_id": str(receipt_id) if receipt_id else None,
+    }
+
+
+def status_ttl():
+    return getattr(settings, "PAYMENT_STATUS_TTL", 600)
+
+
+async def load_status(reference_id):
+    from .models import Transaction
+
+    row = (
+        await Transaction.objects.filter(reference_id=reference_id)
+        .values_list(
+            "reference_id", "is_verified", "amount_paid", "receipt__receipt_id"
+        )
+        .afirst()
+    )
+    if row is None:
+        return {"exists": False}
+    return status_payload(*row)
+
+
+class DatabaseChannel:
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(
+            settings, "PAYMENT_STATUS_POLL_INTERVAL", 1.0
+        )
+
+    def publish(self, reference, payload):
+        # The committed transaction row is the message
+        pass
+
+    async def wait(self, reference, timeout):
+        """The verified status, or ``None`` once ``timeout`` seconds pass."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.poll_interval, remaining))
+            payload = await load_status(reference)
+            if payload.get("is_verified"):
+                return payload
+
+
+class CacheChannel:
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or getattr(
+            settings, "PAYMENT_STATUS_POLL_INTERVAL", 0.5
+        )
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "PAYMENT_STATUS_CACHE", "default")]
+
+    def key(self, reference):
+        return f"{STATUS_PREFIX}:{reference}"
+
+    def publish(self, reference, payload):
+        self.cache.set(self.key(reference), payload, status_ttl())
+
+    async def wait(self, reference, timeout):
+        """The published status, or ``None`` once ``timeout`` seconds pass."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            payload = await self.cache.aget(self.key(reference))
+            remaining = deadline - loop.time()
+            if payload is not None or remaining <= 0:
+                return payload
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+
+class LocalChannel:
+    def __init__(self):
+        self.recent = TTLCache(maxsize=10_000, ttl=status_ttl())
+        self.waiters = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, reference, payload):
+        with self.lock:
+            self.recent[reference] = payload
+            waiters = self.waiters.pop(reference, ())
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, payload)
+
+    async def wait(self, reference, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self.lock:
+            payload = self.recent.get(reference)
+            if payload is not None:
+                return payload
+            self.waiters[reference].add(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self.lock:
+                waiters = self.waiters.get(reference)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self.waiters[reference]
+
+
+def _resolve(future, payload):
+    if not future.done():
+        future.set_result(payload)
+
+
+_channel = None
+_channel_lock = threading.Lock()
+
+
+def get_channel():
+    global _channel
+    if _channel is None:
+        with _channel_lock:
+            if _channel is None:
+                path = getattr(
+                    settings,
+                    "PAYMENT_STATUS_CHANNEL",
+                    "transactions.status.DatabaseChannel",
+                )
+                _channel = import_string(path)()
+    return _channel
+
+
+def reset_channel():
+    global _channel
+    with _channel_lock:
+        _channel = None
+
+
+def publish(reference, payload):
+    get_channel().publish(reference, payload)
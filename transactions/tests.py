@@ -1 +1,1335 @@
-# Create your tests here.
+import asyncio
+import csv
+import hashlib
+import hmac
+import io
+import json
+import re
+import secrets
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
+
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from cloudinary import CloudinaryResource
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from gateways import KorapayClient, korapay, paystack, reset_clients
+from gateways.simulator import KORAPAY, PAYSTACK, GatewaySimulator
+from main.models import AdminUser, OutboxMessage
+from main.outbox import deliver_batch
+from payers.models import Payer
+from payments.bankServices import VerifyBankService
+from utils.exports import iter_xlsx
+from utils.testing import (
+    QueryBudgetMixin,
+    api_client,
+    grow,
+    make_payment_items,
+    make_session,
+    make_transaction,
+    seed_association,
+)
+
+from . import pdf
+from .chargeServices import korapay_payout_bank
+from .emails import NEW_TRANSACTION_EMAIL, RECEIPT_EMAIL, receipt_email_from_outbox
+from .models import (
+    ReceiptSequence,
+    SessionRollup,
+    Transaction,
+    TransactionLineItem,
+    TransactionReceipt,
+    WebhookEvent,
+)
+from .paystackServices import is_valid_paystack_signature, paystack_init_charge
+from .status import (
+    CacheChannel,
+    DatabaseChannel,
+    LocalChannel,
+    publish,
+    reset_channel,
+)
+from .utils import generate_unique_reference_id
+from .webhooks import process_pending
+
+REFERENCE_RE = re.compile(r"^TX-\d{4}-\d{3}-[A-Z]{2}$")
+
+
+class SessionRollupTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        self.admin = scenario.admin
+        self.association, self.session = scenario.association, scenario.session
+        self.payer = scenario.payers[0]
+
+    def create(self, amount="2500.00", verified=False, session=None):
+        return Transaction.objects.create(
+            payer=self.payer,
+            association=self.association,
+            session=session or self.session,
+            amount_paid=Decimal(amount),
+            is_verified=verified,
+        )
+
+    def assertRollup(self, session, **expected):
+        rollup = SessionRollup.objects.get(session=session)
+        actual = {name: getattr(rollup, name) for name in expected}
+        self.assertEqual(actual, expected)
+
+    def test_new_session_gets_an_empty_rollup(self):
+        self.assertRollup(self.session, total_count=0, total_amount=Decimal("0"))
+
+    def test_signals_track_create_verify_amount_and_delete(self):
+        pending = self.create("1000.00")
+        verified = self.create("2500.00", verified=True)
+        self.assertRollup(
+            self.session,
+            total_count=2,
+            total_amount=Decimal("3500.00"),
+            verified_count=1,
+            verified_amount=Decimal("2500.00"),
+            pending_count=1,
+            pending_amount=Decimal("1000.00"),
+        )
+
+        pending.is_verified = True
+        pending.amount_paid = Decimal("1200.00")
+        pending.save()
+        self.assertRollup(
+            self.session,
+            total_count=2,
+            total_amount=Decimal("3700.00"),
+            verified_count=2,
+            verified_amount=Decimal("3700.00"),
+            pending_count=0,
+            pending_amount=Decimal("0.00"),
+        )
+
+        verified.delete()
+        self.assertRollup(
+            self.session,
+            total_count=1,
+            verified_count=1,
+            verified_amount=Decimal("1200.00"),
+        )
+
+    def test_moving_between_sessions(self):
+        other = make_session(self.association, current=False)
+        txn = self.create("500.00")
+        txn.session = other
+        txn.save()
+        self.assertRollup(self.session, total_count=0, pending_count=0)
+        self.assertRollup(other, total_count=1, pending_amount=Decimal("500.00"))
+
+    def test_missing_row_is_recreated_and_added_to(self):
+        SessionRollup.objects.filter(session=self.session).delete()
+        self.create("500.00")
+        self.create("700.00")
+        self.assertRollup(self.session, total_count=2, total_amount=Decimal("1200.00"))
+
+    def test_rebuild_command_repairs_drift(self):
+        self.create("1000.00", verified=True)
+        self.create("400.00")
+        SessionRollup.objects.filter(session=self.session).update(
+            total_count=99, verified_amount=0
+        )
+        out = StringIO()
+        call_command("rebuild_rollups", session_ids=[self.session.pk], stdout=out)
+        self.assertIn("Rebuilt 1 session rollup(s).", out.getvalue())
+        self.assertRollup(
+            self.session,
+            total_count=2,
+            total_amount=Decimal("1400.00"),
+            verified_amount=Decimal("1000.00"),
+            pending_amount=Decimal("400.00"),
+        )
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", session_ids=[0], stdout=StringIO())
+
+    def test_dashboard_reads_the_rollup(self):
+        self.create("1000.00", verified=True)
+        response = api_client(self.admin).get("/api/transactions/")
+        meta = response.json()["data"]["meta"]
+        self.assertEqual(meta["total_transactions"], 1)
+        self.assertEqual(meta["completed_payments"], 1)
+        self.assertEqual(meta["total_collections"], 1000.0)
+
+    def test_filtered_dashboard_totals_follow_the_filters(self):
+        self.create("1000.00", verified=True)
+        self.create("400.00")
+        self.create("300.00")
+        client = api_client(self.admin)
+
+        meta = client.get("/api/transactions/", {"status": "unverified"}).json()[
+            "data"
+        ]["meta"]
+        self.assertEqual(meta["total_transactions"], 2)
+        self.assertEqual(meta["completed_payments"], 0)
+        self.assertEqual(meta["pending_payments"], 2)
+        self.assertEqual(meta["total_collections"], 700.0)
+
+        meta = client.get("/api/transactions/", {"status": "verified"}).json()[
+            "data"
+        ]["meta"]
+        self.assertEqual(meta["total_transactions"], 1)
+        self.assertEqual(meta["percent_completed"], "100.0%")
+        self.assertEqual(meta["total_collections"], 1000.0)
+
+
+XLSX_NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_xlsx(content):
+    """Rows of the first sheet as lists of strings, parsed with zipfile."""
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        names = set(archive.namelist())
+        assert {"[Content_Types].xml", "xl/workbook.xml"} <= names
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    return [
+        [
+            "".join(cell.itertext())
+            for cell in row.findall("x:c", XLSX_NS)
+        ]
+        for row in sheet.iterfind("x:sheetData/x:row", XLSX_NS)
+    ]
+
+
+def read_csv(content):
+    return list(csv.reader(io.StringIO(content.decode("utf-8-sig"))))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, items=1, transactions_per_payer=0)
+        self.association, self.session = scenario.association, scenario.session
+        self.item = scenario.items[0]
+        self.client = api_client(scenario.admin)
+        self.tricky = Payer.objects.create(
+            association=self.association,
+            session=self.session,
+            first_name="=HYPERLINK(\"http://evil\")",
+            last_name="Ọláníyàn <&> \"Jr\"",
+            email="tricky@example.com",
+            phone_number="08033333333",
+            matric_number="+CSC/001\x0b",
+        )
+        self.plain = scenario.payers[0]
+        self.verified = make_transaction(self.tricky, [self.item], verified=True)
+        self.pending = make_transaction(self.plain, [self.item], verified=False)
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_transactions_csv(self):
+        response, content = self.export("/api/transactions/export/")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn(".csv", response["Content-Disposition"])
+        header, *rows = read_csv(content)
+        self.assertEqual(
+            header,
+            [
+                "Reference ID",
+                "First Name",
+                "Last Name",
+                "Matric Number",
+                "Email",
+                "Level",
+                "Amount Paid",
+                "Verified",
+                "Items Paid",
+                "Submitted At",
+            ],
+        )
+        by_reference = {row[0]: row for row in rows}
+        self.assertEqual(len(rows), 2)
+        row = by_reference[self.verified.reference_id]
+        # Formula-looking cells are neutralised; other text survives as is
+        self.assertEqual(row[1], "'=HYPERLINK(\"http://evil\")")
+        self.assertEqual(row[2], "Ọláníyàn <&> \"Jr\"")
+        self.assertEqual(row[3], "'+CSC/001\x0b")
+        self.assertEqual(row[6], str(self.verified.amount_paid))
+        self.assertEqual(row[7], "Yes")
+        self.assertEqual(row[8], self.item.title)
+
+    def test_transactions_xlsx(self):
+        response, content = self.export(
+            "/api/transactions/export/", file_format="xlsx"
+        )
+        self.assertEqual(
+            response["Content-Type"],
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        header, *rows = read_xlsx(content)
+        self.assertEqual(header[0], "Reference ID")
+        row = {row[0]: row for row in rows}[self.verified.reference_id]
+        # XML specials are escaped, unicode kept, control characters dropped
+        self.assertEqual(row[1], "=HYPERLINK(\"http://evil\")")
+        self.assertEqual(row[2], "Ọláníyàn <&> \"Jr\"")
+        self.assertEqual(row[3], "+CSC/001")
+        self.assertEqual(row[6], str(self.verified.amount_paid))
+
+    def test_transaction_filters_apply(self):
+        _, content = self.export("/api/transactions/export/", status="unverified")
+        self.assertEqual(
+            [row[0] for row in read_csv(content)[1:]], [self.pending.reference_id]
+        )
+        _, content = self.export(
+            "/api/transactions/export/", search="tricky@"
+        )
+        self.assertEqual(
+            [row[0] for row in read_csv(content)[1:]], [self.verified.reference_id]
+        )
+
+    def test_payers_export(self):
+        _, content = self.export("/api/payers/export/", file_format="xlsx")
+        header, *rows = read_xlsx(content)
+        self.assertEqual(header[:3], ["First Name", "Last Name", "Matric Number"])
+        self.assertEqual(len(rows), 2)
+
+        _, content = self.export("/api/payers/export/", search=self.plain.email)
+        header, *rows = read_csv(content)
+        self.assertEqual(header[3], "Email")
+        self.assertEqual([row[3] for row in rows], [self.plain.email])
+
+    def test_payers_export_skips_the_totals(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.export("/api/payers/export/")
+        exported = [
+            query["sql"] for query in queries if 'FROM "payers_payer"' in query["sql"]
+        ]
+        self.assertEqual(len(exported), 1)
+        self.assertNotIn("GROUP BY", exported[0])
+
+        # Filtering on the totals still joins them in
+        _, content = self.export("/api/payers/export/", paid="true")
+        self.assertEqual(
+            [row[3] for row in read_csv(content)[1:]], [self.tricky.email]
+        )
+
+    def test_large_xlsx_streams_in_chunks(self):
+        rows = ([n, secrets.token_hex(16)] for n in range(5000))
+        chunks = list(iter_xlsx(["N", "Label"], rows, flush_every=500))
+        # Parts, sheet body pieces as they fill, then the central directory
+        self.assertGreater(len(chunks), 3)
+        parsed = read_xlsx(b"".join(chunks))
+        self.assertEqual(len(parsed), 5001)
+        self.assertEqual(parsed[-1][0], "4999")
+
+
+class ReferenceAllocatorTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        self.association, self.session = scenario.association, scenario.session
+        self.payer = scenario.payers[0]
+
+    def build(self, **kwargs):
+        return Transaction(
+            payer=self.payer,
+            association=self.association,
+            session=self.session,
+            amount_paid=Decimal("2500.00"),
+            **kwargs,
+        )
+
+    def test_reference_shape(self):
+        for _ in range(200):
+            self.assertRegex(generate_unique_reference_id(), REFERENCE_RE)
+
+    def test_insert_does_not_pre_check_reference(self):
+        txn = self.build()
+        txn.save()
+        self.assertRegex(txn.reference_id, REFERENCE_RE)
+        self.assertFalse(
+            Transaction.objects.exclude(pk=txn.pk)
+            .filter(reference_id=txn.reference_id)
+            .exists()
+        )
+
+    def test_colliding_reference_is_reallocated(self):
+        existing = self.build()
+        existing.save()
+
+        with mock.patch(
+            "transactions.models.generate_unique_reference_id",
+            return_value="TX-0000-000-AA",
+        ):
+            txn = self.build(reference_id=existing.reference_id)
+            txn.save()
+
+        self.assertEqual(txn.reference_id, "TX-0000-000-AA")
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_gives_up_after_repeated_collisions(self):
+        existing = self.build()
+        existing.save()
+
+        with mock.patch(
+            "transactions.models.generate_unique_reference_id",
+            return_value=existing.reference_id,
+        ):
+            with self.assertRaises(IntegrityError):
+                self.build(reference_id=existing.reference_id).save()
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "needs a database with concurrent writers"
+)
+class ConcurrentInitiationTests(TransactionTestCase):
+    payments = 2000
+    workers = 16
+
+    def test_parallel_initiations_get_unique_references(self):
+        scenario = seed_association(
+            payers=self.workers, items=1, transactions_per_payer=0
+        )
+        association, session = scenario.association, scenario.session
+        item, payers = scenario.items[0], scenario.payers
+        SessionRollup.rebuild(session.id)
+
+        # A small reference space forces real collisions between workers
+        pool = [f"TX-{n:04d}-{n % 1000:03d}-AA" for n in range(self.payments * 5)]
+
+        def small_space_reference():
+            return secrets.choice(pool)
+
+        def initiate(n):
+            client = APIClient()
+            try:
+                response = client.post(
+                    "/api/transactions/payment/initiate/",
+                    {
+                        "payer_id": payers[n % self.workers].id,
+                        "association_id": association.id,
+                        "session_id": session.id,
+                        "payment_item_ids": [item.id],
+                    },
+                    format="json",
+                )
+                return response.status_code
+            finally:
+                connections.close_all()
+
+        reference_field = Transaction._meta.get_field("reference_id")
+        paystack_ok = {"status": True, "data": {"authorization_url": "http://pay"}}
+        # Patch both the field default (first draw) and the retry path
+        with mock.patch.object(
+            reference_field, "_get_default", small_space_reference
+        ), mock.patch(
+            "transactions.models.generate_unique_reference_id",
+            side_effect=small_space_reference,
+        ), mock.patch(
+            "transactions.views.paystack_init_charge", return_value=paystack_ok
+        ):
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                statuses = list(executor.map(initiate, range(self.payments)))
+
+        self.assertEqual(statuses.count(201), self.payments)
+        references = list(Transaction.objects.values_list("reference_id", flat=True))
+        self.assertEqual(len(references), self.payments)
+        self.assertEqual(len(set(references)), self.payments)
+        rollup = SessionRollup.objects.get(session=session)
+        self.assertEqual(rollup.total_count, self.payments)
+
+
+class LineItemSnapshotTests(TestCase):
+    def setUp(self):
+        self.scenario = seed_association(payers=1, items=2, transactions_per_payer=0)
+        self.payer = self.scenario.payers[0]
+
+    def test_failed_snapshot_leaves_no_transaction(self):
+        with mock.patch.object(
+            TransactionLineItem, "snapshot", side_effect=RuntimeError("boom")
+        ), self.assertRaises(RuntimeError):
+            APIClient().post(
+                "/api/transactions/payment/initiate/",
+                {
+                    "payer_id": self.payer.id,
+                    "association_id": self.scenario.association.id,
+                    "session_id": self.scenario.session.id,
+                    "payment_item_ids": [item.id for item in self.scenario.items],
+                },
+                format="json",
+            )
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_changing_items_replaces_lines(self):
+        first, second = self.scenario.items
+        txn = make_transaction(self.payer, [first])
+        response = api_client(self.scenario.admin).patch(
+            f"/api/transactions/{txn.pk}/",
+            {"payment_items": [second.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(txn.line_items.values_list("title", flat=True)), [second.title]
+        )
+        self.assertEqual(response.json()["data"]["payment_item_titles"], [second.title])
+
+
+class ReceiptSequenceTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        self.admin = scenario.admin
+        self.association, self.session = scenario.association, scenario.session
+        self.payer = scenario.payers[0]
+
+    def create_transaction(self, **kwargs):
+        return Transaction.objects.create(
+            payer=self.payer,
+            association=self.association,
+            session=self.session,
+            amount_paid=Decimal("2500.00"),
+            **kwargs,
+        )
+
+    def test_verification_issues_consecutive_numbers(self):
+        first = self.create_transaction(is_verified=True)
+        second = self.create_transaction(is_verified=True)
+        self.assertEqual(first.receipt.receipt_no, "00001")
+        self.assertEqual(second.receipt.receipt_no, "00002")
+        self.assertEqual(first.receipt.association, self.association)
+        self.assertEqual(
+            ReceiptSequence.objects.get(association=self.association).last_number, 2
+        )
+
+    def test_emails_are_queued_not_sent(self):
+        txn = self.create_transaction(is_verified=True)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list("kind", "payload")),
+            [
+                (NEW_TRANSACTION_EMAIL, {"transaction_id": txn.pk}),
+                (RECEIPT_EMAIL, {"receipt_id": txn.receipt.pk}),
+            ],
+        )
+
+        counts = deliver_batch()
+        self.assertEqual(counts[OutboxMessage.STATUS_SENT], 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted([self.admin.email, self.payer.email]),
+        )
+
+    def test_numbers_are_counted_numerically(self):
+        ReceiptSequence.objects.create(association=self.association, last_number=99999)
+        receipt = TransactionReceipt.objects.create(
+            transaction=self.create_transaction()
+        )
+        self.assertEqual(receipt.receipt_no, "100000")
+
+    def test_missing_sequence_is_seeded_from_issued_receipts(self):
+        TransactionReceipt.objects.create(transaction=self.create_transaction())
+        ReceiptSequence.objects.all().delete()
+        self.assertEqual(
+            list(ReceiptSequence.allocate(self.association.id, 2)), [2, 3]
+        )
+
+    def test_issue_many_takes_one_block(self):
+        transactions = [self.create_transaction() for _ in range(3)]
+        TransactionReceipt.objects.create(transaction=transactions[0])
+
+        receipts = TransactionReceipt.issue_many(transactions)
+
+        self.assertEqual([r.receipt_no for r in receipts], ["00002", "00003"])
+        self.assertEqual(TransactionReceipt.issue_many(transactions), [])
+
+    def test_receipt_numbers_are_unique_per_association(self):
+        first = TransactionReceipt.objects.create(
+            transaction=self.create_transaction()
+        )
+        with self.assertRaises(IntegrityError):
+            TransactionReceipt.objects.create(
+                transaction=self.create_transaction(), receipt_no=first.receipt_no
+            )
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "needs a database with concurrent writers"
+)
+class ConcurrentReceiptTests(TransactionTestCase):
+    receipts = 200
+    workers = 16
+
+    def test_parallel_issuers_get_distinct_numbers(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        association, session = scenario.association, scenario.session
+        payer = scenario.payers[0]
+        transactions = [
+            Transaction.objects.create(
+                payer=payer,
+                association=association,
+                session=session,
+                amount_paid=Decimal("2500.00"),
+            )
+            for _ in range(self.receipts)
+        ]
+
+        def issue(txn):
+            try:
+                return TransactionReceipt.objects.create(transaction=txn).receipt_no
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            numbers = list(executor.map(issue, transactions))
+
+        self.assertEqual(
+            sorted(numbers), [f"{n:05d}" for n in range(1, self.receipts + 1)]
+        )
+
+
+@override_settings(PAYSTACK_WEBHOOK_SECRET="ps-secret", KORAPAY_WEBHOOK_SECRET="kp-secret")
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        self.txn = Transaction.objects.create(
+            payer=scenario.payers[0],
+            association=scenario.association,
+            session=scenario.session,
+            amount_paid=Decimal("2500.00"),
+        )
+        self.client = APIClient()
+
+    def post_paystack(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        signature = hmac.new(b"ps-secret", body, hashlib.sha512).hexdigest()
+        return self.client.generic(
+            "POST",
+            "/api/transactions/webhook/",
+            body,
+            content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def post_korapay(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        signature = hmac.new(b"kp-secret", body, hashlib.sha256).hexdigest()
+        return self.client.generic(
+            "POST",
+            "/api/transactions/webhook/",
+            body,
+            content_type="application/json",
+            HTTP_X_KORAPAY_SIGNATURE=signature,
+        )
+
+    def charge_success(self, **data):
+        return {
+            "event": "charge.success",
+            "data": {"id": 91, "reference": self.txn.reference_id, **data},
+        }
+
+    def test_delivery_is_stored_and_acked_without_processing(self):
+        response = self.post_paystack(self.charge_success(amount=250000))
+        self.assertEqual(response.status_code, 200)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.event_id, "charge.success:91")
+        self.assertEqual(event.status, WebhookEvent.STATUS_PENDING)
+        self.txn.refresh_from_db()
+        self.assertFalse(self.txn.is_verified)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.client.post(
+            "/api/transactions/webhook/",
+            self.charge_success(amount=250000),
+            format="json",
+            HTTP_X_PAYSTACK_SIGNATURE="nope",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_retried_delivery_is_deduplicated(self):
+        for _ in range(3):
+            self.assertEqual(
+                self.post_paystack(self.charge_success(amount=250000)).status_code, 200
+            )
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_worker_verifies_charge_once(self):
+        self.post_paystack(self.charge_success(amount=260000))
+        self.assertEqual(process_pending(), 1)
+
+        self.txn.refresh_from_db()
+        self.assertTrue(self.txn.is_verified)
+        self.assertEqual(self.txn.amount_paid, Decimal("2600.00"))
+        self.assertEqual(
+            WebhookEvent.objects.get().status, WebhookEvent.STATUS_PROCESSED
+        )
+        self.assertEqual(process_pending(), 0)
+
+        # Running the handler again is a no-op
+        call_command(
+            "replay_webhooks",
+            event_ids=[WebhookEvent.objects.get().pk],
+            stdout=StringIO(),
+        )
+        self.assertEqual(TransactionReceipt.objects.count(), 1)
+
+    def test_korapay_charge_success(self):
+        self.post_korapay(
+            {
+                "event": "charge.success",
+                "data": {
+                    "reference": self.txn.reference_id,
+                    "amount": "2500.00",
+                    "status": "success",
+                },
+            }
+        )
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.provider, WebhookEvent.PROVIDER_KORAPAY)
+
+        call_command("process_webhooks", once=True, stdout=StringIO())
+        self.txn.refresh_from_db()
+        self.assertTrue(self.txn.is_verified)
+
+    def test_unhandled_events_are_ignored(self):
+        self.post_paystack({"event": "subscription.create", "data": {"id": 5}})
+        process_pending()
+        self.assertEqual(
+            WebhookEvent.objects.get().status, WebhookEvent.STATUS_IGNORED
+        )
+
+    def test_failed_event_can_be_replayed(self):
+        self.post_paystack(self.charge_success(amount=250000))
+        with mock.patch.object(
+            Transaction, "save", side_effect=RuntimeError("database went away")
+        ):
+            process_pending()
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEvent.STATUS_FAILED)
+        self.assertIn("database went away", event.last_error)
+
+        call_command("replay_webhooks", stdout=StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.status, WebhookEvent.STATUS_PROCESSED)
+        self.assertEqual(event.attempts, 2)
+        self.txn.refresh_from_db()
+        self.assertTrue(self.txn.is_verified)
+
+
+def gateway_response(status_code, body=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body or {}).encode("utf-8")
+    return response
+
+
+class WebhookWorkerConnectionTests(TransactionTestCase):
+    def test_stale_connections_are_dropped_each_poll(self):
+        with mock.patch(
+            "transactions.management.commands.process_webhooks.close_old_connections"
+        ) as close_old, mock.patch(
+            "transactions.management.commands.process_webhooks.time.sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ):
+            call_command("process_webhooks", stdout=StringIO())
+        self.assertEqual(close_old.call_count, 2)
+
+
+@override_settings(KORAPAY_SECRET_KEY="sk", KORAPAY_PUBLIC_KEY="pk")
+class GatewayClientTests(TestCase):
+    def setUp(self):
+        reset_clients()
+        self.addCleanup(reset_clients)
+        self.client = KorapayClient(backoff=0)
+
+    def test_clients_are_shared_per_process(self):
+        self.assertIs(korapay(), korapay())
+        self.assertIsNot(korapay(), paystack())
+        adapter = korapay().session.get_adapter("https://api.korapay.com")
+        self.assertEqual(adapter._pool_maxsize, 16)
+
+    def test_idempotent_calls_retry_server_errors(self):
+        with mock.patch.object(
+            self.client.session,
+            "request",
+            side_effect=[gateway_response(503), gateway_response(200, {"ok": 1})],
+        ) as send:
+            response = self.client.get("misc/banks", endpoint="misc.banks")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send.call_count, 2)
+        _, kwargs = send.call_args
+        self.assertEqual(kwargs["timeout"], (3.05, 15))
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer sk")
+
+    def test_posts_are_not_retried_once_sent(self):
+        with mock.patch.object(
+            self.client.session, "request", side_effect=[gateway_response(503)]
+        ) as send:
+            response = self.client.post(
+                "charges/initialize", endpoint="charges.initialize", json={}
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(send.call_count, 1)
+
+        with mock.patch.object(
+            self.client.session, "request", side_effect=requests.ReadTimeout()
+        ) as send:
+            with self.assertRaises(requests.ReadTimeout):
+                self.client.post(
+                    "charges/initialize", endpoint="charges.initialize", json={}
+                )
+        self.assertEqual(send.call_count, 1)
+
+    def test_posts_retry_when_connection_never_opened(self):
+        with mock.patch.object(
+            self.client.session,
+            "request",
+            side_effect=[requests.ConnectTimeout(), gateway_response(200)],
+        ) as send:
+            self.client.post(
+                "charges/initialize", endpoint="charges.initialize", json={}
+            )
+        self.assertEqual(send.call_count, 2)
+
+    def test_service_functions_use_the_pool(self):
+        with mock.patch.object(
+            korapay().session,
+            "request",
+            return_value=gateway_response(200, {"status": True}),
+        ) as send:
+            korapay_payout_bank(
+                amount="1000",
+                bank_code="058",
+                account_number="0123456789",
+                reference="PO-1",
+                narration="Dues",
+                customer={"name": "Assoc"},
+            )
+        args, kwargs = send.call_args
+        self.assertEqual(
+            args, ("POST", "https://api.korapay.com/merchant/api/v1/transactions/disburse")
+        )
+        self.assertEqual(kwargs["json"]["reference"], "PO-1")
+
+
+@override_settings(
+    PAYSTACK_SECRET="sk_ps",
+    PAYSTACK_WEBHOOK_SECRET="ps-secret",
+    KORAPAY_SECRET_KEY="sk",
+    KORAPAY_PUBLIC_KEY="pk",
+    KORAPAY_WEBHOOK_SECRET="kp-secret",
+)
+class GatewaySimulatorTests(TestCase):
+    def setUp(self):
+        self.simulator = GatewaySimulator(
+            paystack_secret="ps-secret", korapay_secret="kp-secret", seed=1
+        )
+        server = self.simulator.make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = override_settings(
+            PAYSTACK_BASE_URL=f"{url}/paystack", KORAPAY_BASE_URL=f"{url}/korapay"
+        )
+        urls.enable()
+        self.addCleanup(urls.disable)
+        reset_clients()
+        self.addCleanup(reset_clients)
+        cache.delete(VerifyBankService.BANK_LIST_CACHE_KEY)
+
+    def initialize(self, reference="TX-0001-001-AA"):
+        return paystack_init_charge(
+            amount="2500.00",
+            currency="NGN",
+            reference=reference,
+            customer={"name": "Ada Obi", "email": "ada@example.com"},
+            redirect_url="https://duespay.app/payment/callback",
+        )
+
+    def test_paystack_initialize(self):
+        result = self.initialize()
+        self.assertTrue(result["status"])
+        self.assertEqual(result["data"]["reference"], "TX-0001-001-AA")
+        self.assertTrue(result["data"]["authorization_url"].startswith("https://"))
+
+    def test_korapay_banks_resolve_and_payout(self):
+        banks = VerifyBankService.get_bank_list()
+        self.assertIn({"name": "Zenith Bank", "code": "057"}, banks)
+        account = VerifyBankService.verify_account("0123456789", "057")
+        self.assertEqual(account["account_name"], "SIMULATED ACCOUNT 6789")
+        self.assertIsNone(VerifyBankService.verify_account("0123456789", "999"))
+
+        payout = dict(
+            amount="5000",
+            bank_code="057",
+            account_number="0123456789",
+            reference="PO-1",
+            narration="Dues payout",
+            customer={"name": "Assoc"},
+        )
+        self.assertTrue(korapay_payout_bank(**payout)["status"])
+        # A repeated reference comes back as a duplicate, which is treated as done
+        self.assertIn("Duplicate", korapay_payout_bank(**payout)["message"])
+
+    def test_injected_errors(self):
+        self.simulator.error_rate = 1
+        with self.assertRaises(Exception):
+            self.initialize()
+        self.assertEqual(
+            VerifyBankService.get_bank_list()[0], {"name": "Access Bank", "code": "044"}
+        )
+
+    def test_charges_are_followed_by_signed_webhooks(self):
+        delivered = threading.Event()
+        self.simulator.webhook_url = "http://app.invalid/api/transactions/webhook/"
+        self.simulator.webhook_delay = 0
+
+        def post_webhook(*args, **kwargs):
+            delivered.set()
+            return gateway_response(200)
+
+        with mock.patch(
+            "gateways.simulator.requests.post", side_effect=post_webhook
+        ) as post:
+            self.initialize("TX-0002-002-BB")
+            self.assertTrue(delivered.wait(5))
+
+        _, kwargs = post.call_args
+        self.assertTrue(
+            is_valid_paystack_signature(
+                kwargs["data"], kwargs["headers"]["x-paystack-signature"]
+            )
+        )
+        self.assertEqual(json.loads(kwargs["data"])["data"]["amount"], 250000)
+
+    def test_webhooks_verify_transactions(self):
+        scenario = seed_association(payers=1, items=0, transactions_per_payer=0)
+        association, session = scenario.association, scenario.session
+        payer = scenario.payers[0]
+        for provider in (PAYSTACK, KORAPAY):
+            txn = Transaction.objects.create(
+                payer=payer,
+                association=association,
+                session=session,
+                amount_paid=Decimal("0.00"),
+            )
+            amount = 250000 if provider == PAYSTACK else 2500
+            data = {"id": txn.pk, "reference": txn.reference_id, "amount": amount}
+            body, headers = self.simulator.webhook(provider, data)
+            headers.pop("Content-Type")
+            response = self.client.post(
+                "/api/transactions/webhook/",
+                data=body,
+                content_type="application/json",
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+            process_pending()
+            txn.refresh_from_db()
+            self.assertTrue(txn.is_verified)
+            self.assertEqual(txn.amount_paid, Decimal("2500.00"))
+
+
+@override_settings(
+    PAYMENT_STATUS_LONG_POLL=True,
+    PAYMENT_STATUS_CHANNEL="transactions.status.CacheChannel",
+)
+class PaymentStatusWaitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_channel()
+        scenario = seed_association(payers=1, transactions_per_payer=0)
+        self.txn = make_transaction(scenario.payers[0], scenario.items)
+        self.url = f"/api/transactions/payment/status/{self.txn.reference_id}"
+
+    def verify(self):
+        self.txn.is_verified = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.txn.save(update_fields=["is_verified"])
+
+    def test_verification_publishes_status(self):
+        self.verify()
+        published = cache.get(f"payment-status:{self.txn.reference_id}")
+        self.assertTrue(published["is_verified"])
+        self.assertEqual(published["receipt_id"], str(self.txn.receipt.receipt_id))
+
+    def test_wait_returns_published_status(self):
+        # Published by process_webhooks in another process
+        publish(self.txn.reference_id, {"exists": True, "is_verified": True})
+        response = self.client.get(f"{self.url}/wait/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["data"]["is_verified"])
+
+    def test_wait_times_out_with_pending_status(self):
+        start = time.monotonic()
+        response = self.client.get(f"{self.url}/wait/", {"timeout": 1})
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        data = response.json()["data"]
+        self.assertTrue(data["exists"])
+        self.assertFalse(data["is_verified"])
+
+    def test_wait_rechecks_database_after_timeout(self):
+        # The publish never reached this worker's cache
+        async def missed(reference, timeout):
+            await sync_to_async(self.verify)()
+            return None
+
+        with mock.patch.object(CacheChannel, "wait", side_effect=missed):
+            response = self.client.get(f"{self.url}/wait/", {"timeout": 1})
+        self.assertTrue(response.json()["data"]["is_verified"])
+
+    @override_settings(PAYMENT_STATUS_CHANNEL="transactions.status.DatabaseChannel")
+    def test_database_channel_sees_verification(self):
+        reset_channel()
+        self.verify()
+        channel = DatabaseChannel(poll_interval=0.01)
+        payload = async_to_sync(channel.wait)(self.txn.reference_id, 1)
+        self.assertTrue(payload["is_verified"])
+        self.assertEqual(payload["receipt_id"], str(self.txn.receipt.receipt_id))
+
+        pending = make_transaction(self.txn.payer, [])
+        self.assertIsNone(async_to_sync(channel.wait)(pending.reference_id, 0.05))
+
+    @override_settings(PAYMENT_STATUS_LONG_POLL=False)
+    def test_endpoints_hidden_unless_enabled(self):
+        self.assertEqual(self.client.get(f"{self.url}/wait/").status_code, 404)
+        self.assertEqual(self.client.get(f"{self.url}/events/").status_code, 404)
+
+    def test_wait_unknown_reference(self):
+        response = self.client.get("/api/transactions/payment/status/TX-NOPE/wait/")
+        self.assertEqual(response.json()["data"], {"exists": False})
+
+    async def test_events_stream(self):
+        await sync_to_async(self.verify)()
+        response = await self.async_client.get(f"{self.url}/events/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = "".join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertIn("event: status", body)
+        self.assertIn('"is_verified": true', body)
+
+    def test_local_channel_wakes_waiter(self):
+        channel = LocalChannel()
+
+        async def scenario():
+            waiter = asyncio.ensure_future(channel.wait("TX-1", 5))
+            await asyncio.sleep(0)
+            # Published from a worker thread, like a sync view would
+            threading.Timer(0.05, channel.publish, ("TX-1", {"ok": True})).start()
+            return await waiter
+
+        self.assertEqual(asyncio.run(scenario()), {"ok": True})
+        self.assertEqual(channel.waiters, {})
+
+        async def late():
+            return await channel.wait("TX-1", 1)
+
+        # A waiter arriving after the publish still sees it
+        self.assertEqual(asyncio.run(late()), {"ok": True})
+
+
+class ReceiptDocumentTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=1, transactions_per_payer=0)
+        self.txn = make_transaction(scenario.payers[0], scenario.items, verified=True)
+        self.receipt = TransactionReceipt.objects.get(transaction=self.txn)
+        self.url = f"/api/transactions/receipts/{self.receipt.receipt_id}/"
+
+    def test_document_rendered_at_issuance(self):
+        document = self.receipt.document
+        self.assertEqual(document["transaction_reference_id"], self.txn.reference_id)
+        self.assertEqual(document["amount_paid"], str(self.txn.amount_paid))
+        self.assertTrue(
+            document["receipt_no"].endswith(
+                f"/{self.receipt.receipt_no}/{self.receipt.issued_at:%y}"
+            )
+        )
+        self.assertEqual(
+            sorted(document["items_paid"]),
+            sorted(self.txn.line_items.values_list("title", flat=True)),
+        )
+
+    def test_served_from_document_with_cache_headers(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get(self.url)
+        self.assertEqual(response.data, self.receipt.document)
+        self.assertEqual(response["ETag"], self.receipt.document_etag)
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_backfill(self):
+        TransactionReceipt.objects.update(document=None, document_etag="")
+        out = StringIO()
+        call_command("render_receipts", batch_size=1, stdout=out)
+        self.assertIn("Rendered 1 receipt document(s).", out.getvalue())
+        self.receipt.refresh_from_db()
+        self.assertEqual(
+            self.receipt.document["transaction_reference_id"], self.txn.reference_id
+        )
+
+    def test_render_failure_still_queues_email(self):
+        payer = self.txn.payer
+        with mock.patch.object(
+            TransactionReceipt, "render_document", side_effect=RuntimeError("boom")
+        ):
+            txn = Transaction.objects.create(
+                payer=payer,
+                association=payer.association,
+                session=payer.session,
+                amount_paid=Decimal("100.00"),
+                is_verified=True,
+            )
+        receipt = TransactionReceipt.objects.get(transaction=txn)
+        self.assertIsNone(receipt.document)
+        self.assertTrue(
+            OutboxMessage.objects.filter(
+                kind=RECEIPT_EMAIL, payload={"receipt_id": receipt.pk}
+            ).exists()
+        )
+        # Rendered on first view instead
+        response = APIClient().get(f"/api/transactions/receipts/{receipt.receipt_id}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_unrendered_receipt_is_rendered_on_first_view(self):
+        TransactionReceipt.objects.update(document=None, document_etag="")
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.receipt.refresh_from_db()
+        self.assertEqual(response.data, self.receipt.document)
+
+
+class ReceiptPDFTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=3, transactions_per_payer=0)
+        self.session = scenario.session
+        self.receipts = []
+        for payer in scenario.payers:
+            txn = make_transaction(payer, scenario.items, verified=True)
+            self.receipts.append(TransactionReceipt.objects.get(transaction=txn))
+        self.logo = mock.patch.object(
+            pdf.requests, "get", side_effect=requests.ConnectionError("offline")
+        )
+        self.logo.start()
+        self.addCleanup(self.logo.stop)
+
+    def upload(self, file, **options):
+        return CloudinaryResource(
+            public_id=f"Duespay/receipts/{file.name}",
+            resource_type=options["resource_type"],
+            type="upload",
+            version="1",
+        )
+
+    def test_render(self):
+        receipt = self.receipts[0]
+        data = pdf.render_receipt_pdf(receipt)
+        self.assertTrue(data.startswith(b"%PDF"))
+        self.assertIs(pdf.get_renderer(), pdf.get_renderer())
+
+    def test_receipt_email_attaches_and_stores_pdf(self):
+        receipt = self.receipts[0]
+        with mock.patch(
+            "cloudinary.uploader.upload_resource", side_effect=self.upload
+        ) as upload:
+            email = receipt_email_from_outbox({"receipt_id": receipt.pk})
+        name, content, mimetype = email.attachments[0]
+        self.assertEqual(mimetype, "application/pdf")
+        self.assertTrue(content.startswith(b"%PDF"))
+        upload.assert_called_once()
+        receipt.refresh_from_db()
+        self.assertIn("Duespay/receipts", receipt.pdf_file_url)
+
+    def test_receipt_email_survives_pdf_failure(self):
+        receipt = self.receipts[0]
+        with mock.patch.object(
+            pdf.ReceiptRenderer, "render", side_effect=RuntimeError("boom")
+        ):
+            email = receipt_email_from_outbox({"receipt_id": receipt.pk})
+        self.assertEqual(email.attachments, [])
+
+    def test_batch_command(self):
+        out = StringIO()
+        with mock.patch("cloudinary.uploader.upload_resource", side_effect=self.upload):
+            call_command(
+                "render_receipt_pdfs", str(self.session.pk), workers=0, stdout=out
+            )
+        self.assertIn("Rendered 3 of 3 receipt PDF(s)", out.getvalue())
+        self.assertFalse(
+            TransactionReceipt.objects.filter(pdf_file__isnull=True).exists()
+        )
+
+        # Already rendered receipts are skipped
+        out = StringIO()
+        call_command("render_receipt_pdfs", str(self.session.pk), workers=0, stdout=out)
+        self.assertIn("Rendered 0 of 0", out.getvalue())
+
+
+class ResendReceiptsTests(TestCase):
+    def setUp(self):
+        scenario = seed_association(payers=3, transactions_per_payer=0)
+        self.session = scenario.session
+        for payer in scenario.payers:
+            make_transaction(payer, scenario.items, verified=True)
+        make_transaction(scenario.payers[0], scenario.items, verified=False)
+        OutboxMessage.objects.all().delete()
+        for patcher in (
+            mock.patch.object(
+                pdf.requests, "get", side_effect=requests.ConnectionError("offline")
+            ),
+            mock.patch.object(pdf, "store_receipt_pdf"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_command_sends_in_batches(self):
+        out = StringIO()
+        # The session, then one joined query streaming every receipt
+        with mock.patch("main.mail.time.sleep") as sleep, self.assertNumQueries(2):
+            call_command(
+                "resend_receipts",
+                str(self.session.pk),
+                batch_size=2,
+                pause=0.5,
+                stdout=out,
+            )
+        self.assertIn("Sent 3 receipt email(s)", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_queue_option_enqueues(self):
+        out = StringIO()
+        call_command("resend_receipts", str(self.session.pk), queue=True, stdout=out)
+        self.assertIn("Queued 3 receipt email(s)", out.getvalue())
+        self.assertEqual(OutboxMessage.objects.filter(kind=RECEIPT_EMAIL).count(), 3)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_admin_action_enqueues(self):
+        admin = AdminUser.objects.create_superuser(
+            email="root@example.com", username="root@example.com", password="x"
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            "/admin/association/session/",
+            {"action": "resend_receipts", "_selected_action": [self.session.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(OutboxMessage.objects.filter(kind=RECEIPT_EMAIL).count(), 3)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class OutboxDeliveryTests(TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(
+                pdf.requests, "get", side_effect=requests.ConnectionError("offline")
+            ),
+            mock.patch.object(pdf, "store_receipt_pdf"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_verified_transaction_is_mailed_by_worker(self):
+        scenario = seed_association(payers=1, transactions_per_payer=0)
+        payer = scenario.payers[0]
+        txn = make_transaction(payer, scenario.items, verified=True)
+        # Saving only queues; nothing goes out until the worker runs
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            set(OutboxMessage.objects.values_list("kind", flat=True)),
+            {NEW_TRANSACTION_EMAIL, RECEIPT_EMAIL},
+        )
+
+        out = StringIO()
+        call_command("run_outbox", once=True, stdout=out)
+        self.assertIn("sent=2", out.getvalue())
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT).exists()
+        )
+        sent = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn(txn.reference_id, sent[scenario.admin.email].body)
+        self.assertIn("Payment Receipt", sent[payer.email].subject)
+        self.assertEqual(sent[payer.email].attachments[0][2], "application/pdf")
+
+        # A second pass finds nothing left to send
+        call_command("run_outbox", once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class TransactionQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # Seconds per request; generous, so only a runaway endpoint trips it
+    max_seconds = 2.0
+
+    def setUp(self):
+        self.scenario = seed_association(items=3)
+        self.client = api_client(self.scenario.admin)
+
+    def add_transactions(self, n):
+        grow(self.scenario, n, transactions_per_payer=1)
+
+    def test_list(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/transactions/", {"page_size": 100}),
+            self.add_transactions,
+            max_queries=8,
+        )
+
+    def test_list_cursor_mode(self):
+        self.assertFlatQueries(
+            lambda: self.client.get("/api/transactions/", {"pagination": "cursor"}),
+            self.add_transactions,
+            max_queries=7,
+        )
+
+    def test_list_filtered(self):
+        self.assertFlatQueries(
+            lambda: self.client.get(
+                "/api/transactions/",
+                {"status": "verified", "search": "TX", "page_size": 100},
+            ),
+            self.add_transactions,
+            max_queries=8,
+        )
+
+    def test_detail(self):
+        self.add_transactions(1)
+        txn = self.scenario.transactions[0]
+        self.assertFlatQueries(
+            lambda: self.client.get(f"/api/transactions/{txn.pk}/"),
+            self.add_transactions,
+            max_queries=6,
+        )
+
+    def test_receipt_detail(self):
+        grow(self.scenario, 1, transactions_per_payer=0)
+        payer = self.scenario.payers[0]
+        receipts = []
+
+        def add_line_items(n):
+            # A fresh verified transaction with ``n`` more items each round
+            self.scenario.items += make_payment_items(
+                self.scenario.association, self.scenario.session, n
+            )
+            txn = make_transaction(payer, self.scenario.items, verified=True)
+            receipts.append(txn.receipt.receipt_id)
+
+        self.assertFlatQueries(
+            lambda: api_client().get(f"/api/transactions/receipts/{receipts[-1]}/"),
+            add_line_items,
+            max_queries=2,
+        )
@@ -6,6 +6,8 @@ from .views import (
     PaymentStatusView,
     TransactionReceiptDetailView,
     TransactionViewSet,
+    payment_status_events,
+    payment_status_wait,
     paystack_webhook,
 )
 
@@ -25,4 +27,14 @@ urlpatterns = [
         PaymentStatusView.as_view(),
         name="payment-status",
     ),
+    path(
+        "payment/status/<str:reference_id>/wait/",
+        payment_status_wait,
+        name="payment-status-wait",
+    ),
+    path(
+        "payment/status/<str:reference_id>/events/",
+        payment_status_events,
+        name="payment-status-events",
+    ),
 ] + router.urls  # Router URLs LAST
\ No newline at end of file
@@ -1,9 +1,16 @@
-import random
+import secrets
 import string
 
 
 def generate_unique_reference_id():
-    digits4 = "".join(random.choices(string.digits, k=4))
-    digits3 = "".join(random.choices(string.digits, k=3))
-    letters2 = "".join(random.choices(string.ascii_uppercase, k=2))
+    """
+    Random ``TX-dddd-ddd-LL`` reference (~6.8 billion values).
+
+    Uniqueness is enforced by the unique index, not a lookup: ``Transaction.save``
+    draws a fresh reference and retries when an insert collides. ``secrets`` is
+    used so forked gunicorn workers never share a random sequence.
+    """
+    digits4 = "".join(secrets.choice(string.digits) for _ in range(4))
+    digits3 = "".join(secrets.choice(string.digits) for _ in range(3))
+    letters2 = "".join(secrets.choice(string.ascii_uppercase) for _ in range(2))
     return f"TX-{digits4}-{digits3}-{letters2}"
@@ -1,75 +1,88 @@
 import json
 import logging
+from collections import defaultdict
 from decimal import Decimal
 from datetime import datetime, timedelta
 
 from django.conf import settings
-from django.db import models
-from django.http import HttpResponse, HttpResponseForbidden
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
 
 from association.models import Association, Session
+from main import search
+from main.pagination import KeysetPageNumberPagination
+from main.tenancy import TenantMixin
 from payers.models import Payer
 from payments.models import PaymentItem, ReceiverBankAccount
 from transactions.models import Transaction
+from utils.exports import EXPORT_CHUNK_SIZE, iter_batches, streaming_export_response
 
-print("DEBUG: Starting to import paystackServices")
-
+from . import webhooks
+from .chargeServices import is_valid_signature
 from .paystackServices import (
     is_valid_paystack_signature,
     paystack_init_charge
 )
-from .models import Transaction, TransactionReceipt
+from .models import (
+    SessionRollup,
+    Transaction,
+    TransactionLineItem,
+    TransactionReceipt,
+    WebhookEvent,
+)
 from .serializers import TransactionReceiptDetailSerializer, TransactionSerializer
+from .status import get_channel, load_status, status_payload
 
 logger = logging.getLogger(__name__)
 
-class TransactionPagination(PageNumberPagination):
-    page_size = 7  
-    page_size_query_param = 'page_size'  
+class TransactionPagination(KeysetPageNumberPagination):
+    page_size = 7
+    page_size_query_param = 'page_size'
     max_page_size = 1000
+    keyset_field = "submitted_at"
+
+# Query parameters that narrow TransactionViewSet.get_queryset
+FILTER_PARAMS = ("status", "search")
+
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(TenantMixin, viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = TransactionPagination
 
     def get_queryset(self):
-        association = getattr(self.request.user, "association", None)
-        queryset = Transaction.objects.none()
-
-        if association:
-            # Get session_id from query params or use current session
-            session_id = self.request.query_params.get("session_id")
-
-            if session_id:
-                # Validate that session belongs to this association
-                try:
-                    session = Session.objects.get(
-                        id=session_id, association=association
-                    )
-                    queryset = Transaction.objects.filter(session=session)
-                except Session.DoesNotExist:
-                    queryset = Transaction.objects.none()
-            elif association.current_session:
-                # Use current session if no session_id provided
-                queryset = Transaction.objects.filter(
-                    session=association.current_session
-                )
-            else:
-                # No session available, return empty queryset
-                queryset = Transaction.objects.none()
+        session = self.tenant.session
+        if session is not None:
+            queryset = Transaction.objects.filter(session=session)
+        else:
+            # No association, unknown session_id or no session yet
+            queryset = Transaction.objects.none()
+
+        # Payer columns and item titles are rendered for every row
+        queryset = queryset.select_related("payer").prefetch_related(
+            "line_items", "payment_items"
+        )
 
         # Filter by verification status (case-insensitive)
         status_param = self.request.query_params.get("status")
@@ -79,58 +92,96 @@ class TransactionViewSet(viewsets.ModelViewSet):
             elif status_param.lower() == "unverified":
                 queryset = queryset.filter(is_verified=False)
 
-        # Search by payer name or reference id (case-insensitive)
-        search = self.request.query_params.get("search")
-        if search:
-            queryset = queryset.filter(
-                models.Q(reference_id__icontains=search)
-                | models.Q(payer__first_name__icontains=search)
-                | models.Q(payer__last_name__icontains=search)
-                | models.Q(payer__matric_number__icontains=search)
+        # Search by reference id or payer details through the search index
+        search_term = self.request.query_params.get("search")
+        if search_term:
+            queryset = search.filter_queryset(
+                queryset, search.TRANSACTION, search_term
             )
 
         return queryset
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Stream the filtered session transactions as CSV (default) or XLSX"""
+        queryset = (
+            self.get_queryset()
+            .select_related(None)
+            .prefetch_related(None)
+            .order_by("-submitted_at", "-id")
+            .values_list(
+                "id",
+                "reference_id",
+                "payer__first_name",
+                "payer__last_name",
+                "payer__matric_number",
+                "payer__email",
+                "payer__level",
+                "amount_paid",
+                "is_verified",
+                "submitted_at",
+            )
+        )
+        header = [
+            "Reference ID",
+            "First Name",
+            "Last Name",
+            "Matric Number",
+            "Email",
+            "Level",
+            "Amount Paid",
+            "Verified",
+            "Items Paid",
+            "Submitted At",
+        ]
+
+        def rows():
+            for batch in iter_batches(queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                titles = defaultdict(list)
+                lines = TransactionLineItem.objects.filter(
+                    transaction_id__in=[row[0] for row in batch]
+                ).values_list("transaction_id", "title")
+                for transaction_id, title in lines:
+                    titles[transaction_id].append(title)
+                for txn_id, *fields, submitted_at in batch:
+                    yield [*fields, ", ".join(titles[txn_id]), submitted_at]
+
+        return streaming_export_response(
+            header,
+            rows(),
+            filename=f"transactions-{timezone.now():%Y%m%d-%H%M}",
+            file_format=request.query_params.get("file_format", "csv"),
+        )
+
     def perform_create(self, serializer):
-        association = getattr(self.request.user, "association", None)
-        if not association or not association.current_session:
+        if not self.tenant.current_session:
             raise ValidationError(
                 "No current session available. Please create a session first."
             )
 
         serializer.save(
             payer=self.request.user.payer,
-            association=association,
-            session=association.current_session,  # Auto-assign current session
+            association=self.tenant.association,
+            session=self.tenant.current_session,  # Auto-assign current session
         )
 
     def list(self, request, *args, **kwargs):
         # Check if association has a current session
-        association = getattr(self.request.user, "association", None)
-        if not association:
+        if not self.tenant.association:
             return Response(
                 {"error": "No association found for user"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        session_id = self.request.query_params.get("session_id")
-        current_session = None
-
-        if session_id:
-            try:
-                current_session = Session.objects.get(
-                    id=session_id, association=association
-                )
-            except Session.DoesNotExist:
-                return Response(
-                    {
-                        "error": "Session not found or does not belong to your association"
-                    },
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-        elif association.current_session:
-            current_session = association.current_session
-        else:
+        current_session = self.tenant.session
+        if self.tenant.session_not_found:
+            return Response(
+                {
+                    "error": "Session not found or does not belong to your association"
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if current_session is None:
             return Response(
                 {
                     "error": "No session available. Please create a session first.",
@@ -160,18 +211,26 @@ class TransactionViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(queryset, many=True)
             data = serializer.data
 
-        total_collections = (
-            queryset.aggregate(total=models.Sum("amount_paid"))["total"] or 0
-        )
-
-        # Completed Payments (assuming is_verified=True means completed)
-        completed_count = queryset.filter(is_verified=True).count()
-
-        # Pending Payments (assuming is_verified=False means pending)
-        pending_count = queryset.filter(is_verified=False).count()
+        if any(request.query_params.get(name) for name in FILTER_PARAMS):
+            # Totals describe what the filters matched, in one aggregate
+            totals = queryset.order_by().aggregate(
+                total_amount=Sum("amount_paid"),
+                total_count=Count("id"),
+                verified_count=Count("id", filter=Q(is_verified=True)),
+            )
+            total_collections = totals["total_amount"] or 0
+            total_count = totals["total_count"]
+            completed_count = totals["verified_count"]
+            pending_count = total_count - completed_count
+        else:
+            # The whole session's totals come from the maintained rollup
+            rollup = SessionRollup.for_session(current_session)
+            total_collections = rollup.total_amount
+            completed_count = rollup.verified_count
+            pending_count = rollup.pending_count
+            total_count = rollup.total_count
 
         # Calculate percentages
-        total_count = queryset.count()
         percent_completed = (
             round((completed_count / total_count * 100), 1) if total_count > 0 else 0
         )
@@ -218,13 +277,37 @@ class TransactionViewSet(viewsets.ModelViewSet):
 
 
 class TransactionReceiptDetailView(RetrieveAPIView):
-    queryset = TransactionReceipt.objects.select_related(
-        "transaction__payer", "transaction__association", "transaction__session"
-    ).prefetch_related("transaction__payment_items")
+    """
+    Public receipt page. Serves the document rendered at issuance, which
+    never changes, so browsers and CDNs may keep it for a year.
+    """
+
+    queryset = TransactionReceipt.objects.only(
+        "id", "receipt_id", "document", "document_etag"
+    )
     serializer_class = TransactionReceiptDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = "receipt_id"
 
+    def retrieve(self, request, *args, **kwargs):
+        receipt = self.get_object()
+        if receipt.document is None:
+            # Issued before documents existed and not yet backfilled by
+            # render_receipts
+            receipt = TransactionReceipt.for_rendering().get(pk=receipt.pk)
+            receipt.render_document()
+            receipt.save(update_fields=["document", "document_etag"])
+
+        headers = {
+            "ETag": receipt.document_etag,
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
+        if receipt.document_etag in parse_etags(
+            request.headers.get("If-None-Match", "")
+        ):
+            return HttpResponseNotModified(headers=headers)
+        return Response(receipt.document, headers=headers)
+
 
 class InitiatePaymentView(APIView):
     permission_classes = [AllowAny]
@@ -254,25 +337,27 @@ class InitiatePaymentView(APIView):
             return Response(
                 {"error": "payment_item_ids must be a non-empty list"}, status=400
             )
-        items_qs = PaymentItem.objects.filter(id__in=item_ids, session=session)
-        if items_qs.count() != len(set(item_ids)):
+        items = list(PaymentItem.objects.filter(id__in=item_ids, session=session))
+        if len(items) != len(set(item_ids)):
             return Response(
                 {"error": "One or more payment items not found for the session"},
                 status=400,
             )
 
         # Calculate total amount from payment items (no fees)
-        total_amount = sum((item.amount for item in items_qs), Decimal("0.00"))
-
-        # Create pending transaction
-        txn = Transaction.objects.create(
-            payer=payer,
-            association=association,
-            amount_paid=total_amount,
-            is_verified=False,
-            session=session,
-        )
-        txn.payment_items.set(items_qs)
+        total_amount = sum((item.amount for item in items), Decimal("0.00"))
+
+        # Create pending transaction, with its items and lines or not at all
+        with db_transaction.atomic():
+            txn = Transaction.objects.create(
+                payer=payer,
+                association=association,
+                amount_paid=total_amount,
+                is_verified=False,
+                session=session,
+            )
+            txn.payment_items.set(items)
+            TransactionLineItem.snapshot(txn, items)
 
         # Customer details - always use payer information
         full_name = f"{getattr(payer, 'first_name', '')} {getattr(payer, 'last_name', '')}".strip() or "DuesPay User"
@@ -297,10 +382,11 @@ class InitiatePaymentView(APIView):
         }
 
         logger.info(
-            f"[INITIATE] ref={txn.reference_id} amount={total_amount} customer={customer} redirect={redirect_url}"
-        )
-        print(
-            f"[{timezone.now().isoformat()}] INITIATE ref={txn.reference_id} amount={total_amount}"
+            "[INITIATE] ref=%s amount=%s customer=%s redirect=%s",
+            txn.reference_id,
+            total_amount,
+            customer,
+            redirect_url,
         )
 
         try:
@@ -314,7 +400,7 @@ class InitiatePaymentView(APIView):
             )
         except Exception:
             logger.exception(
-                f"[INITIATE][ERROR] ref={txn.reference_id} Paystack init failed"
+                "[INITIATE][ERROR] ref=%s Paystack init failed", txn.reference_id
             )
             return Response({"error": "Failed to initialize payment"}, status=502)
 
@@ -322,7 +408,9 @@ class InitiatePaymentView(APIView):
         checkout_url = data_obj.get("authorization_url")
         if not checkout_url:
             logger.error(
-                f"[INITIATE][ERROR] ref={txn.reference_id} Missing authorization_url resp={paystack_res}"
+                "[INITIATE][ERROR] ref=%s Missing authorization_url resp=%s",
+                txn.reference_id,
+                paystack_res,
             )
             return Response(
                 {
@@ -333,7 +421,7 @@ class InitiatePaymentView(APIView):
             )
 
         logger.info(
-            f"[INITIATE][OK] ref={txn.reference_id} authorization_url={checkout_url}"
+            "[INITIATE][OK] ref=%s authorization_url=%s", txn.reference_id, checkout_url
         )
         
         # Clean response without fees
@@ -346,61 +434,35 @@ class InitiatePaymentView(APIView):
             status=201,
         )
 
-# New Paystack Webhook
+# Payment provider webhooks (Paystack and Korapay share this endpoint)
 @csrf_exempt
 @require_http_methods(["POST"])
 def paystack_webhook(request):
     """
-    Handles Paystack webhook events for payment verification
+    Records webhook deliveries for process_webhooks and acks right away
     """
-    signature = request.headers.get("x-paystack-signature")
-    if not is_valid_paystack_signature(request.body, signature):
-        logger.warning("[PAYSTACK_WEBHOOK] invalid signature")
-        return HttpResponseForbidden()
-
-    try:
-        payload = json.loads(request.body.decode("utf-8"))
-    except json.JSONDecodeError:
-        logger.error("[PAYSTACK_WEBHOOK] invalid JSON")
-        return HttpResponse(status=200)
-
-    event = payload.get("event")
-    data = payload.get("data") or {}
-    logger.info(f"[PAYSTACK_WEBHOOK] event={event} data_keys={list(data.keys())}")
-    print(f"[{timezone.now().isoformat()}] PAYSTACK_WEBHOOK event={event}")
-
-    # Handle successful charge events
-    if event not in ("charge.success", "transfer.success"):
-        return HttpResponse(status=200)
-
-    # Get reference from webhook data
-    reference = data.get("reference")
-    if not reference:
-        logger.warning("[PAYSTACK_WEBHOOK] No reference in webhook data")
-        return HttpResponse(status=200)
+    if "x-korapay-signature" in request.headers:
+        provider = WebhookEvent.PROVIDER_KORAPAY
+        valid = is_valid_signature(
+            request.body, request.headers.get("x-korapay-signature")
+        )
+    else:
+        provider = WebhookEvent.PROVIDER_PAYSTACK
+        valid = is_valid_paystack_signature(
+            request.body, request.headers.get("x-paystack-signature")
+        )
 
-    try:
-        txn = Transaction.objects.get(reference_id=reference)
-    except Transaction.DoesNotExist:
-        logger.warning(f"[PAYSTACK_WEBHOOK] No transaction found for ref={reference}")
-        return HttpResponse(status=200)
+    tag = f"{provider.upper()}_WEBHOOK"
+    if not valid:
+        logger.warning("[%s] invalid signature", tag)
+        return HttpResponseForbidden()
 
-    if txn.is_verified:
-        logger.info(f"[PAYSTACK_WEBHOOK] Already verified ref={txn.reference_id}")
+    payload = webhooks.record_event(provider, request.body)
+    if payload is None:
+        logger.error("[%s] invalid JSON", tag)
         return HttpResponse(status=200)
 
-    # Get amount from webhook (in kobo, convert to naira)
-    amount_kobo = data.get("amount", 0)
-    amount_naira = Decimal(str(amount_kobo)) / 100
-
-    # Update transaction
-    txn.amount_paid = amount_naira
-    txn.is_verified = True
-    txn.save(update_fields=["amount_paid", "is_verified"])
-    
-    logger.info(f"[PAYSTACK_WEBHOOK][VERIFIED] ref={txn.reference_id} amount={txn.amount_paid}")
-    print(f"[{timezone.now().isoformat()}] PAYSTACK VERIFIED ref={txn.reference_id} amount={txn.amount_paid}")
-
+    logger.info("[%s] event=%s queued", tag, payload.get("event"))
     return HttpResponse(status=200)
 
 
@@ -420,11 +482,84 @@ class PaymentStatusView(APIView):
             return Response({"exists": False}, status=200)
 
         receipt = getattr(txn, "receipt", None)
-        payload = {
-            "exists": True,
-            "reference_id": txn.reference_id,
-            "is_verified": txn.is_verified,
-            "amount_paid": str(txn.amount_paid),
-            "receipt_id": getattr(receipt, "receipt_id", None),
-        }
+        payload = status_payload(
+            txn.reference_id,
+            txn.is_verified,
+            txn.amount_paid,
+            getattr(receipt, "receipt_id", None),
+        )
         return Response(payload, status=200)
+
+
+def wait_timeout(request):
+    """Seconds to park, from ``?timeout=`` capped at PAYMENT_STATUS_WAIT_TIMEOUT"""
+    limit = getattr(settings, "PAYMENT_STATUS_WAIT_TIMEOUT", 25)
+    try:
+        return max(1, min(int(request.GET.get("timeout", limit)), limit))
+    except ValueError:
+        return limit
+
+
+async def await_status(reference_id, timeout):
+    """The status once verified, or the current status after ``timeout``"""
+    payload = await load_status(reference_id)
+    if not payload["exists"] or payload["is_verified"]:
+        return payload
+    published = await get_channel().wait(reference_id, timeout)
+    # A missed or lost publish must not report a verified payment as pending
+    return published or await load_status(reference_id)
+
+
+def require_long_poll():
+    """Parked requests tie up a whole sync worker, so they need ASGI"""
+    if not getattr(settings, "PAYMENT_STATUS_LONG_POLL", False):
+        raise Http404
+
+
+@require_http_methods(["GET"])
+async def payment_status_wait(request, reference_id):
+    """
+    Long-poll variant of PaymentStatusView: answers as soon as the payment is
+    verified, or with the unverified status after the timeout.
+    """
+    require_long_poll()
+    payload = await await_status(reference_id, wait_timeout(request))
+    return JsonResponse(
+        {"success": True, "message": "Request successful", "data": payload}
+    )
+
+
+@require_http_methods(["GET"])
+async def payment_status_events(request, reference_id):
+    """
+    Server-Sent Events variant: one ``status`` event now and another when the
+    payment is verified, or a ``timeout`` event after which the browser's
+    EventSource reconnects.
+    """
+    require_long_poll()
+    timeout = wait_timeout(request)
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    async def stream():
+        yield "retry: 2000\n\n"
+        payload = await load_status(reference_id)
+        yield event("status", payload)
+        if not payload["exists"] or payload["is_verified"]:
+            return
+        published = await get_channel().wait(reference_id, timeout)
+        if published is None:
+            payload = await load_status(reference_id)
+            if payload.get("is_verified"):
+                published = payload
+        if published is None:
+            yield event("timeout", {})
+        else:
+            yield event("status", published)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Keep nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,162 @@
+"""
+Webhook inbox.
+
+The webhook view only checks the signature and records the raw delivery as a
+``WebhookEvent`` with one ``INSERT ... ON CONFLICT DO NOTHING``; a provider
+retrying the same event hits the (provider, event_id) constraint and is acked
+without extra work. ``process_webhooks`` later applies pending events in
+batches. Handlers are idempotent so ``replay_webhooks`` can safely run them
+again for events that failed.
+"""
+
+import hashlib
+import json
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Transaction, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+_handlers = {}
+
+
+def handler(provider, *event_types):
+    def register(func):
+        for event_type in event_types:
+            _handlers[(provider, event_type)] = func
+        return func
+
+    return register
+
+
+def event_id_for(provider, payload, raw_body):
+    """The provider's id for this delivery, falling back to a hash of the body."""
+    data = payload.get("data") or {}
+    event_type = payload.get("event") or ""
+    if provider == WebhookEvent.PROVIDER_PAYSTACK and data.get("id"):
+        return f"{event_type}:{data['id']}"
+    if provider == WebhookEvent.PROVIDER_KORAPAY and data.get("reference"):
+        return f"{event_type}:{data['reference']}"
+    return f"sha256:{hashlib.sha256(raw_body).hexdigest()}"
+
+
+def record_event(provider, raw_body):
+    """
+    Store one delivery. Returns the parsed payload, or ``None`` for a body
+    that isn't a JSON object (nothing is stored then).
+    """
+    try:
+        payload = json.loads(raw_body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    WebhookEvent.objects.bulk_create(
+        [
+            WebhookEvent(
+                provider=provider,
+                event_type=str(payload.get("event") or "")[:100],
+                event_id=event_id_for(provider, payload, raw_body)[:255],
+                body=raw_body.decode("utf-8"),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    return payload
+
+
+def _verify_transaction(provider, reference, amount):
+    tag = f"{provider.upper()}_WEBHOOK"
+    if not reference:
+        logger.warning("[%s] No reference in webhook data", tag)
+        return WebhookEvent.STATUS_IGNORED
+
+    txn = Transaction.objects.select_for_update().filter(reference_id=reference).first()
+    if txn is None:
+        logger.warning("[%s] No transaction found for ref=%s", tag, reference)
+        return WebhookEvent.STATUS_IGNORED
+
+    if txn.is_verified:
+        logger.info("[%s] Already verified ref=%s", tag, reference)
+        return WebhookEvent.STATUS_PROCESSED
+
+    txn.amount_paid = amount
+    txn.is_verified = True
+    txn.save(update_fields=["amount_paid", "is_verified"])
+    logger.info("[%s][VERIFIED] ref=%s amount=%s", tag, reference, txn.amount_paid)
+    return WebhookEvent.STATUS_PROCESSED
+
+
+@handler(WebhookEvent.PROVIDER_PAYSTACK, "charge.success", "transfer.success")
+def paystack_charge_success(data):
+    # Paystack amounts are in kobo
+    amount = Decimal(str(data.get("amount", 0))) / 100
+    return _verify_transaction(
+        WebhookEvent.PROVIDER_PAYSTACK, data.get("reference"), amount
+    )
+
+
+@handler(WebhookEvent.PROVIDER_KORAPAY, "charge.success")
+def korapay_charge_success(data):
+    if data.get("status") not in (None, "success"):
+        return WebhookEvent.STATUS_IGNORED
+    # Korapay amounts are already in naira
+    amount = Decimal(str(data.get("amount", 0)))
+    return _verify_transaction(
+        WebhookEvent.PROVIDER_KORAPAY, data.get("reference"), amount
+    )
+
+
+def process_event(event):
+    """Apply one event; called with the event row locked."""
+    event.attempts += 1
+    status, last_error = WebhookEvent.STATUS_IGNORED, ""
+
+    func = _handlers.get((event.provider, event.event_type))
+    if func is not None:
+        try:
+            with transaction.atomic():
+                payload = json.loads(event.body)
+                status = func(payload.get("data") or {})
+        except Exception as error:
+            status = WebhookEvent.STATUS_FAILED
+            last_error = f"{type(error).__name__}: {error}"
+            logger.error(
+                "Webhook event %s (%s %s) failed: %s",
+                event.pk,
+                event.provider,
+                event.event_type,
+                last_error,
+            )
+
+    event.status = status
+    event.last_error = last_error
+    event.processed_at = timezone.now()
+    event.save(update_fields=["status", "attempts", "last_error", "processed_at"])
+    return status
+
+
+def process_pending(batch_size=BATCH_SIZE, queryset=None):
+    """Process one batch of pending events. Returns the number handled."""
+    if queryset is None:
+        queryset = WebhookEvent.objects.all()
+    with transaction.atomic():
+        events = list(
+            queryset.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.STATUS_PENDING)
+            .order_by("id")[:batch_size]
+        )
+        for event in events:
+            process_event(event)
+    return len(events)
+
+
+def requeue(queryset):
+    return queryset.update(status=WebhookEvent.STATUS_PENDING, last_error="")
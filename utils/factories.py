@@ -0,0 +1,125 @@
+"""
+Data factories for a realistic association: an admin, a current session,
+payment items, payers and their transactions, with Faker filling in the
+details. The tests grow data with them to check that query counts stay flat,
+and ``seed_loadtest`` uses them to seed load-test databases.
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+from faker import Faker
+
+PASSWORD = "Passw0rd!"
+LEVELS = ["100", "200", "300", "400", "500"]
+# Every seeded payer shares this domain, so it is a search term that matches all
+PAYER_EMAIL_DOMAIN = "students.example.edu"
+
+fake = Faker("en_US")
+fake.seed_instance(2025)
+
+
+def make_admin():
+    from main.models import AdminUser
+
+    email = fake.unique.email()
+    return AdminUser.objects.create_user(
+        email=email,
+        username=email,
+        password=PASSWORD,
+        first_name=fake.first_name(),
+        last_name=fake.unique.last_name(),
+    )
+
+
+def make_session(association, current=True):
+    from association.models import Session
+
+    session = Session.objects.create(
+        association=association,
+        title=fake.unique.numerify("20##/20##"),
+        is_active=current,
+    )
+    if current:
+        association.current_session = session
+        association.save(update_fields=["current_session"])
+    return session
+
+
+def make_payment_items(association, session, count):
+    from payments.models import PaymentItem
+
+    return [
+        PaymentItem.objects.create(
+            association=association,
+            session=session,
+            title=fake.unique.catch_phrase()[:100],
+            amount=Decimal(fake.random_int(5, 200) * 100),
+            status=fake.random_element(["compulsory", "optional"]),
+            compulsory_for=["All Levels"],
+        )
+        for _ in range(count)
+    ]
+
+
+def make_payers(association, session, count):
+    from payers.models import Payer
+
+    return [
+        Payer.objects.create(
+            association=association,
+            session=session,
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            email=f"{fake.unique.user_name()}@{PAYER_EMAIL_DOMAIN}",
+            phone_number=fake.unique.numerify("080########"),
+            matric_number=fake.unique.bothify("???/#####").upper(),
+            level=fake.random_element(LEVELS),
+            faculty=fake.random_element(["Science", "Arts", "Engineering"]),
+            department=fake.job()[:100],
+        )
+        for _ in range(count)
+    ]
+
+
+def make_transaction(payer, items, verified=False):
+    from transactions.models import Transaction, TransactionLineItem
+
+    txn = Transaction.objects.create(
+        payer=payer,
+        association=payer.association,
+        session=payer.session,
+        amount_paid=sum((item.amount for item in items), Decimal("0.00")),
+        is_verified=verified,
+    )
+    txn.payment_items.set(items)
+    TransactionLineItem.snapshot(txn, items)
+    return txn
+
+
+def seed_association(payers=0, items=2, transactions_per_payer=1):
+    """An admin's association with a current session and optional data."""
+    admin = make_admin()
+    association = admin.association
+    session = make_session(association)
+    scenario = SimpleNamespace(
+        admin=admin,
+        association=association,
+        session=session,
+        items=make_payment_items(association, session, items),
+        payers=[],
+        transactions=[],
+    )
+    grow(scenario, payers, transactions_per_payer)
+    return scenario
+
+
+def grow(scenario, payers, transactions_per_payer=1):
+    """Add ``payers`` payers whose transactions alternate verified and pending."""
+    for payer in make_payers(scenario.association, scenario.session, payers):
+        scenario.payers.append(payer)
+        for _ in range(transactions_per_payer):
+            verified = len(scenario.transactions) % 2 == 0
+            items = fake.random_elements(scenario.items, unique=True)
+            scenario.transactions.append(make_transaction(payer, items, verified))
+    return scenario
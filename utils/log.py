@@ -0,0 +1,110 @@
+"""
+Non-blocking structured logging.
+
+``AsyncLogHandler`` is the only handler the app loggers write to. It puts
+records on an in-memory queue, and a ``QueueListener`` thread formats them
+as JSON and does the console/file I/O, so a request never waits on a disk
+write. Call sites pass ``%``-style args (``logger.info("ref=%s", ref)``)
+so disabled levels cost nothing. Debug tracing is only enabled with
+``LOG_DEBUG_TRACING`` and is then sampled by ``SampledDebugFilter``.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from queue import SimpleQueue
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra=`` fields kept as keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampledDebugFilter(logging.Filter):
+    """Let through every record above DEBUG and a ``rate`` fraction of DEBUG ones."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class AsyncLogHandler(QueueHandler):
+    """
+    Queue front for the console and (optional) file handlers.
+
+    ``prepare`` resolves the message and traceback on the calling thread,
+    since the args may be model instances that must not be touched from the
+    listener thread; everything after that happens on the listener.
+    """
+
+    def __init__(self, filename=None, console=True, json_format=True):
+        super().__init__(SimpleQueue())
+        formatter = JsonFormatter() if json_format else logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s %(message)s"
+        )
+        self.targets = []
+        if console:
+            self.targets.append(logging.StreamHandler(sys.stderr))
+        if filename:
+            self.targets.append(WatchedFileHandler(filename, delay=True))
+        for target in self.targets:
+            target.setFormatter(formatter)
+
+        self.listener = None
+        self.start()
+        atexit.register(self.stop)
+        if hasattr(os, "register_at_fork"):
+            # Listener threads don't survive fork (gunicorn --preload)
+            os.register_at_fork(after_in_child=self.restart)
+
+    def start(self):
+        self.listener = QueueListener(self.queue, *self.targets)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def restart(self):
+        self.queue = SimpleQueue()
+        self.listener = None
+        self.start()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
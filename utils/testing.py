@@ -0,0 +1,82 @@
+"""
+Query-budget assertions shared by the apps' tests. The data factories live
+in ``utils.factories`` and are re-exported here for the tests.
+"""
+
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .factories import (  # noqa: F401
+    LEVELS,
+    PASSWORD,
+    PAYER_EMAIL_DOMAIN,
+    fake,
+    grow,
+    make_admin,
+    make_payers,
+    make_payment_items,
+    make_session,
+    make_transaction,
+    seed_association,
+)
+
+
+def api_client(user=None):
+    """An APIClient sending a real access token, so auth queries are counted."""
+    from rest_framework.test import APIClient
+
+    from main.serializers import CustomTokenObtainPairSerializer
+
+    client = APIClient()
+    if user is not None:
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class QueryBudgetMixin:
+    """
+    ``assertFlatQueries`` grows the data through ``sizes`` and requests the
+    endpoint at each size, failing if it runs more than ``max_queries``
+    queries or if the count changes as rows are added (an N+1). Set
+    ``max_seconds`` on the class (or pass it) to also bound each request's
+    wall time; keep it generous, since CI runners are noisy.
+    """
+
+    sizes = (3, 30, 100)
+    max_seconds = None
+
+    def assertQueryBudget(self, fetch, max_queries, max_seconds=None):
+        max_seconds = max_seconds or self.max_seconds
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = fetch()
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(response.status_code, 400, getattr(response, "data", None))
+        self.assertLessEqual(
+            len(queries),
+            max_queries,
+            "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        if max_seconds is not None:
+            self.assertLess(elapsed, max_seconds)
+        return response, len(queries)
+
+    def assertFlatQueries(self, fetch, add_rows, max_queries, max_seconds=None):
+        """``add_rows(n)`` must bring the data set up by ``n`` rows."""
+        counts = []
+        seeded = 0
+        for size in self.sizes:
+            add_rows(size - seeded)
+            seeded = size
+            # Re-prime the cached auth user (adding sessions invalidates it),
+            # so every size measures the steady-state request
+            fetch()
+            _, count = self.assertQueryBudget(fetch, max_queries, max_seconds)
+            counts.append(count)
+        self.assertEqual(
+            len(set(counts)), 1, f"Query count changed with data size: {counts}"
+        )